@@ -1,4 +1,4 @@
 # addons/isra_qr_integration/__init__.py
 from . import models
 from . import controllers
-
+from . import tools
@@ -26,12 +26,20 @@
         'portal',
     ],
     'external_dependencies': {
-        'python': ['qrcode', 'pillow'],
+        'python': ['qrcode', 'pillow', 'cryptography'],
     },
     'data': [
+        # Sécurité
+        'security/ir.model.access.csv',
+        
+        # Données
+        'data/ir_cron.xml',
+        'data/signing_keys.xml',
+        
         # Templates et vues
         'views/qr_scanner_templates.xml',
         'views/qr_scanner_menu.xml',
+        'views/qr_verification_report_views.xml',
     ],
     'assets': {
         'web.assets_backend': [
@@ -43,8 +51,7 @@
             # JavaScript pour le site public
             'isra_qr_integration/static/src/js/qr_scanner.js',
             'isra_qr_integration/static/src/css/qr_scanner.css',
-            # Librairie jsQR depuis CDN
-            'https://cdn.jsdelivr.net/npm/jsqr@1.4.0/dist/jsQR.js',
+            # qr_decoder.js est chargé par le worker de décodage, hors bundle
         ],
         'website.assets_frontend': [
             # Styles spécifiques au site web
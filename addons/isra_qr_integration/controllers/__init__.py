@@ -1 +1,3 @@
-from . import qr_verification
\ No newline at end of file
+from . import qr_verification
+from . import qr_image
+from . import qr_offline
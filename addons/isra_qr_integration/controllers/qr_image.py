@@ -0,0 +1,84 @@
+# controllers/qr_image.py
+from odoo import http
+from odoo.http import request
+from odoo.tools.lru import LRU
+from odoo.addons.isra_seeds_traceability.tools import qr_render
+import base64
+
+# Images déjà rendues par ce worker, indexées par empreinte (contenu + rendu)
+_image_cache = LRU(2048)
+
+# Durées de cache HTTP (secondes)
+QR_MAX_AGE = 86400            # URL non versionnée : revalidation quotidienne par ETag
+QR_IMMUTABLE_MAX_AGE = 31536000  # URL versionnée (?v=<empreinte>) : contenu figé
+
+CONTENT_TYPES = {
+    qr_render.FORMAT_PNG: 'image/png',
+    qr_render.FORMAT_SVG: 'image/svg+xml',
+}
+
+
+class QRImageController(http.Controller):
+    """Rendu à la demande des QR codes des lots, avec ETag et cache HTTP"""
+
+    @http.route('/isra/qr/<string:lot_name>.png', type='http', auth='public', methods=['GET'], sitemap=False)
+    def qr_image_png(self, lot_name, v=None, **kwargs):
+        """Image PNG du QR code d'un lot"""
+        return self._serve_qr(lot_name, qr_render.FORMAT_PNG, v)
+
+    @http.route('/isra/qr/<string:lot_name>.svg', type='http', auth='public', methods=['GET'], sitemap=False)
+    def qr_image_svg(self, lot_name, v=None, **kwargs):
+        """Image SVG du QR code d'un lot"""
+        return self._serve_qr(lot_name, qr_render.FORMAT_SVG, v)
+
+    def _serve_qr(self, lot_name, image_format, version=None):
+        lot = request.env['isra.seed.lot'].sudo().search([
+            ('name', '=', lot_name),
+            ('is_active', '=', True)
+        ], limit=1)
+
+        if not lot:
+            return request.not_found()
+
+        payload = lot._get_qr_payload()
+        config = lot._get_qr_config()
+        checksum = request.env['isra.qr.image']._compute_checksum(
+            payload, qr_render.render_key(config, image_format)
+        )
+        etag = f'"{checksum}"'
+
+        # Une URL versionnée sur l'empreinte courante ne changera jamais de contenu
+        if version and version == checksum:
+            cache_control = f'public, max-age={QR_IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            cache_control = f'public, max-age={QR_MAX_AGE}'
+        headers = [('ETag', etag), ('Cache-Control', cache_control)]
+
+        if etag in self._parse_if_none_match():
+            return request.make_response(b'', headers=headers, status=304)
+
+        image = self._get_image(lot, checksum, payload, config, image_format)
+        headers += [
+            ('Content-Type', CONTENT_TYPES[image_format]),
+            ('Content-Length', str(len(image))),
+        ]
+        return request.make_response(image, headers=headers)
+
+    def _parse_if_none_match(self):
+        header = request.httprequest.headers.get('If-None-Match', '')
+        # Les ETag faibles (W/"...") désignent le même contenu pour un GET
+        return {tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()}
+
+    def _get_image(self, lot, checksum, payload, config, image_format):
+        """Image depuis le cache du worker, l'image stockée du lot, ou rendue à la volée"""
+        image = _image_cache.get(checksum)
+        if image is not None:
+            return image
+
+        if image_format == qr_render.FORMAT_PNG and lot.qr_image_id.checksum == checksum:
+            image = base64.b64decode(lot.qr_image_id.image)
+        else:
+            image = qr_render.render(payload, config, image_format)
+
+        _image_cache[checksum] = image
+        return image
@@ -0,0 +1,27 @@
+# controllers/qr_offline.py
+from odoo import http
+from odoo.http import request
+import json
+
+
+class QROfflineController(http.Controller):
+    """Index des lots pour la vérification hors ligne du scanner"""
+
+    @http.route('/isra/api/offline_bundle', type='http', auth='user', methods=['GET'], sitemap=False)
+    def offline_bundle(self, since=0, **kwargs):
+        """
+        Index signé des lots : complet, ou delta depuis la version `since`
+
+        Réponse : {payload, signature, public_key, key_id} ; `payload` est la
+        chaîne JSON signée (version, full, lots, removed).
+        """
+        try:
+            since = max(int(since), 0)
+        except (TypeError, ValueError):
+            since = 0
+
+        bundle = request.env['isra.qr.offline.bundle'].sudo()._get_signed_bundle(since)
+        return request.make_response(json.dumps(bundle), headers=[
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Cache-Control', 'private, no-cache'),
+        ])
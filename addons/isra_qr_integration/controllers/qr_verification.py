@@ -1,100 +1,372 @@
 # controllers/qr_verification.py
-from odoo import http
+from odoo import http, fields
 from odoo.http import request
+from odoo.addons.isra_seeds_traceability.tools import qr_payload
+from odoo.addons.isra_qr_integration.tools.log_buffer import verification_log_buffer
+from odoo.addons.isra_qr_integration.tools.rate_limit import (
+    verify_rate_limiter, RATE_LIMIT_PARAMS, SCOPE_IP, SCOPE_PREFIX, lot_prefix, parse_limit,
+)
+from odoo.addons.isra_qr_integration.tools.result_cache import verify_page_cache
 import json
+import time
+
+# Nombre maximum de QR codes par appel à /isra/api/verify_batch
+MAX_BATCH_SIZE = 500
 
 class QRVerificationController(http.Controller):
     
     @http.route('/isra/verify/<string:lot_id>', type='http', auth='public', website=True)
     def verify_lot_public(self, lot_id, **kwargs):
         """Page publique de vérification d'un lot via QR code"""
+        start = time.perf_counter()
+        
+        # Limitation de débit avant toute recherche ou tout rendu ; curseur dédié :
+        # le seau du préfixe, commun aux visiteurs, n'est pas verrouillé pendant le rendu
+        limited = self._check_rate_limit(lot_id, dedicated_cursor=True)
+        if limited:
+            return self._too_many_requests(limited)
         
-        lot = request.env['isra.seed.lot'].sudo().search([
-            ('name', '=', lot_id),
-            ('is_active', '=', True)
-        ], limit=1)
+        # Une seule requête indexée sur le nom : données publiques précalculées
+        snapshot = self._get_lot_snapshots([lot_id]).get(lot_id)
         
-        if not lot:
+        if not snapshot:
+            self._log_verification(start, 'not_found', lot_id, error='Lot non trouvé')
             return request.render('isra_qr_integration.lot_not_found', {
                 'lot_id': lot_id
             })
         
-        # Données à afficher publiquement (sans infos sensibles)
-        lot_data = {
-            'name': lot.name,
-            'variety_name': lot.variety_id.name,
-            'variety_code': lot.variety_id.code,
-            'level': lot.level,
-            'production_date': lot.production_date,
-            'status': lot.status,
-            'multiplier_name': lot.multiplier_id.name if lot.multiplier_id else '',
-            'latest_quality_result': lot.latest_quality_control_id.result if lot.latest_quality_control_id else None,
-            'qr_code_image': lot.qr_code_image
-        }
+        record_id, write_date, lot_data = snapshot
+        self._log_verification(start, 'success', lot_id, record_id=record_id)
+        
+        # Seule la fiche du lot est en cache (rendu QWeb et URL signée du QR code) ;
+        # la mise en page du site, avec jeton CSRF et session, est rendue à chaque fois
+        cache_key = (lot_id, request.env.lang)
+        lot_card = verify_page_cache.get(cache_key, version=write_date)
+        if lot_card is None:
+            lot_card = self._render_lot_card(record_id, lot_data)
+            verify_page_cache.set(cache_key, lot_card, version=write_date)
         
         return request.render('isra_qr_integration.lot_verification', {
-            'lot': lot_data
+            'lot_card': lot_card,
         })
     
+    def _render_lot_card(self, record_id, lot_data):
+        """Fiche publique du lot, sans donnée de session : partageable entre visiteurs"""
+        # Données à afficher publiquement (sans infos sensibles) ; l'URL du QR code
+        # dépend de sa signature et n'est calculée qu'au rendu
+        lot_data = dict(
+            lot_data,
+            production_date=fields.Date.to_date(lot_data['production_date']),
+            qr_code_url=request.env['isra.seed.lot'].sudo().browse(record_id)._get_qr_image_url(),
+        )
+        return request.env['ir.qweb']._render('isra_qr_integration.lot_verification_card', {
+            'lot': lot_data,
+        })
+    
+    def _get_lot_snapshots(self, names):
+        """
+        Données publiques des lots actifs, en une requête indexée sur le nom
+        
+        Retourne {nom: (id, date de modification, données publiques)}.
+        """
+        if not names:
+            return {}
+        request.env.cr.execute("""
+            SELECT name, id, write_date, public_snapshot
+              FROM isra_seed_lot
+             WHERE name IN %s AND is_active
+        """, [tuple(names)])
+        snapshots = {}
+        for name, record_id, write_date, snapshot in request.env.cr.fetchall():
+            if not snapshot:
+                # Lot créé avant l'installation du champ et pas encore recalculé
+                snapshot = request.env['isra.seed.lot'].sudo().browse(record_id)._get_public_snapshot()
+            snapshots[name] = (record_id, write_date, snapshot)
+        return snapshots
+    
+    @http.route('/isra/api/verify/cache_stats', type='json', auth='user', methods=['POST'])
+    def verify_cache_stats(self):
+        """Statistiques du cache des pages de vérification (worker courant)"""
+        if not request.env.user.has_group('isra_seeds_traceability.group_isra_manager'):
+            return {'error': 'Accès réservé aux managers'}
+        return verify_page_cache.stats()
+    
     @http.route('/isra/api/verify', type='json', auth='user', methods=['POST'])
     def verify_lot_api(self, qr_data):
         """API pour vérification depuis l'app mobile"""
+        start = time.perf_counter()
+        result, record_id = 'error', None
         
         try:
-            # Décoder les données QR
-            if isinstance(qr_data, str):
-                qr_info = json.loads(qr_data)
+            # Décoder les données QR et vérifier la signature (sans requête)
+            qr_info, signed, response = self._check_qr_data(qr_data)
+            limited = self._check_rate_limit(qr_info.get('lot_id') if qr_info else None)
+            if limited:
+                return self._too_many_requests_json(limited)
+            if response:
+                result = 'invalid'
             else:
-                qr_info = qr_data
-            
-            lot_id = qr_info.get('lot_id')
-            if not lot_id:
-                return {'error': 'ID de lot manquant dans le QR code'}
-            
-            # Rechercher le lot
-            lot = request.env['isra.seed.lot'].search([
-                ('name', '=', lot_id),
-                ('is_active', '=', True)
-            ], limit=1)
-            
-            if not lot:
-                return {'error': f'Lot {lot_id} non trouvé'}
-            
-            # Vérifier l'authenticité
-            authentic = self._verify_qr_authenticity(lot, qr_info)
-            
-            return {
-                'success': True,
-                'authentic': authentic,
-                'lot': {
-                    'name': lot.name,
-                    'variety': lot.variety_id.name,
-                    'level': lot.level,
-                    'status': lot.status,
-                    'production_date': lot.production_date.strftime('%d/%m/%Y'),
-                    'multiplier': lot.multiplier_id.name if lot.multiplier_id else None,
-                    'quality_status': lot.latest_quality_control_id.result if lot.latest_quality_control_id else None,
-                    'days_to_expiry': lot.days_to_expiry,
-                    'is_expired': lot.is_expired
-                }
-            }
+                lot_id = qr_info['lot_id']
+                
+                # Statut actuel du lot, depuis ses données publiques précalculées
+                snapshot = self._get_lot_snapshots([lot_id]).get(lot_id)
+                
+                if not snapshot:
+                    result = 'not_found'
+                    response = {'error': f'Lot {lot_id} non trouvé'}
+                else:
+                    record_id, _write_date, lot_data = snapshot
+                    response = self._lot_api_result(lot_data, qr_info, signed)
+                    result = self._api_outcome(response)
             
         except Exception as e:
-            return {'error': f'Erreur de vérification: {str(e)}'}
+            response = {'error': f'Erreur de vérification: {str(e)}'}
+        
+        self._log_verification(start, result, qr_data, record_id=record_id, error=response.get('error'))
+        return response
+    
+    @http.route('/isra/api/verify_batch', type='json', auth='user', methods=['POST'])
+    def verify_lot_batch_api(self, qr_data_list):
+        """
+        Vérification groupée (ex: palette de sacs scannée en une fois)
+        
+        Tous les lots sont chargés en une requête ; chaque élément a son propre
+        résultat et une erreur sur un élément n'interrompt pas le lot.
+        """
+        if not isinstance(qr_data_list, list):
+            return {'error': 'Une liste de QR codes est attendue'}
+        if len(qr_data_list) > MAX_BATCH_SIZE:
+            return {'error': f'Maximum {MAX_BATCH_SIZE} QR codes par requête'}
+        
+        limited = self._check_rate_limit()
+        if limited:
+            return self._too_many_requests_json(limited)
+        
+        start = time.perf_counter()
+        
+        # 1. Décodage et signatures, en mémoire
+        checked = []
+        for qr_data in qr_data_list:
+            try:
+                checked.append(self._check_qr_data(qr_data))
+            except Exception as e:
+                checked.append((None, None, {'error': f'Erreur de vérification: {str(e)}'}))
+        
+        # 2. Un seul "name IN (...)" sur les données publiques précalculées
+        names = {qr_info['lot_id'] for qr_info, _signed, error in checked if not error}
+        snapshots = self._get_lot_snapshots(names)
+        
+        # 3. Un résultat par élément
+        results = []
+        outcomes = []
+        for index, (qr_info, signed, error) in enumerate(checked):
+            outcome, record_id = 'invalid', None
+            if not error:
+                snapshot = snapshots.get(qr_info['lot_id'])
+                if not snapshot:
+                    outcome = 'not_found'
+                    error = {'error': f"Lot {qr_info['lot_id']} non trouvé"}
+                else:
+                    try:
+                        record_id, _write_date, lot_data = snapshot
+                        result = self._lot_api_result(lot_data, qr_info, signed)
+                        outcome = self._api_outcome(result)
+                    except Exception as e:
+                        outcome = 'error'
+                        error = {'error': f'Erreur de vérification: {str(e)}'}
+            results.append(dict(error or result, index=index))
+            outcomes.append((outcome, record_id, (error or {}).get('error')))
+        
+        # Journal : la latence du lot est répartie entre ses éléments
+        elapsed = time.perf_counter() - start
+        item_start = time.perf_counter() - elapsed / max(len(results), 1)
+        for qr_data, (outcome, record_id, error) in zip(qr_data_list, outcomes):
+            self._log_verification(item_start, outcome, qr_data, record_id=record_id, error=error)
+        
+        return {
+            'success': True,
+            'count': len(results),
+            'verified': sum(1 for result in results if result.get('authentic')),
+            'results': results,
+        }
     
-    def _verify_qr_authenticity(self, lot, qr_info):
+    def _check_rate_limit(self, lot_name=None, dedicated_cursor=False):
+        """
+        Seaux à jetons par IP et, si un lot est visé, par préfixe de lot
+        
+        L'IP est celle du client derrière nginx grâce à proxy_mode (voir
+        config/odoo.conf) ; sans lui, tous les clients partageraient le seau
+        de l'IP du proxy. Les seaux sont mis à jour sur le curseur de la
+        requête, ou sur un curseur dédié (voir tools/rate_limit.py).
+        Retourne None si la requête passe, sinon (portée, Retry-After).
+        """
+        params = request.env['ir.config_parameter'].sudo()
+        keys = [(SCOPE_IP, request.httprequest.remote_addr)]
+        if lot_name:
+            keys.append((SCOPE_PREFIX, lot_prefix(lot_name)))
+        
+        limits = []
+        for scope, key in keys:
+            param, default = RATE_LIMIT_PARAMS[scope]
+            capacity, rate = parse_limit(params.get_param(param, default), default)
+            limits.append((scope, key, capacity, rate))
+        return verify_rate_limiter.check(request.env.cr, limits, dedicated_cursor=dedicated_cursor)
+    
+    def _too_many_requests(self, limited):
+        """Réponse 429 minimale (ni template ni requête)"""
+        _scope, retry_after = limited
+        return request.make_response('Trop de requêtes, réessayez plus tard.', status=429, headers=[
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Retry-After', str(retry_after)),
+        ])
+    
+    def _too_many_requests_json(self, limited):
+        """Équivalent JSON-RPC de la réponse 429 (le statut HTTP reste 200)"""
+        _scope, retry_after = limited
+        request.future_response.headers['Retry-After'] = str(retry_after)
+        return {
+            'error': 'Trop de requêtes, réessayez plus tard.',
+            'rate_limited': True,
+            'retry_after': retry_after,
+        }
+    
+    @http.route('/isra/api/verify/rate_limit_stats', type='json', auth='user', methods=['POST'])
+    def verify_rate_limit_stats(self):
+        """Statistiques de la limitation de débit (compteurs du worker et seaux partagés)"""
+        if not request.env.user.has_group('isra_seeds_traceability.group_isra_manager'):
+            return {'error': 'Accès réservé aux managers'}
+        return dict(
+            verify_rate_limiter.stats(),
+            buckets=request.env['isra.qr.rate.bucket'].sudo()._get_limiter_stats(),
+        )
+    
+    def _log_verification(self, start, result, qr_data, record_id=None, error=None):
+        """Ajoute une entrée au journal des vérifications (écriture différée et groupée)"""
+        httprequest = request.httprequest
+        if not isinstance(qr_data, str):
+            qr_data = json.dumps(qr_data, ensure_ascii=False, default=str)
+        verification_log_buffer.append(request.env.cr.dbname, {
+            'verification_date': fields.Datetime.now(),
+            'qr_data': qr_data,
+            'result': result,
+            'model_name': 'isra.seed.lot' if record_id else None,
+            'record_id': record_id,
+            'user_id': None if request.env.user._is_public() else request.env.uid,
+            'ip_address': httprequest.remote_addr,
+            'region': self._get_request_region(),
+            'user_agent': httprequest.headers.get('User-Agent'),
+            'error_message': error,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+        })
+    
+    def _get_request_region(self):
+        """Région du client selon GeoIP (si la base GeoIP est installée), sinon code pays"""
+        geoip = getattr(request, 'geoip', None)
+        if not geoip:
+            return None
+        try:
+            return geoip.get('region') or geoip.get('country_code') or None
+        except Exception:
+            return None
+    
+    @http.route('/isra/api/verify/log_stats', type='json', auth='user', methods=['POST'])
+    def verify_log_stats(self):
+        """État du tampon du journal des vérifications (worker courant)"""
+        if not request.env.user.has_group('isra_seeds_traceability.group_isra_manager'):
+            return {'error': 'Accès réservé aux managers'}
+        return verification_log_buffer.stats()
+    
+    def _check_qr_data(self, qr_data):
+        """
+        Décode les données QR et vérifie leur signature, sans accès aux lots
+        
+        Retourne (qr_info, signed, error) ; error est la réponse à renvoyer ou None.
+        """
+        # Décoder les données QR (format compact ou JSON historique)
+        try:
+            qr_info = qr_payload.decode(qr_data)
+        except ValueError as e:
+            return None, None, {'error': str(e)}
+        
+        if not qr_info.get('lot_id'):
+            return qr_info, None, {'error': 'ID de lot manquant dans le QR code'}
+        # JSON historique : lot_id peut être une liste ou un objet, non hachable
+        if not isinstance(qr_info['lot_id'], str):
+            return qr_info, None, {'error': 'ID de lot invalide dans le QR code'}
+        
+        # Signature vérifiée en mémoire : un code falsifié est rejeté sans requête
+        signed = self._verify_qr_signature(qr_info)
+        if signed is False:
+            return qr_info, False, {
+                'success': False,
+                'authentic': False,
+                'error': 'QR code falsifié ou altéré (signature invalide)',
+            }
+        return qr_info, signed, None
+    
+    def _lot_api_result(self, lot_data, qr_info, signed):
+        """Réponse API pour un lot trouvé (à partir de ses données publiques)"""
+        # Seule une signature valide prouve l'authenticité. Un code non signé (ISRA1,
+        # JSON historique) se recopie à l'identique : il reste "non vérifié" (None),
+        # ou "non authentique" si ses champs publics ne correspondent même pas au lot
+        if signed:
+            authentic = True
+        else:
+            authentic = None if self._verify_qr_authenticity(lot_data, qr_info) else False
+        
+        # Seules valeurs dépendant du jour : calculées ici, pas stockées
+        expiry_date = fields.Date.to_date(lot_data.get('expiry_date'))
+        days_to_expiry = (expiry_date - fields.Date.today()).days if expiry_date else 0
+        
+        return {
+            'success': True,
+            'authentic': authentic,
+            'signed': bool(signed),
+            'lot': {
+                'name': lot_data['name'],
+                'variety': lot_data['variety_name'],
+                'level': lot_data['level'],
+                'status': lot_data['status'],
+                'production_date': fields.Date.to_date(lot_data['production_date']).strftime('%d/%m/%Y'),
+                'multiplier': lot_data['multiplier_name'] or None,
+                'quality_status': lot_data['latest_quality_result'],
+                'days_to_expiry': days_to_expiry,
+                'is_expired': days_to_expiry < 0
+            }
+        }
+    
+    def _api_outcome(self, response):
+        """Résultat journalisé d'une réponse API : seul un code signé compte comme succès"""
+        if response['authentic'] is None:
+            return 'unsigned'
+        return 'success' if response['authentic'] else 'invalid'
+    
+    def _verify_qr_signature(self, qr_info):
+        """Signature HMAC du QR code : None si non signé, sinon True/False"""
+        keys = request.env['isra.seed.lot']._get_qr_hmac_keys()
+        return qr_payload.verify_signature(qr_info, keys)
+    
+    def _verify_qr_authenticity(self, lot_data, qr_info):
         """Vérifier l'authenticité du QR code"""
         
         # Vérifications de base
         checks = [
-            qr_info.get('variety_name') == lot.variety_id.name,
-            qr_info.get('level') == lot.level,
-            qr_info.get('production_date') == str(lot.production_date),
+            qr_info.get('level') == lot_data['level'],
+            qr_info.get('production_date') == lot_data['production_date'],
         ]
         
+        # Le format compact porte le code variété, le JSON historique le nom
+        if qr_info.get('format') == qr_payload.FORMAT_COMPACT:
+            checks.append(qr_info.get('variety_code') == (lot_data['variety_code'] or '').upper())
+        else:
+            checks.append(qr_info.get('variety_name') == lot_data['variety_name'])
+        
         return all(checks)
     
     @http.route('/isra/scanner', type='http', auth='user', website=True)
     def qr_scanner_page(self):
         """Page du scanner QR pour les utilisateurs connectés"""
-        return request.render('isra_qr_integration.qr_scanner_page')
\ No newline at end of file
+        keys = request.env['isra.qr.offline.bundle'].sudo()._get_trusted_public_keys()
+        return request.render('isra_qr_integration.qr_scanner_page', {
+            'offline_public_keys': ','.join(keys),
+        })
\ No newline at end of file
@@ -1 +1,5 @@
 from . import qr_code_mixin
+from . import qr_offline
+from . import qr_rate_limit
+from . import qr_verification_stats
+from . import seed_lot
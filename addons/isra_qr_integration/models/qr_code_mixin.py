@@ -3,11 +3,27 @@ from odoo import models, fields, api
 import qrcode
 import base64
 import json
-from io import BytesIO
 import logging
+from collections import defaultdict
+
+from odoo.tools import split_every
+from odoo.addons.isra_seeds_traceability.tools import qr_render
 
 _logger = logging.getLogger(__name__)
 
+# Génération par lots
+QR_WRITE_CHUNK_SIZE = 500
+
+
+def _render_qr_job(job):
+    """Rendu d'un QR code : retourne (image base64 ou False, erreur)"""
+    payload, config = job
+    try:
+        return base64.b64encode(qr_render.render(payload, config)), None
+    except Exception as e:
+        return False, str(e)
+
+
 class QRCodeMixin(models.AbstractModel):
     """
     Mixin pour ajouter facilement des fonctionnalités QR Code à n'importe quel modèle
@@ -65,6 +81,8 @@ class QRCodeMixin(models.AbstractModel):
         """
         Configuration du QR code
         Peut être surchargée pour personnaliser l'apparence
+
+        renderer : 'matrix' (PNG 1 bit écrit directement, rapide) ou 'pil'
         """
         return {
             'version': 1,
@@ -72,7 +90,8 @@ class QRCodeMixin(models.AbstractModel):
             'box_size': 10,
             'border': 4,
             'fill_color': "black",
-            'back_color': "white"
+            'back_color': "white",
+            'renderer': qr_render.RENDERER_MATRIX,
         }
     
     def generate_qr_code(self):
@@ -90,38 +109,80 @@ class QRCodeMixin(models.AbstractModel):
                 json_data = json.dumps(qr_data, ensure_ascii=False, separators=(',', ':'))
                 record.qr_code_data = json_data
                 
-                # Générer l'image QR
+                # Générer l'image QR et la convertir en base64
                 config = record._get_qr_config()
-                qr = qrcode.QRCode(
-                    version=config['version'],
-                    error_correction=config['error_correction'],
-                    box_size=config['box_size'],
-                    border=config['border'],
-                )
-                qr.add_data(json_data)
-                qr.make(fit=True)
-                
-                # Créer l'image
-                img = qr.make_image(
-                    fill_color=config['fill_color'],
-                    back_color=config['back_color']
-                )
+                record.qr_code_image = base64.b64encode(qr_render.render(json_data, config))
                 
-                # Convertir en base64
-                buffer = BytesIO()
-                img.save(buffer, format='PNG')
-                record.qr_code_image = base64.b64encode(buffer.getvalue())
-                
-                _logger.info(f"QR code généré pour {record._name} ID {record.id}")
+                _logger.debug(f"QR code généré pour {record._name} ID {record.id}")
                 
             except Exception as e:
                 _logger.error(f"Erreur génération QR pour {record._name} ID {record.id}: {e}")
                 record.qr_code_data = False
                 record.qr_code_image = False
     
+    def generate_qr_code_batch(self, chunk_size=QR_WRITE_CHUNK_SIZE):
+        """
+        Génère les QR codes de tout l'ensemble d'enregistrements
+
+        1. collecte des données de tous les enregistrements en une passe
+        2. rendu des images dans le processus courant (moteur matrix, sans PIL)
+        3. écriture des résultats par paquets, une écriture ORM par contenu distinct
+        """
+        jobs = []
+        for record in self:
+            try:
+                qr_data = record._get_qr_data()
+            except Exception as e:
+                _logger.error(f"Erreur données QR pour {record._name} ID {record.id}: {e}")
+                continue
+            if not qr_data:
+                _logger.warning(f"Aucune donnée QR pour {record._name} ID {record.id}")
+                continue
+            json_data = json.dumps(qr_data, ensure_ascii=False, separators=(',', ':'))
+            jobs.append((record.id, json_data, record._get_qr_config()))
+        
+        images = self._render_qr_jobs([(payload, config) for _id, payload, config in jobs])
+        
+        failed = 0
+        results = []
+        for (record_id, payload, _config), (image, error) in zip(jobs, images):
+            if error:
+                failed += 1
+                _logger.error(f"Erreur génération QR pour {self._name} ID {record_id}: {error}")
+            results.append((record_id, payload if image else False, image))
+        
+        for chunk in split_every(chunk_size, results, list):
+            self._write_qr_results(chunk)
+        
+        _logger.info(f"{len(results) - failed} QR code(s) générés pour {self._name} ({failed} erreur(s))")
+        return True
+    
+    def _render_qr_jobs(self, jobs):
+        """
+        Rend une liste de (payload, config)
+
+        Dans le processus courant : un pool forké depuis un worker Odoo
+        hériterait de ses connexions et de ses verrous, et un pool « spawn »
+        ne peut pas réimporter odoo.addons sans la configuration du serveur.
+        """
+        return [_render_qr_job(job) for job in jobs]
+    
+    def _write_qr_results(self, results):
+        """Écrit un paquet de résultats [(id, données, image base64)]"""
+        # Une écriture ORM par contenu distinct (les échecs, à False, en une fois) :
+        # les attachements de qr_code_image passent par l'ORM (empreinte, filestore)
+        ids_by_content = defaultdict(list)
+        for record_id, payload, image in results:
+            ids_by_content[payload, image].append(record_id)
+        for (payload, image), ids in ids_by_content.items():
+            self.browse(ids).write({'qr_code_data': payload, 'qr_code_image': image})
+        
+        # Ne pas garder les images du paquet en mémoire
+        self.browse([record_id for record_id, _payload, _image in results]).invalidate_recordset(['qr_code_image'])
+    
     def action_generate_qr_code(self):
         """Action pour régénérer le QR code manuellement"""
-        self.generate_qr_code()
+        self.generate_qr_code_batch()
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
@@ -205,7 +266,8 @@ class QRVerificationLog(models.Model):
     verification_date = fields.Datetime(
         string='Date de Vérification',
         default=fields.Datetime.now,
-        required=True
+        required=True,
+        index=True
     )
     
     qr_data = fields.Text(
@@ -217,6 +279,7 @@ class QRVerificationLog(models.Model):
         ('success', 'Succès'),
         ('not_found', 'Non Trouvé'),
         ('invalid', 'Invalide'),
+        ('unsigned', 'Non Signé'),
         ('error', 'Erreur')
     ], string='Résultat', required=True)
     
@@ -230,10 +293,13 @@ class QRVerificationLog(models.Model):
     )
     
     ip_address = fields.Char(string='Adresse IP')
+    region = fields.Char(string='Région', help='Région du scan (GeoIP), sinon code pays')
     user_agent = fields.Text(string='User Agent')
     
     error_message = fields.Text(string='Message d\'Erreur')
     
+    latency_ms = fields.Float(string='Latence (ms)', digits=(10, 2))
+    
     def name_get(self):
         result = []
         for record in self:
@@ -0,0 +1,215 @@
+# models/qr_offline.py
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from datetime import timedelta
+import base64
+import hashlib
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Paramètres système
+OFFLINE_SIGNING_KEY_PARAM = 'isra_qr.offline_signing_key'  # clé privée ECDSA P-256 (PEM)
+OFFLINE_FLOOR_PARAM = 'isra_qr.offline_tombstone_floor'  # plus ancienne version encore synchronisable
+
+# Séquence des versions de l'index hors ligne (partagée entre lots et suppressions)
+OFFLINE_VERSION_SEQUENCE = 'isra_qr_offline_version_seq'
+# Verrou (pg_try_advisory_xact_lock) de l'attribution des versions, tenu jusqu'au commit
+OFFLINE_VERSION_LOCK = 0x15A0FF11
+
+# Durée de conservation des suppressions ; un client plus ancien refait un téléchargement complet
+TOMBSTONE_RETENTION_DAYS = 90
+
+
+class QROfflineTombstone(models.Model):
+    """Lots supprimés, à retirer des index hors ligne lors de la prochaine synchronisation"""
+    _name = 'isra.qr.offline.tombstone'
+    _description = 'Suppression de Lot (Index Hors Ligne)'
+    _order = 'version desc'
+
+    name = fields.Char(string='ID Lot', required=True, readonly=True)
+    version = fields.Integer(string='Version', required=True, index=True, readonly=True)
+
+    def init(self):
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {OFFLINE_VERSION_SEQUENCE}")
+
+    @api.autovacuum
+    def _gc_old_tombstones(self):
+        limit = fields.Datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        tombstones = self.search([('create_date', '<', limit)])
+        if not tombstones:
+            return
+        # Les clients antérieurs à cette version ne peuvent plus recevoir de delta fiable
+        floor = max(tombstones.mapped('version'))
+        params = self.env['ir.config_parameter'].sudo()
+        if floor > int(params.get_param(OFFLINE_FLOOR_PARAM, 0)):
+            params.set_param(OFFLINE_FLOOR_PARAM, floor)
+        tombstones.unlink()
+
+
+class QROfflineBundle(models.AbstractModel):
+    """
+    Index compact et signé des lots pour la vérification hors ligne
+
+    Chaque lot porte une version (séquence PostgreSQL) ; un client qui connaît
+    la version N ne télécharge que les lots modifiés ou supprimés depuis. Un
+    recalcul des données publiques remet la version à 0 (à attribuer), sans
+    verrou : les écritures sur les lots ne se sérialisent pas entre elles. Les
+    versions sont attribuées au téléchargement de l'index, sous un verrou tenu
+    jusqu'au commit : elles deviennent visibles dans l'ordre, une version
+    inférieure ne peut pas apparaître après coup.
+    Les données sont signées en ECDSA P-256 pour être vérifiées par le
+    navigateur (WebCrypto) ; la clé est créée à l'installation.
+    """
+    _name = 'isra.qr.offline.bundle'
+    _description = 'Index de Vérification Hors Ligne'
+
+    @api.model
+    def _assign_versions(self):
+        """
+        Attribue une version aux lots et suppressions modifiés depuis (version 0)
+
+        Sans verrou, une transaction validée tard avec une version plus basse
+        que celle déjà synchronisée par un client lui échapperait pour toujours.
+        Si un autre téléchargement tient le verrou, ou si une ligne est en cours
+        de modification, elle attend le téléchargement suivant : sa version sera
+        de toute façon supérieure à toutes celles déjà visibles.
+        """
+        cr = self.env.cr
+        cr.execute("SELECT pg_try_advisory_xact_lock(%s)", [OFFLINE_VERSION_LOCK])
+        if not cr.fetchone()[0]:
+            return
+        for table, column in (('isra_seed_lot', 'offline_version'), ('isra_qr_offline_tombstone', 'version')):
+            cr.execute(f"""
+                UPDATE {table} SET {column} = nextval('{OFFLINE_VERSION_SEQUENCE}')
+                 WHERE id IN (SELECT id FROM {table} WHERE {column} = 0 FOR UPDATE SKIP LOCKED)
+            """)
+        self.env['isra.seed.lot'].invalidate_model(['offline_version'])
+        self.env['isra.qr.offline.tombstone'].invalidate_model(['version'])
+
+    @api.model
+    def _record_deleted_lots(self, names):
+        """Enregistre la suppression de lots (appelé avant leur suppression), version attribuée plus tard"""
+        if names:
+            self.env['isra.qr.offline.tombstone'].sudo().create([
+                {'name': name, 'version': 0} for name in names
+            ])
+
+    @api.model
+    def _get_bundle(self, since=0):
+        """
+        Index complet (since=0) ou delta depuis la version `since`
+
+        Chaque lot : [nom, statut, niveau, expiration AAAAMMJJ, contrôle qualité
+        (1 conforme, 0 non conforme, null aucun), variété], trié par nom.
+        """
+        self.env['isra.seed.lot'].flush_model(['public_snapshot', 'offline_version', 'is_active'])
+        self.env['isra.qr.offline.tombstone'].flush_model()
+        self._assign_versions()
+        floor = int(self.env['ir.config_parameter'].sudo().get_param(OFFLINE_FLOOR_PARAM, 0))
+        full = not since or since < floor
+        if full:
+            since = 0
+
+        # Lots et suppressions lus dans une seule requête (un seul instantané) :
+        # une attribution validée entre deux lectures ferait sauter des versions
+        cr = self.env.cr
+        cr.execute("""
+            SELECT * FROM (
+                SELECT name, is_active, public_snapshot->>'status', level,
+                       to_char(expiry_date, 'YYYYMMDD'), public_snapshot->>'latest_quality_result',
+                       public_snapshot->>'variety_name', offline_version, false AS deleted
+                  FROM isra_seed_lot
+                 WHERE %(full)s OR offline_version > %(since)s
+                 UNION ALL
+                SELECT name, false, NULL, NULL, NULL, NULL, NULL, version, true
+                  FROM isra_qr_offline_tombstone
+                 WHERE NOT %(full)s AND version > %(since)s
+            ) AS changes
+             ORDER BY name COLLATE "C"
+        """, {'full': full, 'since': since})
+        lots, removed, version = [], [], since
+        for name, active, status, level, expiry, quality, variety, row_version, deleted in cr.fetchall():
+            version = max(version, row_version)
+            if deleted or not active:
+                # Un index complet ne contient que les lots actifs
+                if not full:
+                    removed.append(name)
+                continue
+            qc_flag = None if not quality else int(quality == 'pass')
+            lots.append([name, status, level, expiry or '', qc_flag, variety or ''])
+
+        return {
+            'version': version,
+            'since': since,
+            'full': full,
+            'lots': lots,
+            'removed': sorted(set(removed)),
+        }
+
+    @api.model
+    def _get_signed_bundle(self, since=0):
+        """Index sérialisé et sa signature : le client vérifie la chaîne exacte reçue"""
+        private_key = self._get_signing_key()
+        if not private_key:
+            raise UserError("Clé de signature de l'index hors ligne absente (mettre à jour le module)")
+        payload = json.dumps(self._get_bundle(since), separators=(',', ':'), ensure_ascii=False)
+        public_key = self._public_key_der(private_key)
+        return {
+            'payload': payload,
+            'signature': base64.b64encode(self._sign(private_key, payload.encode('utf-8'))).decode(),
+            'public_key': base64.b64encode(public_key).decode(),
+            'key_id': hashlib.sha256(public_key).hexdigest()[:16],
+        }
+
+    @api.model
+    def _get_trusted_public_keys(self):
+        """Clés publiques (SPKI, base64) servies avec la page du scanner ; le client n'en accepte pas d'autre"""
+        private_key = self._get_signing_key()
+        return [base64.b64encode(self._public_key_der(private_key)).decode()] if private_key else []
+
+    @api.model
+    def _get_signing_key(self):
+        """Clé privée de signature de l'index, None si elle n'a pas encore été créée"""
+        from cryptography.hazmat.primitives import serialization
+
+        pem = self.env['ir.config_parameter'].sudo().get_param(OFFLINE_SIGNING_KEY_PARAM)
+        if not pem:
+            return None
+        return serialization.load_pem_private_key(pem.encode(), password=None)
+
+    @api.model
+    def _ensure_signing_key(self):
+        """Crée la clé de signature si besoin (données du module, à l'installation et à la mise à jour)"""
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+
+        params = self.env['ir.config_parameter'].sudo()
+        if params.get_param(OFFLINE_SIGNING_KEY_PARAM):
+            return
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        params.set_param(OFFLINE_SIGNING_KEY_PARAM, private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode())
+        _logger.info("Nouvelle clé de signature de l'index hors ligne créée")
+
+    @api.model
+    def _public_key_der(self, private_key):
+        from cryptography.hazmat.primitives import serialization
+        return private_key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+
+    @api.model
+    def _sign(self, private_key, data):
+        """Signature ECDSA SHA-256 au format brut r||s attendu par WebCrypto"""
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+        r, s = decode_dss_signature(private_key.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
@@ -0,0 +1,62 @@
+# models/qr_rate_limit.py
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Seaux sans activité depuis ce délai : pleins de nouveau, inutile de les garder
+BUCKET_IDLE_HOURS = 24
+
+
+class QRRateBucket(models.Model):
+    """
+    Seaux à jetons de la limitation de débit des vérifications QR
+
+    Table UNLOGGED créée à l'installation et mise à jour uniquement par
+    tools/rate_limit.py (UPSERT atomique partagé entre les workers) ; le
+    modèle sert à la consulter et à purger les seaux inactifs.
+    """
+    _name = 'isra.qr.rate.bucket'
+    _description = 'Seau de Limitation de Débit QR'
+    _auto = False
+    _log_access = False
+    _order = 'updated_at desc'
+    _rec_name = 'key'
+
+    key = fields.Char(string='Clé', readonly=True)
+    tokens = fields.Float(string='Jetons', readonly=True)
+    updated_at = fields.Datetime(string='Dernière Requête', readonly=True)
+    limited = fields.Boolean(string='Limité', readonly=True)
+
+    def init(self):
+        # UNLOGGED : pas de WAL, l'état est volatil et se reconstitue seul
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS isra_qr_rate_bucket (
+                id SERIAL PRIMARY KEY,
+                key VARCHAR NOT NULL UNIQUE,
+                tokens DOUBLE PRECISION NOT NULL,
+                updated_at TIMESTAMP NOT NULL,
+                limited BOOLEAN NOT NULL DEFAULT FALSE
+            )
+        """)
+
+    @api.model
+    def _get_limiter_stats(self):
+        """Résumé de l'état partagé des seaux"""
+        self.env.cr.execute("""
+            SELECT split_part(key, ':', 1), count(*), count(*) FILTER (WHERE limited)
+              FROM isra_qr_rate_bucket
+             GROUP BY 1
+        """)
+        return {
+            scope: {'buckets': buckets, 'limited': limited}
+            for scope, buckets, limited in self.env.cr.fetchall()
+        }
+
+    @api.autovacuum
+    def _gc_idle_buckets(self):
+        self.env.cr.execute(
+            "DELETE FROM isra_qr_rate_bucket WHERE updated_at < (now() at time zone 'UTC') - make_interval(hours => %s)",
+            [BUCKET_IDLE_HOURS]
+        )
+        _logger.info("Limitation de débit QR : %s seau(x) inactif(s) supprimé(s)", self.env.cr.rowcount)
@@ -0,0 +1,150 @@
+# models/qr_verification_stats.py
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Paramètres système
+LOG_RETENTION_DAYS_PARAM = 'isra_qr.log_retention_days'
+ROLLUP_LAST_DATE_PARAM = 'isra_qr.rollup_last_date'
+DEFAULT_LOG_RETENTION_DAYS = 90
+PRUNE_CHUNK_SIZE = 10000
+
+
+class QRVerificationDaily(models.Model):
+    """
+    Agrégats quotidiens du journal des vérifications QR
+
+    Une ligne par jour, lot, résultat et région ; alimentée chaque nuit à
+    partir de isra.qr.verification.log, dont les lignes brutes sont ensuite
+    purgées au-delà de la durée de rétention. Les rapports lisent cette table.
+    """
+    _name = 'isra.qr.verification.daily'
+    _description = 'Vérifications QR par Jour'
+    _order = 'date desc, count desc'
+    _rec_name = 'date'
+
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+
+    lot_id = fields.Many2one(
+        'isra.seed.lot',
+        string='Lot',
+        index=True,
+        ondelete='set null',
+        readonly=True
+    )
+
+    variety_id = fields.Many2one(
+        related='lot_id.variety_id',
+        string='Variété',
+        store=True
+    )
+
+    result = fields.Selection([
+        ('success', 'Succès'),
+        ('not_found', 'Non Trouvé'),
+        ('invalid', 'Invalide'),
+        ('unsigned', 'Non Signé'),
+        ('error', 'Erreur')
+    ], string='Résultat', required=True, readonly=True)
+
+    region = fields.Char(string='Région', readonly=True)
+
+    count = fields.Integer(string='Vérifications', readonly=True)
+
+    avg_latency_ms = fields.Float(
+        string='Latence Moyenne (ms)',
+        digits=(10, 2),
+        group_operator='avg',
+        readonly=True
+    )
+
+    @api.model
+    def _cron_rollup_and_prune(self, auto_commit=True):
+        """Tâche planifiée : agrège les jours terminés puis purge les lignes brutes anciennes"""
+        self._rollup_pending_days(auto_commit=auto_commit)
+        self._prune_raw_logs(auto_commit=auto_commit)
+
+    @api.model
+    def _rollup_pending_days(self, auto_commit=True):
+        """Agrège chaque jour complet pas encore traité (un commit par jour)"""
+        params = self.env['ir.config_parameter'].sudo()
+        today = fields.Date.context_today(self)
+
+        last = params.get_param(ROLLUP_LAST_DATE_PARAM)
+        if last:
+            day = fields.Date.to_date(last) + timedelta(days=1)
+        else:
+            self.env.cr.execute("SELECT min(verification_date)::date FROM isra_qr_verification_log")
+            day = self.env.cr.fetchone()[0]
+            if not day:
+                return 0
+
+        processed = 0
+        while day < today:
+            self._rollup_day(day)
+            params.set_param(ROLLUP_LAST_DATE_PARAM, fields.Date.to_string(day))
+            if auto_commit:
+                self.env.cr.commit()
+            processed += 1
+            day += timedelta(days=1)
+
+        if processed:
+            _logger.info("Vérifications QR : %s jour(s) agrégé(s)", processed)
+        return processed
+
+    @api.model
+    def _rollup_day(self, day):
+        """(Re)calcule les agrégats d'une journée à partir du journal brut"""
+        self.flush_model()
+        self.env.cr.execute("DELETE FROM isra_qr_verification_daily WHERE date = %s", [day])
+        self.env.cr.execute("""
+            INSERT INTO isra_qr_verification_daily
+                (date, lot_id, variety_id, result, region, count, avg_latency_ms,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT %(day)s, lot.id, lot.variety_id, log.result, log.region,
+                   count(*), avg(log.latency_ms),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM isra_qr_verification_log log
+              LEFT JOIN isra_seed_lot lot
+                ON lot.id = log.record_id AND log.model_name = 'isra.seed.lot'
+             WHERE log.verification_date >= %(day)s
+               AND log.verification_date < %(next_day)s
+             GROUP BY lot.id, lot.variety_id, log.result, log.region
+        """, {'day': day, 'next_day': day + timedelta(days=1), 'uid': self.env.uid})
+        self.invalidate_model()
+
+    @api.model
+    def _prune_raw_logs(self, auto_commit=True):
+        """Supprime par paquets les lignes brutes plus anciennes que la rétention et déjà agrégées"""
+        params = self.env['ir.config_parameter'].sudo()
+        retention = int(params.get_param(LOG_RETENTION_DAYS_PARAM, DEFAULT_LOG_RETENTION_DAYS))
+        last = params.get_param(ROLLUP_LAST_DATE_PARAM)
+        if not last or retention <= 0:
+            return 0
+
+        # Ne jamais supprimer un jour qui n'a pas encore été agrégé
+        cutoff = min(
+            fields.Date.context_today(self) - timedelta(days=retention),
+            fields.Date.to_date(last) + timedelta(days=1),
+        )
+
+        deleted = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM isra_qr_verification_log
+                 WHERE id IN (SELECT id FROM isra_qr_verification_log
+                               WHERE verification_date < %s
+                               LIMIT %s)
+            """, [cutoff, PRUNE_CHUNK_SIZE])
+            if not self.env.cr.rowcount:
+                break
+            deleted += self.env.cr.rowcount
+            if auto_commit:
+                self.env.cr.commit()
+
+        if deleted:
+            self.env['isra.qr.verification.log'].invalidate_model()
+            _logger.info("Vérifications QR : %s ligne(s) brute(s) purgée(s) avant le %s", deleted, cutoff)
+        return deleted
@@ -0,0 +1,122 @@
+# models/seed_lot.py
+from odoo import models, fields, api
+from odoo.addons.isra_seeds_traceability.tools import qr_render
+from urllib.parse import quote
+
+from ..tools.result_cache import verify_page_cache
+
+
+class SeedLot(models.Model):
+    _inherit = 'isra.seed.lot'
+
+    # Données publiques de vérification, précalculées : les routes /isra/verify
+    # les lisent par un seul SELECT sur le nom, sans charger variété,
+    # multiplicateur ni contrôles qualité
+    public_snapshot = fields.Json(
+        string='Données Publiques de Vérification',
+        compute='_compute_public_snapshot',
+        store=True,
+        readonly=True,
+        copy=False
+    )
+
+    # Version de ces données dans l'index hors ligne du scanner (delta par version),
+    # 0 tant que la modification n'a pas été versionnée (voir isra.qr.offline.bundle)
+    offline_version = fields.Integer(
+        string='Version Index Hors Ligne',
+        compute='_compute_public_snapshot',
+        store=True,
+        readonly=True,
+        index=True,
+        copy=False
+    )
+
+    @api.depends('name', 'level', 'production_date', 'expiry_date', 'status', 'is_active',
+                 'variety_id.name', 'variety_id.code', 'multiplier_id.name',
+                 'quality_control_ids.result', 'quality_control_ids.control_date')
+    def _compute_public_snapshot(self):
+        # Aucune version attribuée ici : pas de verrou sur le chemin d'écriture des lots
+        for lot in self:
+            lot.public_snapshot = lot._get_public_snapshot()
+            lot.offline_version = 0
+
+    def _get_public_snapshot(self):
+        """Champs renvoyés par la page publique et l'API de vérification"""
+        self.ensure_one()
+        if not self.name or self.name == '/':
+            return False
+        return {
+            'name': self.name,
+            'variety_name': self.variety_id.name,
+            'variety_code': self.variety_id.code,
+            'level': self.level,
+            'production_date': fields.Date.to_string(self.production_date),
+            'expiry_date': fields.Date.to_string(self.expiry_date),
+            'status': self.status,
+            'multiplier_name': self.multiplier_id.name if self.multiplier_id else '',
+            'latest_quality_result': self.latest_quality_control_id.result if self.latest_quality_control_id else None,
+        }
+
+    def _get_qr_image_url(self, image_format=qr_render.FORMAT_PNG):
+        """
+        URL versionnée du QR code du lot (cacheable indéfiniment)
+
+        Dépend de la signature du QR code : calculée au rendu de la page, hors
+        des données publiques stockées, pour ne pas signer à chaque écriture.
+        """
+        self.ensure_one()
+        checksum = self.env['isra.qr.image']._compute_checksum(
+            self._get_qr_payload(), qr_render.render_key(self._get_qr_config(), image_format)
+        )
+        return f'/isra/qr/{quote(self.name, safe="")}.{image_format}?v={checksum}'
+
+    def write(self, vals):
+        result = super().write(vals)
+        self._invalidate_verification_cache()
+        return result
+
+    def unlink(self):
+        self._invalidate_verification_cache()
+        self.env['isra.qr.offline.bundle']._record_deleted_lots(self.mapped('name'))
+        return super().unlink()
+
+    def _invalidate_verification_cache(self, touch=False):
+        """
+        Retire les pages de vérification en cache de ces lots
+
+        Le cache est local au worker : les autres workers détectent le
+        changement par la date de modification du lot (voir le contrôleur).
+        Avec touch=True, cette date est mise à jour pour les changements qui
+        ne passent pas par le lot lui-même (contrôles qualité).
+        """
+        names = set(self.mapped('name'))
+        if names:
+            verify_page_cache.invalidate(lambda key: key[0] in names)
+        if touch and self.ids:
+            self.env.cr.execute(
+                "UPDATE isra_seed_lot SET write_date = (now() at time zone 'UTC') WHERE id IN %s",
+                [tuple(self.ids)]
+            )
+            self.invalidate_recordset(['write_date'])
+
+
+class QualityControl(models.Model):
+    _inherit = 'isra.quality.control'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.mapped('lot_id')._invalidate_verification_cache(touch=True)
+        return records
+
+    def write(self, vals):
+        lots = self.mapped('lot_id')
+        result = super().write(vals)
+        (lots | self.mapped('lot_id'))._invalidate_verification_cache(touch=True)
+        return result
+
+    def unlink(self):
+        lots = self.mapped('lot_id')
+        result = super().unlink()
+        lots._invalidate_verification_cache(touch=True)
+        return result
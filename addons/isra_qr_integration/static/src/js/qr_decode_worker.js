@@ -0,0 +1,20 @@
+// static/src/js/qr_decode_worker.js
+// Décodage hors du thread principal (voir startScanning dans qr_scanner.js)
+// Message reçu : {id, buffer, width, height} (buffer RGBA transféré, sans copie)
+// Réponse : {id, data} avec data = contenu du QR code ou null
+/* global israQRDecode */
+importScripts('qr_decoder.js');
+
+self.onmessage = function (event) {
+    var message = event.data;
+    var code = null;
+    try {
+        // Étiquettes ISRA : modules noirs sur fond blanc, inutile d'essayer l'inversion
+        code = israQRDecode(new Uint8ClampedArray(message.buffer), message.width, message.height, {
+            inversionAttempts: 'dontInvert'
+        });
+    } catch (e) {
+        code = null;
+    }
+    self.postMessage({ id: message.id, data: code ? code.data : null });
+};
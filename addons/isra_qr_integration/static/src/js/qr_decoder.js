@@ -0,0 +1,1457 @@
+// static/src/js/qr_decoder.js
+// Décodeur de QR codes autonome : aucune dépendance, aucun accès réseau
+// Chargé par le worker de décodage (qr_decode_worker.js) ou, sans Web Worker,
+// par le scanner sur le thread principal.
+//
+//     israQRDecode(rgba, width, height[, {inversionAttempts: 'dontInvert'}])
+//         -> {data, version, location} ou null
+//
+// Étapes : binarisation par seuils locaux (blocs 8x8), recherche des trois
+// motifs de position puis du motif d'alignement, redressement de la grille
+// (homographie), lecture du format et de la version, correction
+// Reed-Solomon, décodage des segments (numérique, alphanumérique, octets,
+// kanji, ECI). Les codes lus en miroir sont acceptés.
+(function (root) {
+    'use strict';
+
+    // === BINARISATION ===
+
+    var BLOCK_SIZE = 8;
+    var MIN_DYNAMIC_RANGE = 24;     // en dessous, un bloc est considéré uniforme
+
+    function BitMatrix(width, height) {
+        this.width = width;
+        this.height = height;
+        this.data = new Uint8Array(width * height);
+    }
+
+    BitMatrix.prototype.get = function (x, y) {
+        if (x < 0 || y < 0 || x >= this.width || y >= this.height) {
+            return false;
+        }
+        return this.data[y * this.width + x] === 1;
+    };
+
+    BitMatrix.prototype.set = function (x, y, value) {
+        this.data[y * this.width + x] = value ? 1 : 0;
+    };
+
+    BitMatrix.prototype.inverted = function () {
+        var matrix = new BitMatrix(this.width, this.height);
+        for (var i = 0; i < this.data.length; i++) {
+            matrix.data[i] = this.data[i] ^ 1;
+        }
+        return matrix;
+    };
+
+    BitMatrix.prototype.transposed = function () {
+        var matrix = new BitMatrix(this.height, this.width);
+        for (var y = 0; y < this.height; y++) {
+            for (var x = 0; x < this.width; x++) {
+                matrix.data[x * this.height + y] = this.data[y * this.width + x];
+            }
+        }
+        return matrix;
+    };
+
+    function luminance(rgba, width, height) {
+        var lum = new Uint8Array(width * height);
+        for (var i = 0, p = 0; i < lum.length; i++, p += 4) {
+            lum[i] = (rgba[p] * 77 + rgba[p + 1] * 150 + rgba[p + 2] * 29) >> 8;
+        }
+        return lum;
+    }
+
+    function clamp(value, min, max) {
+        return value < min ? min : (value > max ? max : value);
+    }
+
+    function binarize(lum, width, height) {
+        var matrix = new BitMatrix(width, height);
+        var i;
+        if (width < BLOCK_SIZE * 5 || height < BLOCK_SIZE * 5) {
+            // Trop petite pour des seuils locaux : seuil global
+            var total = 0;
+            for (i = 0; i < lum.length; i++) {
+                total += lum[i];
+            }
+            var mean = total / lum.length;
+            for (i = 0; i < lum.length; i++) {
+                matrix.data[i] = lum[i] < mean ? 1 : 0;
+            }
+            return matrix;
+        }
+
+        var subWidth = Math.ceil(width / BLOCK_SIZE);
+        var subHeight = Math.ceil(height / BLOCK_SIZE);
+        var blackPoints = new Uint8Array(subWidth * subHeight);
+        var bx, by, xx, yy, offset, xOffset, yOffset;
+
+        // Niveau de noir de chaque bloc
+        for (by = 0; by < subHeight; by++) {
+            yOffset = Math.min(by * BLOCK_SIZE, height - BLOCK_SIZE);
+            for (bx = 0; bx < subWidth; bx++) {
+                xOffset = Math.min(bx * BLOCK_SIZE, width - BLOCK_SIZE);
+                var sum = 0;
+                var min = 255;
+                var max = 0;
+                for (yy = 0; yy < BLOCK_SIZE; yy++) {
+                    offset = (yOffset + yy) * width + xOffset;
+                    for (xx = 0; xx < BLOCK_SIZE; xx++) {
+                        var pixel = lum[offset + xx];
+                        sum += pixel;
+                        if (pixel < min) {
+                            min = pixel;
+                        }
+                        if (pixel > max) {
+                            max = pixel;
+                        }
+                    }
+                }
+                var average = sum >> 6;
+                if (max - min <= MIN_DYNAMIC_RANGE) {
+                    // Bloc uniforme : clair, sauf si les blocs voisins déjà vus sont plus sombres
+                    average = min >> 1;
+                    if (by > 0 && bx > 0) {
+                        var neighbours = (
+                            blackPoints[(by - 1) * subWidth + bx] +
+                            2 * blackPoints[by * subWidth + bx - 1] +
+                            blackPoints[(by - 1) * subWidth + bx - 1]
+                        ) >> 2;
+                        if (min < neighbours) {
+                            average = neighbours;
+                        }
+                    }
+                }
+                blackPoints[by * subWidth + bx] = average;
+            }
+        }
+
+        // Seuil de chaque bloc : moyenne des 5x5 blocs qui l'entourent
+        for (by = 0; by < subHeight; by++) {
+            yOffset = Math.min(by * BLOCK_SIZE, height - BLOCK_SIZE);
+            var top = clamp(by, 2, subHeight - 3);
+            for (bx = 0; bx < subWidth; bx++) {
+                xOffset = Math.min(bx * BLOCK_SIZE, width - BLOCK_SIZE);
+                var left = clamp(bx, 2, subWidth - 3);
+                var total25 = 0;
+                for (var dy = -2; dy <= 2; dy++) {
+                    var row = (top + dy) * subWidth + left;
+                    total25 += blackPoints[row - 2] + blackPoints[row - 1] + blackPoints[row] +
+                        blackPoints[row + 1] + blackPoints[row + 2];
+                }
+                var threshold = Math.floor(total25 / 25);
+                for (yy = 0; yy < BLOCK_SIZE; yy++) {
+                    offset = (yOffset + yy) * width + xOffset;
+                    for (xx = 0; xx < BLOCK_SIZE; xx++) {
+                        matrix.data[offset + xx] = lum[offset + xx] <= threshold ? 1 : 0;
+                    }
+                }
+            }
+        }
+        return matrix;
+    }
+
+    // === MOTIFS DE POSITION (1:1:3:1:1) ===
+
+    var CENTER_QUORUM = 2;          // passages nécessaires pour retenir un motif
+    var MAX_CANDIDATES = 12;        // motifs comparés (combinaisons en n³)
+    var MAX_TRIPLES = 3;            // triplets essayés, du plus régulier au moins régulier
+    var ROW_SKIP = 2;
+    var MAX_ALIGNMENT_CANDIDATES = 4;
+
+    function sumCounts(counts) {
+        var total = 0;
+        for (var i = 0; i < counts.length; i++) {
+            total += counts[i];
+        }
+        return total;
+    }
+
+    function foundFinderCross(counts, varianceRatio) {
+        var total = sumCounts(counts);
+        if (total < 7) {
+            return false;
+        }
+        var moduleSize = total / 7;
+        var maxVariance = moduleSize / varianceRatio;
+        return Math.abs(moduleSize - counts[0]) < maxVariance &&
+            Math.abs(moduleSize - counts[1]) < maxVariance &&
+            Math.abs(3 * moduleSize - counts[2]) < 3 * maxVariance &&
+            Math.abs(moduleSize - counts[3]) < maxVariance &&
+            Math.abs(moduleSize - counts[4]) < maxVariance;
+    }
+
+    function finderCenterFromEnd(counts, end) {
+        return end - counts[4] - counts[3] - counts[2] / 2;
+    }
+
+    // Recoupe un motif le long d'une ligne (get(position) -> pixel noir) ; centre ou NaN
+    function crossCheckFinder(get, limit, start, maxCount, originalTotal, tolerance) {
+        var counts = [0, 0, 0, 0, 0];
+        var pos = start;
+        while (pos >= 0 && get(pos)) {
+            counts[2]++;
+            pos--;
+        }
+        if (pos < 0) {
+            return NaN;
+        }
+        while (pos >= 0 && !get(pos) && counts[1] <= maxCount) {
+            counts[1]++;
+            pos--;
+        }
+        if (pos < 0 || counts[1] > maxCount) {
+            return NaN;
+        }
+        while (pos >= 0 && get(pos) && counts[0] <= maxCount) {
+            counts[0]++;
+            pos--;
+        }
+        if (counts[0] > maxCount) {
+            return NaN;
+        }
+
+        pos = start + 1;
+        while (pos < limit && get(pos)) {
+            counts[2]++;
+            pos++;
+        }
+        if (pos === limit) {
+            return NaN;
+        }
+        while (pos < limit && !get(pos) && counts[3] < maxCount) {
+            counts[3]++;
+            pos++;
+        }
+        if (pos === limit || counts[3] >= maxCount) {
+            return NaN;
+        }
+        while (pos < limit && get(pos) && counts[4] < maxCount) {
+            counts[4]++;
+            pos++;
+        }
+        if (counts[4] >= maxCount) {
+            return NaN;
+        }
+
+        if (5 * Math.abs(sumCounts(counts) - originalTotal) >= tolerance * originalTotal) {
+            return NaN;
+        }
+        return foundFinderCross(counts, 2) ? finderCenterFromEnd(counts, pos) : NaN;
+    }
+
+    function crossCheckDiagonal(image, centerI, centerJ) {
+        var counts = [0, 0, 0, 0, 0];
+        var i = 0;
+        while (centerI >= i && centerJ >= i && image.get(centerJ - i, centerI - i)) {
+            counts[2]++;
+            i++;
+        }
+        if (counts[2] === 0) {
+            return false;
+        }
+        while (centerI >= i && centerJ >= i && !image.get(centerJ - i, centerI - i)) {
+            counts[1]++;
+            i++;
+        }
+        if (counts[1] === 0) {
+            return false;
+        }
+        while (centerI >= i && centerJ >= i && image.get(centerJ - i, centerI - i)) {
+            counts[0]++;
+            i++;
+        }
+        if (counts[0] === 0) {
+            return false;
+        }
+
+        var maxI = image.height;
+        var maxJ = image.width;
+        i = 1;
+        while (centerI + i < maxI && centerJ + i < maxJ && image.get(centerJ + i, centerI + i)) {
+            counts[2]++;
+            i++;
+        }
+        while (centerI + i < maxI && centerJ + i < maxJ && !image.get(centerJ + i, centerI + i)) {
+            counts[3]++;
+            i++;
+        }
+        if (counts[3] === 0) {
+            return false;
+        }
+        while (centerI + i < maxI && centerJ + i < maxJ && image.get(centerJ + i, centerI + i)) {
+            counts[4]++;
+            i++;
+        }
+        if (counts[4] === 0) {
+            return false;
+        }
+        return foundFinderCross(counts, 1.333);
+    }
+
+    function aboutEquals(pattern, moduleSize, i, j) {
+        if (Math.abs(i - pattern.y) <= moduleSize && Math.abs(j - pattern.x) <= moduleSize) {
+            var difference = Math.abs(moduleSize - pattern.moduleSize);
+            return difference <= 1 || difference <= pattern.moduleSize;
+        }
+        return false;
+    }
+
+    function combineEstimate(pattern, i, j, moduleSize) {
+        var count = pattern.count + 1;
+        return {
+            x: (pattern.count * pattern.x + j) / count,
+            y: (pattern.count * pattern.y + i) / count,
+            moduleSize: (pattern.count * pattern.moduleSize + moduleSize) / count,
+            count: count
+        };
+    }
+
+    function addCenter(centers, i, j, moduleSize) {
+        for (var k = 0; k < centers.length; k++) {
+            if (aboutEquals(centers[k], moduleSize, i, j)) {
+                centers[k] = combineEstimate(centers[k], i, j, moduleSize);
+                return centers[k];
+            }
+        }
+        var center = { x: j, y: i, moduleSize: moduleSize, count: 1 };
+        centers.push(center);
+        return center;
+    }
+
+    function handlePossibleFinder(image, centers, counts, i, j) {
+        var total = sumCounts(counts);
+        var centerJ = finderCenterFromEnd(counts, j);
+        var column = Math.floor(centerJ);
+        var centerI = crossCheckFinder(function (y) {
+            return image.get(column, y);
+        }, image.height, i, counts[2], total, 2);
+        if (isNaN(centerI)) {
+            return false;
+        }
+        var line = Math.floor(centerI);
+        centerJ = crossCheckFinder(function (x) {
+            return image.get(x, line);
+        }, image.width, column, counts[2], total, 1);
+        if (isNaN(centerJ) || !crossCheckDiagonal(image, line, Math.floor(centerJ))) {
+            return false;
+        }
+        addCenter(centers, centerI, centerJ, total / 7);
+        return true;
+    }
+
+    function findFinderPatterns(image) {
+        var centers = [];
+        var width = image.width;
+        for (var i = ROW_SKIP - 1; i < image.height; i += ROW_SKIP) {
+            var counts = [0, 0, 0, 0, 0];
+            var state = 0;
+            for (var j = 0; j < width; j++) {
+                if (image.get(j, i)) {
+                    if ((state & 1) === 1) {
+                        state++;
+                    }
+                    counts[state]++;
+                } else if ((state & 1) === 0) {
+                    if (state === 4) {
+                        if (foundFinderCross(counts, 2) && handlePossibleFinder(image, centers, counts, i, j)) {
+                            counts = [0, 0, 0, 0, 0];
+                            state = 0;
+                        } else {
+                            // Les trois derniers comptes peuvent commencer un motif
+                            counts = [counts[2], counts[3], counts[4], 1, 0];
+                            state = 3;
+                        }
+                    } else {
+                        counts[++state]++;
+                    }
+                } else {
+                    counts[state]++;
+                }
+            }
+            if (foundFinderCross(counts, 2)) {
+                handlePossibleFinder(image, centers, counts, i, width);
+            }
+        }
+        return centers;
+    }
+
+    function squaredDistance(a, b) {
+        var dx = a.x - b.x;
+        var dy = a.y - b.y;
+        return dx * dx + dy * dy;
+    }
+
+    function distance(a, b) {
+        return Math.sqrt(squaredDistance(a, b));
+    }
+
+    // Triplets de motifs les plus proches d'un triangle rectangle isocèle
+    function selectBestPatterns(centers) {
+        var candidates = centers.filter(function (center) {
+            return center.count >= CENTER_QUORUM;
+        });
+        if (candidates.length < 3) {
+            candidates = centers.slice();
+        }
+        if (candidates.length < 3) {
+            return [];
+        }
+        candidates.sort(function (a, b) { return b.count - a.count; });
+        candidates = candidates.slice(0, MAX_CANDIDATES);
+        candidates.sort(function (a, b) { return a.moduleSize - b.moduleSize; });
+
+        var triples = [];
+        for (var i = 0; i < candidates.length - 2; i++) {
+            for (var j = i + 1; j < candidates.length - 1; j++) {
+                for (var k = j + 1; k < candidates.length; k++) {
+                    if (candidates[k].moduleSize > candidates[i].moduleSize * 1.4) {
+                        continue;
+                    }
+                    var sides = [
+                        squaredDistance(candidates[i], candidates[j]),
+                        squaredDistance(candidates[j], candidates[k]),
+                        squaredDistance(candidates[i], candidates[k])
+                    ].sort(function (a, b) { return a - b; });
+                    triples.push({
+                        patterns: [candidates[i], candidates[j], candidates[k]],
+                        distortion: Math.abs(sides[2] - 2 * sides[1]) + Math.abs(sides[2] - 2 * sides[0])
+                    });
+                }
+            }
+        }
+        triples.sort(function (a, b) { return a.distortion - b.distortion; });
+        return triples.slice(0, MAX_TRIPLES).map(function (triple) {
+            return triple.patterns;
+        });
+    }
+
+    // Range les motifs : coin haut gauche, haut droit, bas gauche
+    function orderPatterns(patterns) {
+        var zeroOne = distance(patterns[0], patterns[1]);
+        var oneTwo = distance(patterns[1], patterns[2]);
+        var zeroTwo = distance(patterns[0], patterns[2]);
+        var a, b, c;
+        if (oneTwo >= zeroOne && oneTwo >= zeroTwo) {
+            b = patterns[0];
+            a = patterns[1];
+            c = patterns[2];
+        } else if (zeroTwo >= oneTwo && zeroTwo >= zeroOne) {
+            b = patterns[1];
+            a = patterns[0];
+            c = patterns[2];
+        } else {
+            b = patterns[2];
+            a = patterns[0];
+            c = patterns[1];
+        }
+        // Produit vectoriel : a et c sont-ils inversés ?
+        if ((c.x - b.x) * (a.y - b.y) - (c.y - b.y) * (a.x - b.x) < 0) {
+            var swap = a;
+            a = c;
+            c = swap;
+        }
+        return { topLeft: b, topRight: c, bottomLeft: a };
+    }
+
+    // === GRILLE ===
+
+    // Longueur noir-blanc-noir depuis (fromX, fromY) vers (toX, toY) (Bresenham)
+    function sizeOfBlackWhiteBlackRun(image, fromX, fromY, toX, toY) {
+        var steep = Math.abs(toY - fromY) > Math.abs(toX - fromX);
+        var swap;
+        if (steep) {
+            swap = fromX;
+            fromX = fromY;
+            fromY = swap;
+            swap = toX;
+            toX = toY;
+            toY = swap;
+        }
+        var dx = Math.abs(toX - fromX);
+        var dy = Math.abs(toY - fromY);
+        var error = -Math.floor(dx / 2);
+        var xStep = fromX < toX ? 1 : -1;
+        var yStep = fromY < toY ? 1 : -1;
+        var state = 0;
+        var xLimit = toX + xStep;
+        for (var x = fromX, y = fromY; x !== xLimit; x += xStep) {
+            var realX = steep ? y : x;
+            var realY = steep ? x : y;
+            if ((state === 1) === image.get(realX, realY)) {
+                if (state === 2) {
+                    return Math.sqrt((x - fromX) * (x - fromX) + (y - fromY) * (y - fromY));
+                }
+                state++;
+            }
+            error += dy;
+            if (error > 0) {
+                if (y === toY) {
+                    break;
+                }
+                y += yStep;
+                error -= dx;
+            }
+        }
+        if (state === 2) {
+            return Math.sqrt((toX + xStep - fromX) * (toX + xStep - fromX) + (toY - fromY) * (toY - fromY));
+        }
+        return NaN;
+    }
+
+    function sizeOfBlackWhiteBlackRunBothWays(image, fromX, fromY, toX, toY) {
+        var result = sizeOfBlackWhiteBlackRun(image, fromX, fromY, toX, toY);
+        // Puis dans l'autre sens, sans sortir de l'image
+        var scale = 1;
+        var otherToX = fromX - (toX - fromX);
+        if (otherToX < 0) {
+            scale = fromX / (fromX - otherToX);
+            otherToX = 0;
+        } else if (otherToX >= image.width) {
+            scale = (image.width - 1 - fromX) / (otherToX - fromX);
+            otherToX = image.width - 1;
+        }
+        var otherToY = Math.floor(fromY - (toY - fromY) * scale);
+        scale = 1;
+        if (otherToY < 0) {
+            scale = fromY / (fromY - otherToY);
+            otherToY = 0;
+        } else if (otherToY >= image.height) {
+            scale = (image.height - 1 - fromY) / (otherToY - fromY);
+            otherToY = image.height - 1;
+        }
+        otherToX = Math.floor(fromX + (otherToX - fromX) * scale);
+        result += sizeOfBlackWhiteBlackRun(image, fromX, fromY, otherToX, otherToY);
+        // Le pixel central est compté deux fois
+        return result - 1;
+    }
+
+    function moduleSizeOneWay(image, pattern, other) {
+        var one = sizeOfBlackWhiteBlackRunBothWays(
+            image, Math.floor(pattern.x), Math.floor(pattern.y), Math.floor(other.x), Math.floor(other.y));
+        var two = sizeOfBlackWhiteBlackRunBothWays(
+            image, Math.floor(other.x), Math.floor(other.y), Math.floor(pattern.x), Math.floor(pattern.y));
+        if (isNaN(one)) {
+            return two / 7;
+        }
+        if (isNaN(two)) {
+            return one / 7;
+        }
+        return (one + two) / 14;
+    }
+
+    function estimateModuleSize(image, corners) {
+        return (moduleSizeOneWay(image, corners.topLeft, corners.topRight) +
+            moduleSizeOneWay(image, corners.topLeft, corners.bottomLeft)) / 2;
+    }
+
+    function estimateDimension(corners, moduleSize) {
+        var horizontal = Math.round(distance(corners.topLeft, corners.topRight) / moduleSize);
+        var vertical = Math.round(distance(corners.topLeft, corners.bottomLeft) / moduleSize);
+        var dimension = Math.floor((horizontal + vertical) / 2) + 7;
+        // Une dimension valide vaut 1 modulo 4
+        switch (dimension & 3) {
+        case 0:
+            return dimension + 1;
+        case 2:
+            return dimension - 1;
+        case 3:
+            return dimension - 2;
+        default:
+            return dimension;
+        }
+    }
+
+    // Motif d'alignement : un module noir dans un anneau blanc (1:1:1)
+    function foundAlignmentCross(counts, moduleSize) {
+        var maxVariance = moduleSize / 2;
+        return Math.abs(moduleSize - counts[0]) < maxVariance &&
+            Math.abs(moduleSize - counts[1]) < maxVariance &&
+            Math.abs(moduleSize - counts[2]) < maxVariance;
+    }
+
+    function alignmentCenterFromEnd(counts, end) {
+        return end - counts[2] - counts[1] / 2;
+    }
+
+    function crossCheckAlignment(image, startI, centerJ, maxCount, originalTotal, moduleSize) {
+        var counts = [0, 0, 0];
+        var i = startI;
+        while (i >= 0 && image.get(centerJ, i) && counts[1] <= maxCount) {
+            counts[1]++;
+            i--;
+        }
+        if (i < 0 || counts[1] > maxCount) {
+            return NaN;
+        }
+        while (i >= 0 && !image.get(centerJ, i) && counts[0] <= maxCount) {
+            counts[0]++;
+            i--;
+        }
+        if (counts[0] > maxCount) {
+            return NaN;
+        }
+        i = startI + 1;
+        while (i < image.height && image.get(centerJ, i) && counts[1] <= maxCount) {
+            counts[1]++;
+            i++;
+        }
+        if (i === image.height || counts[1] > maxCount) {
+            return NaN;
+        }
+        while (i < image.height && !image.get(centerJ, i) && counts[2] <= maxCount) {
+            counts[2]++;
+            i++;
+        }
+        if (counts[2] > maxCount) {
+            return NaN;
+        }
+        if (5 * Math.abs(sumCounts(counts) - originalTotal) >= 2 * originalTotal) {
+            return NaN;
+        }
+        return foundAlignmentCross(counts, moduleSize) ? alignmentCenterFromEnd(counts, i) : NaN;
+    }
+
+    // Motifs d'alignement candidats de la zone, les plus confirmés puis les plus proches d'abord
+    function findAlignmentInRegion(image, moduleSize, estimatedX, estimatedY, allowanceFactor) {
+        var allowance = Math.floor(allowanceFactor * moduleSize);
+        var startX = Math.max(0, estimatedX - allowance);
+        var endX = Math.min(image.width - 1, estimatedX + allowance);
+        var startY = Math.max(0, estimatedY - allowance);
+        var endY = Math.min(image.height - 1, estimatedY + allowance);
+        if (endX - startX < moduleSize * 3 || endY - startY < moduleSize * 3) {
+            return [];
+        }
+
+        var centers = [];
+        var handle = function (counts, i, j) {
+            var total = sumCounts(counts);
+            var centerJ = alignmentCenterFromEnd(counts, j);
+            var centerI = crossCheckAlignment(image, i, Math.floor(centerJ), 2 * counts[1], total, moduleSize);
+            if (!isNaN(centerI)) {
+                addCenter(centers, centerI, centerJ, total / 3);
+            }
+        };
+
+        for (var i = startY; i < endY; i++) {
+            var counts = [0, 0, 0];
+            var j = startX;
+            // Un blanc en début de ligne n'a pas de longueur connue
+            while (j < endX && !image.get(j, i)) {
+                j++;
+            }
+            var state = 0;
+            for (; j < endX; j++) {
+                if (image.get(j, i)) {
+                    if (state === 1) {
+                        counts[1]++;
+                    } else if (state === 2) {
+                        if (foundAlignmentCross(counts, moduleSize)) {
+                            handle(counts, i, j);
+                        }
+                        counts = [counts[2], 1, 0];
+                        state = 1;
+                    } else {
+                        counts[++state]++;
+                    }
+                } else {
+                    if (state === 1) {
+                        state++;
+                    }
+                    counts[state]++;
+                }
+            }
+            if (foundAlignmentCross(counts, moduleSize)) {
+                handle(counts, i, endX);
+            }
+        }
+        var estimate = { x: estimatedX, y: estimatedY };
+        return centers.sort(function (a, b) {
+            return (Math.min(b.count, CENTER_QUORUM) - Math.min(a.count, CENTER_QUORUM)) ||
+                (squaredDistance(a, estimate) - squaredDistance(b, estimate));
+        });
+    }
+
+    // Candidats de la zone la plus étroite à la plus large : la perspective peut
+    // éloigner le motif de sa position estimée et des modules de données peuvent
+    // lui ressembler, chaque candidat est donc validé par le décodage
+    function findAlignmentPatterns(image, corners, moduleSize, dimension) {
+        var topLeft = corners.topLeft;
+        var bottomRightX = corners.topRight.x - topLeft.x + corners.bottomLeft.x;
+        var bottomRightY = corners.topRight.y - topLeft.y + corners.bottomLeft.y;
+        // Le motif est à 3 modules du coin bas droit (centre à centre)
+        var correction = 1 - 3 / (dimension - 7);
+        var estimatedX = Math.floor(topLeft.x + correction * (bottomRightX - topLeft.x));
+        var estimatedY = Math.floor(topLeft.y + correction * (bottomRightY - topLeft.y));
+        var patterns = [];
+        for (var allowance = 4; allowance <= 16 && patterns.length < MAX_ALIGNMENT_CANDIDATES; allowance <<= 1) {
+            findAlignmentInRegion(image, moduleSize, estimatedX, estimatedY, allowance).forEach(function (pattern) {
+                var known = patterns.some(function (other) {
+                    return distance(pattern, other) < moduleSize;
+                });
+                if (!known && patterns.length < MAX_ALIGNMENT_CANDIDATES) {
+                    patterns.push(pattern);
+                }
+            });
+        }
+        return patterns;
+    }
+
+    // Homographie envoyant les 4 points `from` sur les 4 points `to` ; null si dégénérée
+    function perspectiveTransform(from, to) {
+        var rows = [];
+        for (var k = 0; k < 4; k++) {
+            var u = from[k][0];
+            var v = from[k][1];
+            var x = to[k][0];
+            var y = to[k][1];
+            rows.push([u, v, 1, 0, 0, 0, -u * x, -v * x, x]);
+            rows.push([0, 0, 0, u, v, 1, -u * y, -v * y, y]);
+        }
+        // Élimination de Gauss avec pivot partiel
+        for (var col = 0; col < 8; col++) {
+            var pivot = col;
+            for (var r = col + 1; r < 8; r++) {
+                if (Math.abs(rows[r][col]) > Math.abs(rows[pivot][col])) {
+                    pivot = r;
+                }
+            }
+            if (Math.abs(rows[pivot][col]) < 1e-10) {
+                return null;
+            }
+            var swap = rows[col];
+            rows[col] = rows[pivot];
+            rows[pivot] = swap;
+            for (r = 0; r < 8; r++) {
+                if (r !== col && rows[r][col] !== 0) {
+                    var factor = rows[r][col] / rows[col][col];
+                    for (var c = col; c < 9; c++) {
+                        rows[r][c] -= factor * rows[col][c];
+                    }
+                }
+            }
+        }
+        var h = rows.map(function (row, index) {
+            return row[8] / row[index];
+        });
+        return function (u, v) {
+            var w = h[6] * u + h[7] * v + 1;
+            return { x: (h[0] * u + h[1] * v + h[2]) / w, y: (h[3] * u + h[4] * v + h[5]) / w };
+        };
+    }
+
+    function gridTransform(corners, alignment, dimension) {
+        var far = dimension - 3.5;
+        var bottomRight;
+        var sourceBottomRight;
+        if (alignment) {
+            bottomRight = alignment;
+            sourceBottomRight = far - 3;
+        } else {
+            bottomRight = {
+                x: corners.topRight.x - corners.topLeft.x + corners.bottomLeft.x,
+                y: corners.topRight.y - corners.topLeft.y + corners.bottomLeft.y
+            };
+            sourceBottomRight = far;
+        }
+        return perspectiveTransform(
+            [[3.5, 3.5], [far, 3.5], [sourceBottomRight, sourceBottomRight], [3.5, far]],
+            [
+                [corners.topLeft.x, corners.topLeft.y],
+                [corners.topRight.x, corners.topRight.y],
+                [bottomRight.x, bottomRight.y],
+                [corners.bottomLeft.x, corners.bottomLeft.y]
+            ]
+        );
+    }
+
+    function sampleGrid(image, transform, dimension) {
+        var bits = new BitMatrix(dimension, dimension);
+        for (var y = 0; y < dimension; y++) {
+            for (var x = 0; x < dimension; x++) {
+                var point = transform(x + 0.5, y + 0.5);
+                bits.set(x, y, image.get(Math.floor(point.x), Math.floor(point.y)));
+            }
+        }
+        return bits;
+    }
+
+    // === FORMAT, VERSION, DONNÉES ===
+
+    // Codes correcteurs par bloc et nombre de blocs, par niveau (L, M, Q, H) puis version (1 à 40)
+    var EC_CODEWORDS_PER_BLOCK = [
+        [7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28,
+            28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30],
+        [10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26,
+            26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28],
+        [13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30,
+            28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30],
+        [17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28,
+            30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30]
+    ];
+    var NUM_BLOCKS = [
+        [1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8,
+            8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25],
+        [1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16,
+            17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49],
+        [1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20,
+            23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68],
+        [1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25,
+            25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81]
+    ];
+    // Bits de niveau du format (M=00, L=01, H=10, Q=11) -> index dans les tables
+    var EC_LEVEL_INDEX = [1, 0, 3, 2];
+
+    function bitLength(value) {
+        var length = 0;
+        while (value) {
+            length++;
+            value >>>= 1;
+        }
+        return length;
+    }
+
+    function bchCode(value, dataBits, poly) {
+        var shifted = value << dataBits;
+        var remainder = shifted;
+        var polyLength = bitLength(poly);
+        while (bitLength(remainder) >= polyLength) {
+            remainder ^= poly << (bitLength(remainder) - polyLength);
+        }
+        return shifted | remainder;
+    }
+
+    // Mots valides : format (5 bits, masqués par 0x5412) et version (6 bits, versions 7 à 40)
+    var FORMAT_CODES = [];
+    var VERSION_CODES = [];
+    (function () {
+        for (var data = 0; data < 32; data++) {
+            FORMAT_CODES.push({ code: bchCode(data, 10, 0x537) ^ 0x5412, value: data });
+        }
+        for (var version = 7; version <= 40; version++) {
+            VERSION_CODES.push({ code: bchCode(version, 12, 0x1F25), value: version });
+        }
+    })();
+
+    function bitCount(value) {
+        var count = 0;
+        while (value) {
+            count += value & 1;
+            value >>>= 1;
+        }
+        return count;
+    }
+
+    // Valeur du mot valide le plus proche de l'une des copies (3 bits d'écart au plus)
+    function closestCode(codes, copies) {
+        var best = null;
+        var bestDistance = 4;
+        codes.forEach(function (entry) {
+            copies.forEach(function (copy) {
+                var difference = bitCount(entry.code ^ copy);
+                if (difference < bestDistance) {
+                    bestDistance = difference;
+                    best = entry.value;
+                }
+            });
+        });
+        return best;
+    }
+
+    function readFormat(bits) {
+        var size = bits.width;
+        var first = 0;
+        var second = 0;
+        for (var i = 14; i >= 0; i--) {
+            // Autour du motif haut gauche
+            var bit;
+            if (i < 6) {
+                bit = bits.get(8, i);
+            } else if (i < 8) {
+                bit = bits.get(8, i + 1);
+            } else if (i === 8) {
+                bit = bits.get(7, 8);
+            } else {
+                bit = bits.get(14 - i, 8);
+            }
+            first = (first << 1) | (bit ? 1 : 0);
+            // Le long des motifs haut droit et bas gauche
+            bit = i < 8 ? bits.get(size - 1 - i, 8) : bits.get(8, size - 15 + i);
+            second = (second << 1) | (bit ? 1 : 0);
+        }
+        var value = closestCode(FORMAT_CODES, [first, second]);
+        if (value === null) {
+            return null;
+        }
+        return { ecIndex: EC_LEVEL_INDEX[value >> 3], mask: value & 7 };
+    }
+
+    function readVersion(bits) {
+        var size = bits.width;
+        var version = (size - 17) / 4;
+        if (version < 1 || version > 40 || version !== Math.floor(version)) {
+            return null;
+        }
+        if (version < 7) {
+            return version;
+        }
+        var first = 0;
+        var second = 0;
+        for (var i = 17; i >= 0; i--) {
+            first = (first << 1) | (bits.get(size - 11 + i % 3, Math.floor(i / 3)) ? 1 : 0);
+            second = (second << 1) | (bits.get(Math.floor(i / 3), size - 11 + i % 3) ? 1 : 0);
+        }
+        return closestCode(VERSION_CODES, [first, second]) === version ? version : null;
+    }
+
+    function alignmentPositions(version) {
+        if (version === 1) {
+            return [];
+        }
+        var size = version * 4 + 17;
+        var count = Math.floor(version / 7) + 2;
+        var step = version === 32 ? 26 : Math.ceil((version * 4 + 4) / (count * 2 - 2)) * 2;
+        var positions = [6];
+        for (var position = size - 7; positions.length < count; position -= step) {
+            positions.splice(1, 0, position);
+        }
+        return positions;
+    }
+
+    function fillRegion(matrix, left, top, width, height) {
+        for (var y = top; y < top + height; y++) {
+            for (var x = left; x < left + width; x++) {
+                matrix.set(x, y, true);
+            }
+        }
+    }
+
+    // Modules de structure (motifs, séparateurs, format, version) : ne portent pas de données
+    function functionPatterns(version) {
+        var size = version * 4 + 17;
+        var matrix = new BitMatrix(size, size);
+        fillRegion(matrix, 0, 0, 9, 9);
+        fillRegion(matrix, size - 8, 0, 8, 9);
+        fillRegion(matrix, 0, size - 8, 9, 8);
+        fillRegion(matrix, 6, 9, 1, size - 17);
+        fillRegion(matrix, 9, 6, size - 17, 1);
+        var positions = alignmentPositions(version);
+        var last = positions.length - 1;
+        for (var i = 0; i <= last; i++) {
+            for (var j = 0; j <= last; j++) {
+                if ((i === 0 && (j === 0 || j === last)) || (i === last && j === 0)) {
+                    continue;
+                }
+                fillRegion(matrix, positions[i] - 2, positions[j] - 2, 5, 5);
+            }
+        }
+        if (version >= 7) {
+            fillRegion(matrix, size - 11, 0, 3, 6);
+            fillRegion(matrix, 0, size - 11, 6, 3);
+        }
+        return matrix;
+    }
+
+    var MASKS = [
+        function (x, y) { return (x + y) % 2 === 0; },
+        function (x, y) { return y % 2 === 0; },
+        function (x, y) { return x % 3 === 0; },
+        function (x, y) { return (x + y) % 3 === 0; },
+        function (x, y) { return (Math.floor(x / 3) + Math.floor(y / 2)) % 2 === 0; },
+        function (x, y) { return (x * y) % 2 + (x * y) % 3 === 0; },
+        function (x, y) { return ((x * y) % 2 + (x * y) % 3) % 2 === 0; },
+        function (x, y) { return ((x + y) % 2 + (x * y) % 3) % 2 === 0; }
+    ];
+
+    // Mots de code dans l'ordre de placement (colonnes de deux, en zigzag)
+    function readCodewords(bits, version, mask) {
+        var size = bits.width;
+        var reserved = functionPatterns(version);
+        var isMasked = MASKS[mask];
+        var codewords = [];
+        var current = 0;
+        var count = 0;
+        for (var right = size - 1; right >= 1; right -= 2) {
+            if (right === 6) {
+                right = 5;      // colonne du motif de synchronisation
+            }
+            var upward = ((right + 1) & 2) === 0;
+            for (var step = 0; step < size; step++) {
+                var y = upward ? size - 1 - step : step;
+                for (var k = 0; k < 2; k++) {
+                    var x = right - k;
+                    if (reserved.get(x, y)) {
+                        continue;
+                    }
+                    current = (current << 1) | (bits.get(x, y) !== isMasked(x, y) ? 1 : 0);
+                    if (++count === 8) {
+                        codewords.push(current);
+                        current = 0;
+                        count = 0;
+                    }
+                }
+            }
+        }
+        return codewords;
+    }
+
+    // === REED-SOLOMON (GF(256), polynôme 0x11D) ===
+
+    var GF_EXP = new Uint8Array(512);
+    var GF_LOG = new Uint8Array(256);
+    (function () {
+        var value = 1;
+        for (var i = 0; i < 255; i++) {
+            GF_EXP[i] = value;
+            GF_LOG[value] = i;
+            value <<= 1;
+            if (value & 0x100) {
+                value ^= 0x11D;
+            }
+        }
+        for (i = 255; i < 512; i++) {
+            GF_EXP[i] = GF_EXP[i - 255];
+        }
+    })();
+
+    function gfMultiply(a, b) {
+        return a && b ? GF_EXP[GF_LOG[a] + GF_LOG[b]] : 0;
+    }
+
+    function gfDivide(a, b) {
+        return a ? GF_EXP[GF_LOG[a] + 255 - GF_LOG[b]] : 0;
+    }
+
+    // α^n, n pouvant être négatif
+    function gfAlphaPower(n) {
+        return GF_EXP[((n % 255) + 255) % 255];
+    }
+
+    function gfPower(value, exponent) {
+        return value ? GF_EXP[(GF_LOG[value] * exponent) % 255] : (exponent ? 0 : 1);
+    }
+
+    // Polynôme en ordre croissant : coefficients[i] * x^i
+    function evaluate(coefficients, x) {
+        var result = 0;
+        for (var i = coefficients.length - 1; i >= 0; i--) {
+            result = gfMultiply(result, x) ^ coefficients[i];
+        }
+        return result;
+    }
+
+    // Corrige le bloc (données puis codes correcteurs) sur place ; false si irrécupérable
+    function correctErrors(block, ecLength) {
+        var n = block.length;
+        var syndromes = [];
+        var hasErrors = false;
+        var i, j;
+        for (i = 0; i < ecLength; i++) {
+            var x = gfAlphaPower(i);
+            var value = 0;
+            for (j = 0; j < n; j++) {
+                value = gfMultiply(value, x) ^ block[j];
+            }
+            syndromes.push(value);
+            hasErrors = hasErrors || value !== 0;
+        }
+        if (!hasErrors) {
+            return true;
+        }
+
+        // Berlekamp-Massey : polynôme localisateur des erreurs
+        var locator = [1];
+        var previous = [1];
+        var errors = 0;
+        var shift = 1;
+        var previousDiscrepancy = 1;
+        for (var r = 0; r < ecLength; r++) {
+            var discrepancy = syndromes[r];
+            for (i = 1; i <= errors && i < locator.length; i++) {
+                discrepancy ^= gfMultiply(locator[i], syndromes[r - i]);
+            }
+            if (discrepancy === 0) {
+                shift++;
+                continue;
+            }
+            var scale = gfDivide(discrepancy, previousDiscrepancy);
+            var next = locator.slice();
+            for (i = 0; i < previous.length; i++) {
+                while (next.length <= i + shift) {
+                    next.push(0);
+                }
+                next[i + shift] ^= gfMultiply(scale, previous[i]);
+            }
+            if (2 * errors <= r) {
+                previous = locator;
+                errors = r + 1 - errors;
+                previousDiscrepancy = discrepancy;
+                shift = 1;
+            } else {
+                shift++;
+            }
+            locator = next;
+        }
+        while (locator.length > 1 && locator[locator.length - 1] === 0) {
+            locator.pop();
+        }
+        if (locator.length - 1 !== errors || 2 * errors > ecLength) {
+            return false;
+        }
+
+        // Chien : positions p (puissance de x) où Λ(α^-p) = 0
+        var positions = [];
+        for (var p = 0; p < n; p++) {
+            if (evaluate(locator, gfAlphaPower(-p)) === 0) {
+                positions.push(p);
+            }
+        }
+        if (positions.length !== errors) {
+            return false;
+        }
+
+        // Forney : Ω = S·Λ mod x^ecLength, e = X·Ω(X⁻¹) / Λ'(X⁻¹)
+        var evaluator = [];
+        for (i = 0; i < ecLength; i++) {
+            evaluator.push(0);
+        }
+        for (i = 0; i < ecLength; i++) {
+            for (j = 0; j < locator.length && i + j < ecLength; j++) {
+                evaluator[i + j] ^= gfMultiply(syndromes[i], locator[j]);
+            }
+        }
+        for (var k = 0; k < positions.length; k++) {
+            var inverse = gfAlphaPower(-positions[k]);
+            var derivative = 0;
+            for (i = 1; i < locator.length; i += 2) {
+                derivative ^= gfMultiply(locator[i], gfPower(inverse, i - 1));
+            }
+            if (derivative === 0) {
+                return false;
+            }
+            var magnitude = gfMultiply(gfAlphaPower(positions[k]), gfDivide(evaluate(evaluator, inverse), derivative));
+            block[n - 1 - positions[k]] ^= magnitude;
+        }
+        return true;
+    }
+
+    // Désentrelace les blocs, les corrige et retourne les octets de données (ou null)
+    function correctCodewords(codewords, version, ecIndex) {
+        var ecLength = EC_CODEWORDS_PER_BLOCK[ecIndex][version - 1];
+        var numBlocks = NUM_BLOCKS[ecIndex][version - 1];
+        var total = codewords.length;
+        var shortBlocks = numBlocks - total % numBlocks;
+        var shortLength = Math.floor(total / numBlocks);
+        var dataEnd = shortLength - ecLength;
+        if (dataEnd <= 0) {
+            return null;
+        }
+        var blocks = [];
+        var b, i;
+        for (b = 0; b < numBlocks; b++) {
+            blocks.push([]);
+        }
+        // Les blocs longs ont un octet de données de plus que les blocs courts
+        var index = 0;
+        for (i = 0; i <= shortLength; i++) {
+            for (b = 0; b < numBlocks; b++) {
+                if (i !== dataEnd || b >= shortBlocks) {
+                    blocks[b].push(codewords[index++]);
+                }
+            }
+        }
+        var data = [];
+        for (b = 0; b < numBlocks; b++) {
+            if (!correctErrors(blocks[b], ecLength)) {
+                return null;
+            }
+            for (i = 0; i < blocks[b].length - ecLength; i++) {
+                data.push(blocks[b][i]);
+            }
+        }
+        return data;
+    }
+
+    // === SEGMENTS ===
+
+    var MODE_NUMERIC = 1;
+    var MODE_ALPHANUMERIC = 2;
+    var MODE_STRUCTURED_APPEND = 3;
+    var MODE_BYTE = 4;
+    var MODE_FNC1_FIRST = 5;
+    var MODE_ECI = 7;
+    var MODE_KANJI = 8;
+    var MODE_FNC1_SECOND = 9;
+
+    // Taille du compteur de caractères : versions 1-9, 10-26, 27-40
+    var COUNT_BITS = {};
+    COUNT_BITS[MODE_NUMERIC] = [10, 12, 14];
+    COUNT_BITS[MODE_ALPHANUMERIC] = [9, 11, 13];
+    COUNT_BITS[MODE_BYTE] = [8, 16, 16];
+    COUNT_BITS[MODE_KANJI] = [8, 10, 12];
+
+    var ALPHANUMERIC_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:';
+
+    var ECI_ENCODINGS = { 1: 'iso-8859-1', 3: 'iso-8859-1', 20: 'shift_jis', 26: 'utf-8' };
+
+    function BitReader(bytes) {
+        this.bytes = bytes;
+        this.position = 0;
+    }
+
+    BitReader.prototype.available = function () {
+        return this.bytes.length * 8 - this.position;
+    };
+
+    BitReader.prototype.read = function (count) {
+        var value = 0;
+        for (var i = 0; i < count; i++) {
+            var byte = this.bytes[this.position >> 3];
+            value = (value << 1) | ((byte >> (7 - (this.position & 7))) & 1);
+            this.position++;
+        }
+        return value;
+    };
+
+    function readEci(reader) {
+        var first = reader.read(8);
+        if ((first & 0x80) === 0) {
+            return first & 0x7F;
+        }
+        if ((first & 0xC0) === 0x80) {
+            return ((first & 0x3F) << 8) | reader.read(8);
+        }
+        if ((first & 0xE0) === 0xC0) {
+            return ((first & 0x1F) << 16) | reader.read(16);
+        }
+        return null;
+    }
+
+    function latin1(bytes) {
+        var text = '';
+        for (var i = 0; i < bytes.length; i += 4096) {
+            text += String.fromCharCode.apply(null, bytes.slice(i, i + 4096));
+        }
+        return text;
+    }
+
+    // Octets -> texte : encodage ECI s'il est donné, sinon UTF-8 s'il est valide, sinon Latin-1
+    function decodeBytes(bytes, encoding) {
+        if (typeof TextDecoder !== 'undefined') {
+            try {
+                return new TextDecoder(encoding || 'utf-8', { fatal: true }).decode(new Uint8Array(bytes));
+            } catch (e) {
+                return latin1(bytes);
+            }
+        }
+        var text = latin1(bytes);
+        try {
+            return decodeURIComponent(escape(text));
+        } catch (e) {
+            return text;
+        }
+    }
+
+    function pad(value, length) {
+        var text = String(value);
+        while (text.length < length) {
+            text = '0' + text;
+        }
+        return text;
+    }
+
+    function decodeSegments(data, version) {
+        var reader = new BitReader(data);
+        var range = version < 10 ? 0 : (version < 27 ? 1 : 2);
+        var text = '';
+        var bytes = [];
+        var encoding = null;
+        var value;
+        while (reader.available() >= 4) {
+            var mode = reader.read(4);
+            if (mode === 0) {
+                break;
+            }
+            if (mode === MODE_ECI) {
+                encoding = ECI_ENCODINGS[readEci(reader)] || null;
+                continue;
+            }
+            if (mode === MODE_STRUCTURED_APPEND) {
+                reader.read(16);
+                continue;
+            }
+            if (mode === MODE_FNC1_FIRST) {
+                continue;
+            }
+            if (mode === MODE_FNC1_SECOND) {
+                reader.read(8);
+                continue;
+            }
+            if (!COUNT_BITS[mode] || reader.available() < COUNT_BITS[mode][range]) {
+                return null;
+            }
+            var count = reader.read(COUNT_BITS[mode][range]);
+            if (mode === MODE_NUMERIC) {
+                if (reader.available() < Math.floor(count / 3) * 10 + [0, 4, 7][count % 3]) {
+                    return null;
+                }
+                for (; count >= 3; count -= 3) {
+                    value = reader.read(10);
+                    if (value >= 1000) {
+                        return null;
+                    }
+                    text += pad(value, 3);
+                }
+                if (count === 2) {
+                    value = reader.read(7);
+                    if (value >= 100) {
+                        return null;
+                    }
+                    text += pad(value, 2);
+                } else if (count === 1) {
+                    value = reader.read(4);
+                    if (value >= 10) {
+                        return null;
+                    }
+                    text += value;
+                }
+            } else if (mode === MODE_ALPHANUMERIC) {
+                if (reader.available() < Math.floor(count / 2) * 11 + (count % 2) * 6) {
+                    return null;
+                }
+                for (; count >= 2; count -= 2) {
+                    value = reader.read(11);
+                    if (value >= 45 * 45) {
+                        return null;
+                    }
+                    text += ALPHANUMERIC_CHARS[Math.floor(value / 45)] + ALPHANUMERIC_CHARS[value % 45];
+                }
+                if (count === 1) {
+                    value = reader.read(6);
+                    if (value >= 45) {
+                        return null;
+                    }
+                    text += ALPHANUMERIC_CHARS[value];
+                }
+            } else if (mode === MODE_BYTE) {
+                if (reader.available() < count * 8) {
+                    return null;
+                }
+                bytes = [];
+                for (var i = 0; i < count; i++) {
+                    bytes.push(reader.read(8));
+                }
+                text += decodeBytes(bytes, encoding);
+            } else {
+                if (reader.available() < count * 13) {
+                    return null;
+                }
+                bytes = [];
+                for (; count > 0; count--) {
+                    value = reader.read(13);
+                    value = ((Math.floor(value / 0xC0) << 8) | (value % 0xC0));
+                    value += value < 0x1F00 ? 0x8140 : 0xC140;
+                    bytes.push(value >> 8, value & 0xFF);
+                }
+                text += decodeBytes(bytes, 'shift_jis');
+            }
+        }
+        return text;
+    }
+
+    // === ASSEMBLAGE ===
+
+    function decodeGrid(bits) {
+        var format = readFormat(bits);
+        var version = format && readVersion(bits);
+        if (!version) {
+            return null;
+        }
+        var data = correctCodewords(readCodewords(bits, version, format.mask), version, format.ecIndex);
+        if (!data) {
+            return null;
+        }
+        var text = decodeSegments(data, version);
+        return text === null ? null : { data: text, version: version };
+    }
+
+    function location(transform, dimension) {
+        var point = function (x, y) {
+            return transform(x, y);
+        };
+        return {
+            topLeftCorner: point(0, 0),
+            topRightCorner: point(dimension, 0),
+            bottomRightCorner: point(dimension, dimension),
+            bottomLeftCorner: point(0, dimension)
+        };
+    }
+
+    function decodeAt(image, corners) {
+        var moduleSize = estimateModuleSize(image, corners);
+        if (!(moduleSize >= 1)) {
+            return null;
+        }
+        var estimated = estimateDimension(corners, moduleSize);
+        // Dimension estimée puis ses voisines (erreur d'arrondi sur la taille des modules)
+        var dimensions = [estimated, estimated - 4, estimated + 4];
+        for (var d = 0; d < dimensions.length; d++) {
+            var dimension = dimensions[d];
+            if (dimension < 21 || dimension > 177) {
+                continue;
+            }
+            // Avec chaque motif d'alignement candidat, puis sans (parallélogramme)
+            var alignments = dimension > 21 ? findAlignmentPatterns(image, corners, moduleSize, dimension) : [];
+            var transforms = alignments.concat([null]).map(function (alignment) {
+                return gridTransform(corners, alignment, dimension);
+            });
+            for (var t = 0; t < transforms.length; t++) {
+                if (!transforms[t]) {
+                    continue;
+                }
+                var bits = sampleGrid(image, transforms[t], dimension);
+                // Code lu en miroir : mêmes modules, lignes et colonnes échangées
+                var result = decodeGrid(bits) || decodeGrid(bits.transposed());
+                if (result) {
+                    result.location = location(transforms[t], dimension);
+                    return result;
+                }
+            }
+        }
+        return null;
+    }
+
+    function scan(image) {
+        var triples = selectBestPatterns(findFinderPatterns(image));
+        for (var i = 0; i < triples.length; i++) {
+            var result = decodeAt(image, orderPatterns(triples[i]));
+            if (result) {
+                return result;
+            }
+        }
+        return null;
+    }
+
+    var INVERSION_ATTEMPTS = {
+        dontInvert: [false],
+        onlyInvert: [true],
+        attemptBoth: [false, true],
+        invertFirst: [true, false]
+    };
+
+    function israQRDecode(rgba, width, height, options) {
+        var attempts = INVERSION_ATTEMPTS[(options && options.inversionAttempts) || 'attemptBoth'] ||
+            INVERSION_ATTEMPTS.attemptBoth;
+        var image = binarize(luminance(rgba, width, height), width, height);
+        for (var i = 0; i < attempts.length; i++) {
+            var result = scan(attempts[i] ? image.inverted() : image);
+            if (result) {
+                return result;
+            }
+        }
+        return null;
+    }
+
+    root.israQRDecode = israQRDecode;
+})(typeof self !== 'undefined' ? self : this);
@@ -7,6 +7,34 @@ odoo.define('isra_qr_integration.scanner', function (require) {
     var ajax = require('web.ajax');
     var Dialog = require('web.Dialog');
 
+    // Format QR compact (voir isra_seeds_traceability/tools/qr_payload.py)
+    // ISRA1 : non signé, ISRA2 : suivi de l'identifiant de clé et de la signature HMAC
+    var COMPACT_RE = /^ISRA([12])\//;
+
+    // Index hors ligne des lots (voir /isra/api/offline_bundle)
+    // Utilisé seulement sans réseau : il ne permet pas de vérifier la signature HMAC du QR code
+    var OFFLINE_STORAGE_KEY = 'isra_qr_offline_index';
+    // Format des lignes de l'index (2 : variété ajoutée) ; un index d'un autre format est retéléchargé
+    var OFFLINE_INDEX_FORMAT = 2;
+
+    // Décodage : décodeur du module (qr_decoder.js), exécuté dans un Web Worker
+    var DECODER_URL = '/isra_qr_integration/static/src/js/qr_decoder.js';
+    var DECODE_WORKER_URL = '/isra_qr_integration/static/src/js/qr_decode_worker.js';
+    // Zone analysée : carré central de la vidéo, réduit à ROI_SIZE pixels de côté
+    var ROI_RATIO = 0.7;
+    var ROI_SIZE = 400;
+    // Taille maximale des images importées avant décodage
+    var UPLOAD_MAX_SIZE = 1024;
+    // Intervalle minimal entre deux analyses (rythmé par requestAnimationFrame)
+    var SCAN_INTERVAL_MS = 200;
+
+    // Mode continu (inventaire) : le flux caméra reste ouvert entre deux sacs
+    var DEDUPE_WINDOW_MS = 3000;       // lecture répétée du même code ignorée
+    var RESULT_CACHE_SIZE = 200;       // derniers résultats de vérification (LRU)
+    var RESULT_CACHE_TTL_MS = 5 * 60 * 1000;
+    var BATCH_DELAY_MS = 400;          // regroupement des codes distincts
+    var BATCH_MAX_SIZE = 50;           // envoi immédiat au-delà
+
     publicWidget.registry.QRScanner = publicWidget.Widget.extend({
         selector: '#qr-scanner-container',
         
@@ -14,24 +42,49 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             'click .btn-restart-scanner': '_onRestartScanner',
             'click .btn-switch-camera': '_onSwitchCamera',
             'click .btn-upload-image': '_onUploadImage',
+            'click .btn-continuous-mode': '_onToggleContinuousMode',
         },
         
         init: function () {
             this._super.apply(this, arguments);
             this.currentStream = null;
-            this.scanInterval = null;
+            this.animationFrame = null;
             this.isScanning = false;
+            this.decoder = null;
+            this.decodeWorker = null;
+            this.decodeRequests = {};
+            this.decodeRequestId = 0;
+            this.continuousMode = false;
+            this.recentReads = new Map();
+            this.resultCache = new Map();
+            this.scanCounts = new Map();
+            this.pendingCodes = [];
+            this.batchTimer = null;
             this.useFrontCamera = false;
+            this.offlineIndex = null;
+            this.trustedKeys = [];
+            this._onOnline = this._syncOfflineIndex.bind(this);
         },
         
         start: function () {
             this._super.apply(this, arguments);
             this.initScanner();
             this._addControls();
+            // Clés publiques de l'index servies avec la page (data-offline-keys)
+            this.trustedKeys = (this.$el.data('offlineKeys') || '').split(',').filter(Boolean);
+            this.offlineIndex = this._loadOfflineIndex();
+            this._syncOfflineIndex();
+            window.addEventListener('online', this._onOnline);
         },
         
         destroy: function () {
             this._stopScanning();
+            if (this.decodeWorker) {
+                this.decodeWorker.terminate();
+                this.decodeWorker = null;
+            }
+            window.removeEventListener('online', this._onOnline);
+            clearTimeout(this.batchTimer);
             this._super.apply(this, arguments);
         },
         
@@ -48,7 +101,11 @@ odoo.define('isra_qr_integration.scanner', function (require) {
                         <button type="button" class="btn btn-info btn-upload-image">
                             <i class="fa fa-upload"></i> Importer Image
                         </button>
+                        <button type="button" class="btn btn-outline-success btn-continuous-mode">
+                            <i class="fa fa-repeat"></i> Mode Continu
+                        </button>
                     </div>
+                    <ul id="qr-continuous-results" class="list-group mt-3" style="display: none;"></ul>
                     <input type="file" id="qr-image-upload" accept="image/*" style="display: none;">
                 </div>
             `;
@@ -104,54 +161,52 @@ odoo.define('isra_qr_integration.scanner', function (require) {
         
         startScanning: function (video) {
             var self = this;
-            var canvas = document.createElement('canvas');
-            var context = canvas.getContext('2d');
+            var lastScan = 0;
+            var decoding = false;
             
             this.isScanning = true;
             
-            // Scanner toutes les 500ms
-            this.scanInterval = setInterval(function() {
+            // Une analyse au plus toutes les SCAN_INTERVAL_MS, jamais deux en parallèle ;
+            // requestAnimationFrame s'arrête de lui-même quand la page est masquée
+            var tick = function (timestamp) {
                 if (!self.isScanning) {
                     return;
                 }
+                self.animationFrame = window.requestAnimationFrame(tick);
                 
-                if (video.readyState === video.HAVE_ENOUGH_DATA) {
-                    canvas.width = video.videoWidth;
-                    canvas.height = video.videoHeight;
-                    context.drawImage(video, 0, 0, canvas.width, canvas.height);
-                    
-                    var imageData = context.getImageData(0, 0, canvas.width, canvas.height);
-                    
-                    // Utiliser jsQR pour décoder (nécessite la librairie jsQR)
-                    if (window.jsQR) {
-                        var code = jsQR(imageData.data, imageData.width, imageData.height);
-                        if (code) {
-                            self._stopScanning();
-                            self.processQRCode(code.data);
-                        }
+                if (decoding || timestamp - lastScan < SCAN_INTERVAL_MS ||
+                        video.readyState !== video.HAVE_ENOUGH_DATA) {
+                    return;
+                }
+                lastScan = timestamp;
+                decoding = true;
+                
+                self._decodeVideoFrame(video).then(function (data) {
+                    decoding = false;
+                    if (!data || !self.isScanning) {
+                        return;
+                    }
+                    if (self.continuousMode) {
+                        // Le flux reste ouvert : lecture suivante sans nouveau getUserMedia
+                        self._onContinuousRead(data);
                     } else {
-                        // Fallback si jsQR n'est pas disponible
-                        self._loadJsQRLibrary().then(function() {
-                            // Réessayer après chargement de la librairie
-                            if (window.jsQR && self.isScanning) {
-                                var code = jsQR(imageData.data, imageData.width, imageData.height);
-                                if (code) {
-                                    self._stopScanning();
-                                    self.processQRCode(code.data);
-                                }
-                            }
-                        });
+                        self._stopScanning();
+                        self.processQRCode(data);
                     }
-                }
-            }, 500);
+                }, function (error) {
+                    decoding = false;
+                    console.error("Erreur de décodage:", error);
+                });
+            };
+            this.animationFrame = window.requestAnimationFrame(tick);
         },
         
         _stopScanning: function () {
             this.isScanning = false;
             
-            if (this.scanInterval) {
-                clearInterval(this.scanInterval);
-                this.scanInterval = null;
+            if (this.animationFrame) {
+                window.cancelAnimationFrame(this.animationFrame);
+                this.animationFrame = null;
             }
             
             if (this.currentStream) {
@@ -162,15 +217,137 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             }
         },
         
-        _loadJsQRLibrary: function () {
+        // === DÉCODAGE ===
+        
+        _getDecoder: function () {
+            // BarcodeDetector natif si disponible pour les QR codes, sinon qr_decoder.js (worker)
+            if (!this.decoder) {
+                var native = 'BarcodeDetector' in window && window.BarcodeDetector.getSupportedFormats ?
+                    window.BarcodeDetector.getSupportedFormats().catch(function () { return []; }) :
+                    Promise.resolve([]);
+                this.decoder = native.then(function (formats) {
+                    return formats.indexOf('qr_code') !== -1 ?
+                        new window.BarcodeDetector({ formats: ['qr_code'] }) : null;
+                });
+            }
+            return this.decoder;
+        },
+        
+        _decodeVideoFrame: function (video) {
+            var self = this;
+            return this._getDecoder().then(function (detector) {
+                if (detector) {
+                    return detector.detect(video).then(function (codes) {
+                        return codes.length ? codes[0].rawValue : null;
+                    });
+                }
+                // Carré central réduit : quelques dizaines de Ko au lieu de l'image complète
+                var side = Math.min(video.videoWidth, video.videoHeight) * ROI_RATIO;
+                var size = Math.min(ROI_SIZE, Math.round(side));
+                var context = self._getScanContext(size, size);
+                context.drawImage(
+                    video,
+                    (video.videoWidth - side) / 2, (video.videoHeight - side) / 2, side, side,
+                    0, 0, size, size
+                );
+                return self._decodeImageData(context.getImageData(0, 0, size, size));
+            });
+        },
+        
+        _decodeImage: function (img) {
+            var self = this;
+            return this._getDecoder().then(function (detector) {
+                if (detector) {
+                    return detector.detect(img).then(function (codes) {
+                        return codes.length ? codes[0].rawValue : null;
+                    });
+                }
+                var scale = Math.min(1, UPLOAD_MAX_SIZE / Math.max(img.width, img.height));
+                var width = Math.round(img.width * scale);
+                var height = Math.round(img.height * scale);
+                var context = self._getScanContext(width, height);
+                context.drawImage(img, 0, 0, width, height);
+                return self._decodeImageData(context.getImageData(0, 0, width, height));
+            });
+        },
+        
+        _getScanContext: function (width, height) {
+            // Canvas réutilisé d'une analyse à l'autre
+            if (!this.scanCanvas) {
+                this.scanCanvas = document.createElement('canvas');
+                this.scanContext = this.scanCanvas.getContext('2d', { willReadFrequently: true });
+            }
+            if (this.scanCanvas.width !== width || this.scanCanvas.height !== height) {
+                this.scanCanvas.width = width;
+                this.scanCanvas.height = height;
+            }
+            return this.scanContext;
+        },
+        
+        _decodeImageData: function (imageData) {
+            var self = this;
+            var worker = this._getDecodeWorker();
+            
+            if (!worker) {
+                // Pas de Web Worker : décodage sur le thread principal
+                return this._loadDecoderLibrary().then(function () {
+                    var code = window.israQRDecode(imageData.data, imageData.width, imageData.height, {
+                        inversionAttempts: 'dontInvert'
+                    });
+                    return code ? code.data : null;
+                });
+            }
+            
+            return new Promise(function (resolve) {
+                var id = ++self.decodeRequestId;
+                self.decodeRequests[id] = resolve;
+                // Le tampon est transféré au worker (pas de copie)
+                worker.postMessage({
+                    id: id,
+                    buffer: imageData.data.buffer,
+                    width: imageData.width,
+                    height: imageData.height
+                }, [imageData.data.buffer]);
+            });
+        },
+        
+        _getDecodeWorker: function () {
+            var self = this;
+            if (!this.decodeWorker && window.Worker) {
+                try {
+                    this.decodeWorker = new Worker(DECODE_WORKER_URL);
+                } catch (e) {
+                    console.warn("Web Worker indisponible:", e);
+                    return null;
+                }
+                this.decodeWorker.onmessage = function (event) {
+                    var resolve = self.decodeRequests[event.data.id];
+                    delete self.decodeRequests[event.data.id];
+                    if (resolve) {
+                        resolve(event.data.data);
+                    }
+                };
+                this.decodeWorker.onerror = function (event) {
+                    console.error("Erreur du worker de décodage:", event.message);
+                    // Les analyses en attente se terminent sans résultat
+                    Object.keys(self.decodeRequests).forEach(function (id) {
+                        self.decodeRequests[id](null);
+                    });
+                    self.decodeRequests = {};
+                };
+            }
+            return this.decodeWorker;
+        },
+        
+        _loadDecoderLibrary: function () {
             return new Promise(function(resolve, reject) {
-                if (window.jsQR) {
+                if (window.israQRDecode) {
                     resolve();
                     return;
                 }
                 
                 var script = document.createElement('script');
-                script.src = 'https://cdn.jsdelivr.net/npm/jsqr@1.4.0/dist/jsQR.js';
+                script.src = DECODER_URL;
                 script.onload = resolve;
                 script.onerror = reject;
                 document.head.appendChild(script);
@@ -183,24 +360,14 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             this._showProcessing();
             
             try {
-                // Vérifier si c'est un QR code ISRA
-                var data;
-                if (qrData.startsWith('{')) {
-                    // JSON direct
-                    data = JSON.parse(qrData);
-                } else if (qrData.includes('verification_url') || qrData.includes('lot_id')) {
-                    // Données ISRA mais pas en JSON pur
-                    data = this._parseISRAData(qrData);
-                } else if (qrData.includes('/verify/')) {
-                    // URL de vérification
-                    var lotId = qrData.split('/verify/')[1];
-                    data = { lot_id: lotId };
-                } else {
-                    throw new Error("Format QR non reconnu");
-                }
+                var data = this._parseQRData(qrData);
                 
-                if (!data.lot_id) {
-                    throw new Error("ID de lot manquant dans le QR code");
+                // En ligne, toujours vérifier sur le serveur (signature HMAC)
+                var offlineRow = this._lookupOffline(data.lot_id);
+                if (offlineRow && !navigator.onLine) {
+                    this._hideProcessing();
+                    this._showOfflineResult(data, offlineRow);
+                    return;
                 }
                 
                 // Appeler l'API de vérification
@@ -216,6 +383,11 @@ odoo.define('isra_qr_integration.scanner', function (require) {
                 }).catch(function (error) {
                     self._hideProcessing();
                     console.error("Erreur API:", error);
+                    if (offlineRow) {
+                        // Réseau indisponible : index local, même ancien
+                        self._showOfflineResult(data, offlineRow);
+                        return;
+                    }
                     self.showError("Erreur de vérification: " + (error.message || "Erreur inconnue"));
                 });
                 
@@ -226,10 +398,41 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             }
         },
         
+        _parseQRData: function (qrData) {
+            // Vérifier si c'est un QR code ISRA
+            var data;
+            if (qrData.startsWith('{')) {
+                // JSON direct
+                data = JSON.parse(qrData);
+            } else if (COMPACT_RE.test(qrData)) {
+                // Format compact ISRA1|2/<lot>/<variété>/<niveau>/<AAAAMMJJ>[/<clé>/<signature>]
+                data = this._parseISRAData(qrData);
+            } else if (qrData.includes('verification_url') || qrData.includes('lot_id')) {
+                // Données ISRA mais pas en JSON pur
+                data = this._parseISRAData(qrData);
+            } else if (qrData.includes('/verify/')) {
+                // URL de vérification
+                var lotId = qrData.split('/verify/')[1];
+                data = { lot_id: lotId };
+            } else {
+                throw new Error("Format QR non reconnu");
+            }
+            
+            if (!data.lot_id || typeof data.lot_id !== 'string') {
+                throw new Error("ID de lot manquant dans le QR code");
+            }
+            return data;
+        },
+        
         _parseISRAData: function (qrData) {
             // Méthode pour parser des données ISRA dans différents formats
             var data = {};
             
+            // Format compact versionné
+            if (COMPACT_RE.test(qrData)) {
+                return this._parseCompactData(qrData);
+            }
+            
             // Essayer de parser comme JSON d'abord
             try {
                 return JSON.parse(qrData);
@@ -257,7 +460,355 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             return data;
         },
         
-        showLotInfo: function (lot, authentic) {
+        _parseCompactData: function (qrData) {
+            // ISRA1/<lot>/<code variété>/<niveau>/<AAAAMMJJ>
+            // ISRA2/<lot>/<code variété>/<niveau>/<AAAAMMJJ>/<clé>/<signature>
+            // L'ID du lot peut contenir "/" : on découpe les derniers champs par la fin
+            var signed = COMPACT_RE.exec(qrData)[1] === '2';
+            var parts = qrData.replace(COMPACT_RE, '').split('/');
+            if (parts.length < (signed ? 6 : 4) || !parts[0]) {
+                throw new Error("QR code ISRA compact mal formé");
+            }
+            var signature = signed ? parts.pop() : null;
+            var kid = signed ? parts.pop() : null;
+            var productionDate = parts.pop();
+            var level = parts.pop();
+            var varietyCode = parts.pop();
+            var match = /^(\d{4})(\d{2})(\d{2})$/.exec(productionDate);
+            return {
+                lot_id: parts.join('/'),
+                variety_code: varietyCode,
+                level: level,
+                production_date: match ? match[1] + '-' + match[2] + '-' + match[3] : productionDate,
+                format: 'compact',
+                kid: kid,
+                sig: signature
+            };
+        },
+        
+        // === INDEX HORS LIGNE ===
+        
+        _loadOfflineIndex: function () {
+            var index = null;
+            try {
+                index = JSON.parse(window.localStorage.getItem(OFFLINE_STORAGE_KEY)) || null;
+            } catch (e) {
+                return null;
+            }
+            // Index d'un ancien format ou signé par une clé qui n'est plus servie avec la page : ignoré
+            if (index && (index.format !== OFFLINE_INDEX_FORMAT || this.trustedKeys.indexOf(index.public_key) === -1)) {
+                return null;
+            }
+            return index;
+        },
+        
+        _saveOfflineIndex: function (index) {
+            this.offlineIndex = index;
+            try {
+                window.localStorage.setItem(OFFLINE_STORAGE_KEY, JSON.stringify(index));
+            } catch (e) {
+                // Quota dépassé : l'index reste disponible pour cette session
+                console.warn("Index hors ligne non enregistré:", e);
+            }
+        },
+        
+        _syncOfflineIndex: function () {
+            // La signature est vérifiée par WebCrypto (contexte sécurisé uniquement)
+            if (!navigator.onLine || !window.crypto || !window.crypto.subtle || !window.fetch ||
+                    !this.trustedKeys.length) {
+                return Promise.resolve();
+            }
+            var self = this;
+            var index = this.offlineIndex;
+            var since = index ? index.version : 0;
+            
+            return fetch('/isra/api/offline_bundle?since=' + since, { credentials: 'same-origin' })
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error("HTTP " + response.status);
+                    }
+                    return response.json();
+                })
+                .then(function (bundle) {
+                    // Seules les clés servies avec la page font foi, jamais celle de la réponse
+                    if (self.trustedKeys.indexOf(bundle.public_key) === -1) {
+                        throw new Error("Clé de signature de l'index hors ligne inconnue");
+                    }
+                    if (index && bundle.public_key !== index.public_key) {
+                        // Clé de signature changée : on repart d'un index complet
+                        console.warn("Clé de l'index hors ligne modifiée, téléchargement complet");
+                        self.offlineIndex = null;
+                        return since ? self._syncOfflineIndex() : null;
+                    }
+                    return self._verifyBundle(bundle, bundle.public_key).then(function (valid) {
+                        if (!valid) {
+                            throw new Error("Signature de l'index hors ligne invalide");
+                        }
+                        self._applyBundle(JSON.parse(bundle.payload), bundle);
+                    });
+                })
+                .catch(function (error) {
+                    console.warn("Synchronisation de l'index hors ligne impossible:", error);
+                });
+        },
+        
+        _verifyBundle: function (bundle, publicKey) {
+            var decode = function (b64) {
+                return Uint8Array.from(atob(b64), function (c) { return c.charCodeAt(0); });
+            };
+            var subtle = window.crypto.subtle;
+            return subtle.importKey('spki', decode(publicKey), { name: 'ECDSA', namedCurve: 'P-256' }, false, ['verify'])
+                .then(function (key) {
+                    return subtle.verify(
+                        { name: 'ECDSA', hash: 'SHA-256' }, key,
+                        decode(bundle.signature), new TextEncoder().encode(bundle.payload)
+                    );
+                });
+        },
+        
+        _applyBundle: function (payload, bundle) {
+            var lots = payload.lots;
+            if (!payload.full && this.offlineIndex) {
+                // Delta : suppressions puis ajouts / mises à jour
+                var byName = {};
+                this.offlineIndex.lots.forEach(function (row) { byName[row[0]] = row; });
+                payload.removed.forEach(function (name) { delete byName[name]; });
+                payload.lots.forEach(function (row) { byName[row[0]] = row; });
+                lots = Object.keys(byName).map(function (name) { return byName[name]; });
+            }
+            // Tri par nom pour la recherche dichotomique
+            lots.sort(function (a, b) { return a[0] < b[0] ? -1 : (a[0] > b[0] ? 1 : 0); });
+            this._saveOfflineIndex({
+                format: OFFLINE_INDEX_FORMAT,
+                version: payload.version,
+                key_id: bundle.key_id,
+                public_key: bundle.public_key,
+                synced_at: Date.now(),
+                lots: lots
+            });
+        },
+        
+        _lookupOffline: function (lotId) {
+            // Lot : [nom, statut, niveau, expiration AAAAMMJJ, contrôle qualité 1/0/null, variété]
+            var lots = this.offlineIndex ? this.offlineIndex.lots : [];
+            var low = 0;
+            var high = lots.length - 1;
+            while (low <= high) {
+                var mid = (low + high) >> 1;
+                if (lots[mid][0] === lotId) {
+                    return lots[mid];
+                }
+                if (lots[mid][0] < lotId) {
+                    low = mid + 1;
+                } else {
+                    high = mid - 1;
+                }
+            }
+            return null;
+        },
+        
+        _showOfflineResult: function (data, row) {
+            var result = this._offlineResult(data, row);
+            this.showLotInfo(result.lot, result.authentic, result.offline);
+        },
+        
+        _offlineResult: function (data, row) {
+            var daysToExpiry = 0;
+            var expiry = /^(\d{4})(\d{2})(\d{2})$/.exec(row[3]);
+            if (expiry) {
+                var expiryDate = new Date(+expiry[1], expiry[2] - 1, +expiry[3]);
+                var today = new Date();
+                today.setHours(0, 0, 0, 0);
+                daysToExpiry = Math.round((expiryDate - today) / (24 * 3600 * 1000));
+            }
+            // Affichage tiré de l'index signé uniquement, jamais du contenu du QR code
+            var lot = {
+                name: row[0],
+                variety: row[5] || '',
+                level: row[2],
+                status: row[1],
+                production_date: '',
+                multiplier: null,
+                quality_status: row[4] === null ? null : (row[4] ? 'pass' : 'fail'),
+                days_to_expiry: daysToExpiry,
+                is_expired: daysToExpiry < 0
+            };
+            // Hors ligne, la signature HMAC du QR code ne peut pas être vérifiée :
+            // un niveau incohérent trahit une contrefaçon, sinon le code reste non vérifié
+            var authentic = data.level && data.level !== row[2] ? false : null;
+            return { lot: lot, authentic: authentic, offline: new Date(this.offlineIndex.synced_at) };
+        },
+        
+        // === MODE CONTINU ===
+        
+        _onContinuousRead: function (qrData) {
+            var now = Date.now();
+            
+            // Même code encore devant la caméra : ignoré
+            var lastRead = this.recentReads.get(qrData);
+            this.recentReads.set(qrData, now);
+            if (lastRead && now - lastRead < DEDUPE_WINDOW_MS) {
+                return;
+            }
+            if (this.recentReads.size > RESULT_CACHE_SIZE) {
+                this.recentReads.forEach(function (time, code, reads) {
+                    if (now - time >= DEDUPE_WINDOW_MS) {
+                        reads.delete(code);
+                    }
+                });
+            }
+            this.scanCounts.set(qrData, (this.scanCounts.get(qrData) || 0) + 1);
+            
+            var data;
+            try {
+                data = this._parseQRData(qrData);
+            } catch (e) {
+                this._renderContinuousResult(qrData, qrData, { error: e.message });
+                return;
+            }
+            
+            // Résultat récent (LRU), puis index local, sinon file d'envoi groupé
+            var cached = this._getCachedResult(qrData);
+            if (cached) {
+                this._renderContinuousResult(qrData, data.lot_id, cached);
+                return;
+            }
+            var offlineRow = this._lookupOffline(data.lot_id);
+            if (offlineRow && !navigator.onLine) {
+                this._renderContinuousResult(qrData, data.lot_id, this._offlineResult(data, offlineRow));
+                return;
+            }
+            this._queueVerification(qrData, data);
+        },
+        
+        _getCachedResult: function (qrData) {
+            var entry = this.resultCache.get(qrData);
+            if (!entry) {
+                return null;
+            }
+            this.resultCache.delete(qrData);
+            if (Date.now() - entry.at > RESULT_CACHE_TTL_MS) {
+                return null;
+            }
+            // Réinsertion : le plus récemment utilisé est en fin de Map
+            this.resultCache.set(qrData, entry);
+            return entry.result;
+        },
+        
+        _setCachedResult: function (qrData, result) {
+            this.resultCache.delete(qrData);
+            this.resultCache.set(qrData, { result: result, at: Date.now() });
+            if (this.resultCache.size > RESULT_CACHE_SIZE) {
+                this.resultCache.delete(this.resultCache.keys().next().value);
+            }
+        },
+        
+        _queueVerification: function (qrData, data) {
+            if (this.pendingCodes.some(function (item) { return item.qrData === qrData; })) {
+                return;
+            }
+            this.pendingCodes.push({ qrData: qrData, data: data });
+            this._renderContinuousResult(qrData, data.lot_id, { pending: true });
+            
+            if (this.pendingCodes.length >= BATCH_MAX_SIZE) {
+                this._flushVerificationQueue();
+            } else if (!this.batchTimer) {
+                this.batchTimer = setTimeout(this._flushVerificationQueue.bind(this), BATCH_DELAY_MS);
+            }
+        },
+        
+        _flushVerificationQueue: function () {
+            var self = this;
+            clearTimeout(this.batchTimer);
+            this.batchTimer = null;
+            
+            var batch = this.pendingCodes.splice(0, BATCH_MAX_SIZE);
+            if (!batch.length) {
+                return;
+            }
+            if (this.pendingCodes.length) {
+                this.batchTimer = setTimeout(this._flushVerificationQueue.bind(this), BATCH_DELAY_MS);
+            }
+            
+            ajax.jsonRpc('/isra/api/verify_batch', 'call', {
+                qr_data_list: batch.map(function (item) { return item.data; })
+            }).then(function (response) {
+                if (response.rate_limited) {
+                    // Trop de requêtes : même lot renvoyé après le délai indiqué
+                    self.pendingCodes = batch.concat(self.pendingCodes);
+                    clearTimeout(self.batchTimer);
+                    self.batchTimer = setTimeout(self._flushVerificationQueue.bind(self), response.retry_after * 1000);
+                    return;
+                }
+                if (response.error) {
+                    batch.forEach(function (item) {
+                        self._renderContinuousResult(item.qrData, item.data.lot_id, { error: response.error });
+                    });
+                    return;
+                }
+                response.results.forEach(function (itemResult) {
+                    var item = batch[itemResult.index];
+                    if (itemResult.error) {
+                        self._renderContinuousResult(item.qrData, item.data.lot_id, { error: itemResult.error });
+                        return;
+                    }
+                    var result = { lot: itemResult.lot, authentic: itemResult.authentic };
+                    self._setCachedResult(item.qrData, result);
+                    self._renderContinuousResult(item.qrData, item.data.lot_id, result);
+                });
+            }).catch(function (error) {
+                console.error("Erreur API:", error);
+                batch.forEach(function (item) {
+                    var offlineRow = self._lookupOffline(item.data.lot_id);
+                    self._renderContinuousResult(item.qrData, item.data.lot_id, offlineRow ?
+                        self._offlineResult(item.data, offlineRow) :
+                        { error: "Erreur de vérification: " + (error.message || "Erreur inconnue") });
+                });
+            });
+        },
+        
+        _renderContinuousResult: function (qrData, lotName, result) {
+            var $list = this.$('#qr-continuous-results');
+            var $item = $list.children().filter(function () {
+                return $(this).data('qrData') === qrData;
+            });
+            var scans = this.scanCounts.get(qrData) || 1;
+            
+            if (!$item.length) {
+                $item = $('<li class="list-group-item d-flex justify-content-between align-items-center"/>')
+                    .data('qrData', qrData);
+            }
+            
+            var $label = $('<span/>').append($('<strong/>').text(lotName));
+            var badges;
+            if (result.pending) {
+                badges = '<span class="badge badge-light"><i class="fa fa-spinner fa-spin"></i></span>';
+            } else if (result.error) {
+                badges = '<span class="badge badge-danger"><i class="fa fa-times"></i></span>';
+                $label.append($('<small class="text-danger ml-2"/>').text(result.error));
+            } else {
+                badges = this._getStatusBadge(result.lot.status) + ' ' + this._getAuthenticBadge(result.authentic, true, !!result.offline) +
+                    (result.offline ? ' <span class="badge badge-secondary"><i class="fa fa-wifi"></i></span>' : '');
+            }
+            
+            $item.empty().append(
+                $label,
+                $('<span/>').html(badges + ' <span class="badge badge-pill badge-primary">' + scans + '</span>')
+            );
+            $list.prepend($item).show();
+        },
+        
+        _onToggleContinuousMode: function (ev) {
+            this.continuousMode = !this.continuousMode;
+            $(ev.currentTarget).toggleClass('active', this.continuousMode);
+            this.$('#qr-continuous-results').toggle(this.continuousMode);
+            if (this.continuousMode && !this.isScanning) {
+                this._hideError();
+                this.initScanner();
+            }
+        },
+        
+        showLotInfo: function (lot, authentic, offlineSince) {
             var resultDiv = document.getElementById('qr-result');
             var infoDiv = document.getElementById('lot-info');
             
@@ -266,14 +817,13 @@ odoo.define('isra_qr_integration.scanner', function (require) {
                 return;
             }
             
-            var authenticBadge = authentic ? 
-                '<span class="badge badge-success"><i class="fa fa-check"></i> Authentique</span>' :
-                '<span class="badge badge-danger"><i class="fa fa-warning"></i> Non Authentique</span>';
+            var escape = this._escape;
+            var authenticBadge = this._getAuthenticBadge(authentic, false, !!offlineSince);
             
             var statusBadge = this._getStatusBadge(lot.status);
             var qualityBadge = lot.quality_status ? this._getQualityBadge(lot.quality_status) : '';
             var expiryWarning = lot.days_to_expiry < 30 && lot.days_to_expiry > 0 ? 
-                '<div class="alert alert-warning mt-2"><i class="fa fa-clock-o"></i> Expire dans ' + lot.days_to_expiry + ' jours</div>' : '';
+                '<div class="alert alert-warning mt-2"><i class="fa fa-clock-o"></i> Expire dans ' + this._escape(lot.days_to_expiry) + ' jours</div>' : '';
             
             if (lot.is_expired) {
                 expiryWarning = '<div class="alert alert-danger mt-2"><i class="fa fa-exclamation-triangle"></i> Lot expiré</div>';
@@ -282,25 +832,27 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             infoDiv.innerHTML = `
                 <div class="row">
                     <div class="col-md-8">
-                        <h5><i class="fa fa-archive"></i> ${lot.name} ${authenticBadge}</h5>
+                        <h5><i class="fa fa-archive"></i> ${escape(lot.name)} ${authenticBadge}</h5>
                         <table class="table table-sm table-striped">
-                            <tr><td><strong><i class="fa fa-leaf"></i> Variété:</strong></td><td>${lot.variety}</td></tr>
-                            <tr><td><strong><i class="fa fa-layer-group"></i> Niveau:</strong></td><td><span class="badge badge-primary">${lot.level}</span></td></tr>
-                            <tr><td><strong><i class="fa fa-calendar"></i> Production:</strong></td><td>${lot.production_date}</td></tr>
+                            <tr><td><strong><i class="fa fa-leaf"></i> Variété:</strong></td><td>${escape(lot.variety)}</td></tr>
+                            <tr><td><strong><i class="fa fa-layer-group"></i> Niveau:</strong></td><td><span class="badge badge-primary">${escape(lot.level)}</span></td></tr>
+                            <tr><td><strong><i class="fa fa-calendar"></i> Production:</strong></td><td>${escape(lot.production_date)}</td></tr>
                             <tr><td><strong><i class="fa fa-info-circle"></i> Statut:</strong></td><td>${statusBadge}</td></tr>
-                            ${lot.multiplier ? `<tr><td><strong><i class="fa fa-user"></i> Multiplicateur:</strong></td><td>${lot.multiplier}</td></tr>` : ''}
+                            ${lot.multiplier ? `<tr><td><strong><i class="fa fa-user"></i> Multiplicateur:</strong></td><td>${escape(lot.multiplier)}</td></tr>` : ''}
                             ${qualityBadge ? `<tr><td><strong><i class="fa fa-flask"></i> Qualité:</strong></td><td>${qualityBadge}</td></tr>` : ''}
                         </table>
                         ${expiryWarning}
+                        ${offlineSince ? `<div class="text-muted small"><i class="fa fa-wifi"></i> Index hors ligne du ${escape(offlineSince.toLocaleString())}, signature du QR code non vérifiée</div>` : ''}
                     </div>
                     <div class="col-md-4 text-center">
                         <button class="btn btn-primary btn-restart-scanner mb-2">
                             <i class="fa fa-qrcode"></i> Scanner un Autre
                         </button>
                         <br>
-                        <button class="btn btn-success" onclick="window.open('/isra/verify/${lot.name}', '_blank')">
+                        <a class="btn btn-success" target="_blank" rel="noopener"
+                           href="/isra/verify/${escape(encodeURIComponent(lot.name))}">
                             <i class="fa fa-external-link"></i> Voir Détails
-                        </button>
+                        </a>
                     </div>
                 </div>
             `;
@@ -319,7 +871,25 @@ odoo.define('isra_qr_integration.scanner', function (require) {
                 'draft': '<span class="badge badge-light"><i class="fa fa-pencil"></i> Brouillon</span>',
                 'expired': '<span class="badge badge-dark"><i class="fa fa-clock-o"></i> Expiré</span>'
             };
-            return badges[status] || `<span class="badge badge-light">${status}</span>`;
+            return badges[status] || `<span class="badge badge-light">${this._escape(status)}</span>`;
+        },
+        
+        _getAuthenticBadge: function (authentic, compact, offline) {
+            // authentic : true (signature vérifiée), false (falsifié),
+            // null (non vérifié : hors ligne, ou QR code non signé)
+            if (authentic === null || authentic === undefined) {
+                return '<span class="badge badge-secondary"><i class="fa fa-question"></i>' +
+                    (compact ? '' : offline ? ' Non vérifié (hors ligne)' : ' Non signé (non vérifié)') + '</span>';
+            }
+            return authentic ?
+                '<span class="badge badge-success"><i class="fa fa-check"></i>' + (compact ? '' : ' Authentique') + '</span>' :
+                '<span class="badge badge-danger"><i class="fa fa-warning"></i>' + (compact ? '' : ' Non Authentique') + '</span>';
+        },
+        
+        _escape: function (value) {
+            return String(value === null || value === undefined ? '' : value).replace(/[&<>"']/g, function (c) {
+                return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+            });
         },
         
         _getQualityBadge: function (quality) {
@@ -341,7 +911,7 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             infoDiv.innerHTML = `
                 <div class="alert alert-danger">
                     <h5><i class="fa fa-exclamation-triangle"></i> Erreur</h5>
-                    <p>${message}</p>
+                    <p>${this._escape(message)}</p>
                     <button class="btn btn-secondary btn-restart-scanner">
                         <i class="fa fa-refresh"></i> Réessayer
                     </button>
@@ -422,25 +992,14 @@ odoo.define('isra_qr_integration.scanner', function (require) {
             reader.onload = function (e) {
                 var img = new Image();
                 img.onload = function () {
-                    var canvas = document.createElement('canvas');
-                    var context = canvas.getContext('2d');
-                    canvas.width = img.width;
-                    canvas.height = img.height;
-                    context.drawImage(img, 0, 0);
-                    
-                    var imageData = context.getImageData(0, 0, canvas.width, canvas.height);
-                    
-                    self._loadJsQRLibrary().then(function () {
-                        if (window.jsQR) {
-                            var code = jsQR(imageData.data, imageData.width, imageData.height);
-                            if (code) {
-                                self.processQRCode(code.data);
-                            } else {
-                                self.showError("Aucun QR code trouvé dans cette image");
-                            }
+                    self._decodeImage(img).then(function (data) {
+                        if (data) {
+                            self.processQRCode(data);
                         } else {
-                            self.showError("Impossible de charger la librairie de scan");
+                            self.showError("Aucun QR code trouvé dans cette image");
                         }
+                    }, function () {
+                        self.showError("Impossible de charger la librairie de scan");
                     });
                 };
                 img.src = e.target.result;
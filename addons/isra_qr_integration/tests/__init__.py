@@ -0,0 +1,6 @@
+from . import test_rate_limit
+from . import test_qr_batch
+from . import test_verify_api
+from . import test_log_buffer
+from . import test_public_snapshot
+from . import test_offline_bundle
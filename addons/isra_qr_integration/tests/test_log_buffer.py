@@ -0,0 +1,70 @@
+# tests/test_log_buffer.py
+import os
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..tools.log_buffer import QR_DATA_MAX_LENGTH, VerificationLogBuffer
+
+
+@tagged('post_install', '-at_install')
+class TestVerificationLogBuffer(TransactionCase):
+    """Tampon du journal des vérifications : INSERT groupés, borne, écriture à l'arrêt"""
+
+    def setUp(self):
+        super().setUp()
+        # Le tampon écrit sur son propre curseur : en mode test, il partage la transaction du test
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        self.buffer = VerificationLogBuffer(max_size=5, flush_size=2, flush_interval=3600)
+        # Pas de thread d'écriture : les écritures sont déclenchées par le test
+        self.buffer._ensure_thread = lambda: None
+        self.marker = f'test-log-buffer-{os.getpid()}'
+
+    def _entry(self, index, **values):
+        return dict({
+            'verification_date': fields.Datetime.now(),
+            'qr_data': f'{self.marker}-{index}',
+            'result': 'success',
+            'ip_address': '127.0.0.1',
+            'latency_ms': 1.5,
+        }, **values)
+
+    def _logged(self):
+        return self.env['isra.qr.verification.log'].search([('qr_data', 'like', self.marker)])
+
+    def test_flush_writes_all_pending_entries(self):
+        for index in range(3):
+            self.assertTrue(self.buffer.append(self.cr.dbname, self._entry(index)))
+        self.assertEqual(self.buffer.stats()['pending'], 3)
+        self.assertFalse(self._logged())
+
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(len(self._logged()), 3)
+        stats = self.buffer.stats()
+        self.assertEqual((stats['pending'], stats['written'], stats['failed']), (0, 3, 0))
+
+    def test_full_buffer_drops_new_entries(self):
+        for index in range(5):
+            self.buffer.append(self.cr.dbname, self._entry(index))
+        self.assertFalse(self.buffer.append(self.cr.dbname, self._entry(5)))
+        self.assertEqual(self.buffer.stats()['dropped'], 1)
+        self.buffer.flush()
+        self.assertEqual(len(self._logged()), 5)
+
+    def test_long_qr_data_is_truncated(self):
+        self.buffer.append(self.cr.dbname, self._entry(0, qr_data=self.marker + 'x' * (2 * QR_DATA_MAX_LENGTH)))
+        self.buffer.flush()
+        self.assertEqual(len(self._logged().qr_data), QR_DATA_MAX_LENGTH)
+
+    def test_flush_at_exit(self):
+        self.buffer.append(self.cr.dbname, self._entry(0))
+        # Copie héritée d'un autre processus : rien n'est écrit
+        pid, self.buffer._pid = self.buffer._pid, -1
+        self.buffer._flush_at_exit()
+        self.assertFalse(self._logged())
+        # Processus propriétaire : les entrées restantes sont écrites
+        self.buffer._pid = pid
+        self.buffer._flush_at_exit()
+        self.assertEqual(len(self._logged()), 1)
+        self.assertEqual(self.buffer.stats()['pending'], 0)
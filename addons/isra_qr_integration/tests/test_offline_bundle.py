@@ -0,0 +1,86 @@
+# tests/test_offline_bundle.py
+import base64
+import json
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.qr_offline import OFFLINE_VERSION_LOCK
+
+
+@tagged('post_install', '-at_install')
+class TestOfflineBundle(TransactionCase):
+    """Index hors ligne : versions croissantes, deltas, suppressions et signature"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.variety = cls.env['isra.seed.variety'].create({
+            'name': 'Variété Test Hors Ligne',
+            'code': 'TSTOFF',
+            'crop_type': 'sorghum',
+            'maturity_days': 110,
+        })
+        cls.lot_a, cls.lot_b = cls.env['isra.seed.lot'].create([{
+            'variety_id': cls.variety.id,
+            'level': level,
+            'quantity': 10,
+        } for level in ('G1', 'G2')])
+        cls.Bundle = cls.env['isra.qr.offline.bundle']
+
+    def _names(self, bundle):
+        return {row[0] for row in bundle['lots']}
+
+    def test_full_bundle(self):
+        bundle = self.Bundle._get_bundle()
+        self.assertTrue(bundle['full'])
+        self.assertLessEqual({self.lot_a.name, self.lot_b.name}, self._names(bundle))
+        self.assertEqual(bundle['removed'], [])
+        self.assertTrue(self.lot_a.offline_version)
+        self.assertGreaterEqual(bundle['version'], max(self.lot_a.offline_version, self.lot_b.offline_version))
+
+    def test_delta_contains_only_changes(self):
+        version = self.Bundle._get_bundle()['version']
+        self.assertFalse(self._names(self.Bundle._get_bundle(version)) & {self.lot_a.name, self.lot_b.name})
+
+        self.lot_a.write({'status': 'certified'})
+        delta = self.Bundle._get_bundle(version)
+        self.assertFalse(delta['full'])
+        self.assertIn(self.lot_a.name, self._names(delta))
+        self.assertNotIn(self.lot_b.name, self._names(delta))
+        self.assertGreater(self.lot_a.offline_version, version)
+        self.assertGreater(delta['version'], version)
+
+    def test_deleted_lot_is_removed(self):
+        version = self.Bundle._get_bundle()['version']
+        name = self.lot_b.name
+        self.lot_b.unlink()
+        delta = self.Bundle._get_bundle(version)
+        self.assertIn(name, delta['removed'])
+        self.assertGreater(delta['version'], version)
+
+    def test_unassigned_change_arrives_in_a_later_delta(self):
+        version = self.Bundle._get_bundle()['version']
+        self.lot_a.write({'status': 'in_stock'})
+        # Un autre téléchargement tient le verrou : la modification attend le suivant
+        with self.registry.cursor() as other_cr:
+            other_cr.execute("SELECT pg_advisory_xact_lock(%s)", [OFFLINE_VERSION_LOCK])
+            delta = self.Bundle._get_bundle(version)
+            self.assertNotIn(self.lot_a.name, self._names(delta))
+            self.assertEqual(self.lot_a.offline_version, 0)
+        later = self.Bundle._get_bundle(delta['version'])
+        self.assertIn(self.lot_a.name, self._names(later))
+        self.assertGreater(self.lot_a.offline_version, delta['version'])
+
+    def test_signed_bundle(self):
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+        signed = self.Bundle._get_signed_bundle()
+        self.assertIn(signed['public_key'], self.Bundle._get_trusted_public_keys())
+        public_key = serialization.load_der_public_key(base64.b64decode(signed['public_key']))
+        raw = base64.b64decode(signed['signature'])
+        signature = encode_dss_signature(int.from_bytes(raw[:32], 'big'), int.from_bytes(raw[32:], 'big'))
+        # Lève InvalidSignature si la signature ne correspond pas à la chaîne reçue
+        public_key.verify(signature, signed['payload'].encode('utf-8'), ec.ECDSA(hashes.SHA256()))
+        self.assertIn(self.lot_a.name, self._names(json.loads(signed['payload'])))
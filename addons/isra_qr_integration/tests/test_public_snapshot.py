@@ -0,0 +1,55 @@
+# tests/test_public_snapshot.py
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPublicSnapshot(TransactionCase):
+    """Données publiques précalculées des lots et remise à 0 de leur version hors ligne"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        variety = cls.env['isra.seed.variety'].create({
+            'name': 'Variété Test Snapshot',
+            'code': 'TSTSNAP',
+            'crop_type': 'peanut',
+            'maturity_days': 90,
+        })
+        cls.lot = cls.env['isra.seed.lot'].create({
+            'variety_id': variety.id,
+            'level': 'G3',
+            'quantity': 75,
+        })
+        cls.Bundle = cls.env['isra.qr.offline.bundle']
+
+    def _versioned(self):
+        self.lot.flush_recordset()
+        self.Bundle._assign_versions()
+        self.assertTrue(self.lot.offline_version)
+        return self.lot.offline_version
+
+    def test_snapshot_content(self):
+        snapshot = self.lot.public_snapshot
+        self.assertEqual(snapshot['name'], self.lot.name)
+        self.assertEqual(snapshot['variety_code'], 'TSTSNAP')
+        self.assertEqual(snapshot['level'], 'G3')
+        self.assertEqual(snapshot['status'], self.lot.status)
+        # Dépend de la signature : calculée au rendu, jamais stockée
+        self.assertNotIn('qr_code_url', snapshot)
+
+    def test_public_change_resets_version(self):
+        self._versioned()
+        self.lot.write({'status': 'certified'})
+        self.assertEqual(self.lot.public_snapshot['status'], 'certified')
+        self.assertEqual(self.lot.offline_version, 0)
+
+    def test_qr_rendering_keeps_version(self):
+        version = self._versioned()
+        self.lot._generate_qr_code()
+        self.lot.flush_recordset()
+        self.assertEqual(self.lot.offline_version, version)
+
+    def test_qr_image_url(self):
+        url = self.lot._get_qr_image_url()
+        self.assertTrue(url.startswith(f'/isra/qr/{self.lot.name}.png?v='))
+        self.assertEqual(url, self.lot._get_qr_image_url())
@@ -0,0 +1,38 @@
+# tests/test_qr_batch.py
+import base64
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.qr_code_mixin import _render_qr_job
+
+
+@tagged('post_install', '-at_install')
+class TestQRBatchRendering(TransactionCase):
+    """Rendu groupé des QR codes de isra.qr.mixin, dans le processus courant"""
+
+    def setUp(self):
+        super().setUp()
+        self.Mixin = self.env['isra.qr.mixin']
+        self.config = self.Mixin._get_qr_config()
+
+    def test_render_job(self):
+        image, error = _render_qr_job(('{"id":1}', self.config))
+        self.assertIsNone(error)
+        self.assertTrue(base64.b64decode(image).startswith(b'\x89PNG\r\n\x1a\n'))
+
+    def test_render_job_error_is_returned(self):
+        # Une erreur de rendu n'interrompt pas le paquet : elle est rendue au lieu d'être levée
+        image, error = _render_qr_job(('{"id":1}', None))
+        self.assertFalse(image)
+        self.assertTrue(error)
+
+    def test_render_jobs_keep_order(self):
+        payloads = [f'{{"id":{i}}}' for i in range(5)]
+        results = self.Mixin._render_qr_jobs([(payload, self.config) for payload in payloads])
+        self.assertEqual(len(results), len(payloads))
+        for payload, (image, error) in zip(payloads, results):
+            self.assertIsNone(error)
+            self.assertEqual(base64.b64decode(image), base64.b64decode(_render_qr_job((payload, self.config))[0]))
+
+    def test_empty_batch(self):
+        self.assertTrue(self.Mixin.browse().generate_qr_code_batch())
@@ -0,0 +1,46 @@
+# tests/test_rate_limit.py
+from odoo.tests import TransactionCase, tagged
+
+from ..tools.rate_limit import SCOPE_IP, SCOPE_PREFIX, TokenBucketLimiter, lot_prefix, parse_limit
+
+
+@tagged('post_install', '-at_install')
+class TestTokenBucket(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.limiter = TokenBucketLimiter()
+
+    def test_bucket_drains_then_limits(self):
+        # 3 jetons, recharge négligeable pendant le test
+        for _i in range(3):
+            self.assertEqual(self.limiter.consume(self.env.cr, 'ip:test-drain', 3, 0.001), (True, 0))
+        allowed, retry_after = self.limiter.consume(self.env.cr, 'ip:test-drain', 3, 0.001)
+        self.assertFalse(allowed)
+        self.assertGreaterEqual(retry_after, 1)
+
+    def test_buckets_are_independent(self):
+        self.limiter.consume(self.env.cr, 'ip:test-a', 1, 0.001)
+        self.assertFalse(self.limiter.consume(self.env.cr, 'ip:test-a', 1, 0.001)[0])
+        self.assertTrue(self.limiter.consume(self.env.cr, 'ip:test-b', 1, 0.001)[0])
+
+    def test_bucket_refills(self):
+        self.limiter.consume(self.env.cr, 'ip:test-refill', 1, 0.001)
+        self.env.cr.execute(
+            "UPDATE isra_qr_rate_bucket SET updated_at = updated_at - interval '1 hour' WHERE key = %s",
+            ['ip:test-refill']
+        )
+        self.assertTrue(self.limiter.consume(self.env.cr, 'ip:test-refill', 1, 0.001)[0])
+
+    def test_check_reports_limited_scope(self):
+        limits = [(SCOPE_IP, 'test-check', 10, 1), (SCOPE_PREFIX, 'SL-G1-2024', 1, 0.001)]
+        self.assertIsNone(self.limiter.check(self.env.cr, limits))
+        scope, retry_after = self.limiter.check(self.env.cr, limits)
+        self.assertEqual(scope, SCOPE_PREFIX)
+        self.assertGreaterEqual(retry_after, 1)
+        self.assertEqual(self.limiter.stats()['limited'][SCOPE_PREFIX], 1)
+
+    def test_helpers(self):
+        self.assertEqual(lot_prefix('SL-G1-2024-SL-001'), 'SL-G1-2024')
+        self.assertEqual(parse_limit('20:2', '30:0.5'), (20.0, 2.0))
+        self.assertEqual(parse_limit('n/a', '30:0.5'), (30.0, 0.5))
@@ -0,0 +1,71 @@
+# tests/test_verify_api.py
+from odoo.tests import HttpCase, tagged
+
+from odoo.addons.isra_seeds_traceability.tools import qr_payload
+
+
+@tagged('post_install', '-at_install')
+class TestVerifyApi(HttpCase):
+    """/isra/api/verify : seul un QR code signé est déclaré authentique"""
+
+    def setUp(self):
+        super().setUp()
+        variety = self.env['isra.seed.variety'].create({
+            'name': 'Variété Test API',
+            'code': 'TSTAPI',
+            'crop_type': 'millet',
+            'maturity_days': 100,
+        })
+        self.lot = self.env['isra.seed.lot'].create({
+            'variety_id': variety.id,
+            'level': 'G1',
+            'quantity': 200,
+        })
+        self.unsigned_data = {
+            'lot_id': self.lot.name,
+            'variety_code': variety.code,
+            'level': self.lot.level,
+            'production_date': str(self.lot.production_date),
+        }
+        self.env.flush_all()
+        self.authenticate('admin', 'admin')
+
+    def _verify(self, qr_data):
+        return self.make_jsonrpc_request('/isra/api/verify', {'qr_data': qr_data})
+
+    def test_signed_code_is_authentic(self):
+        result = self._verify(self.lot._get_qr_payload())
+        self.assertTrue(result['success'])
+        self.assertIs(result['authentic'], True)
+        self.assertIs(result['signed'], True)
+
+    def test_unsigned_code_is_not_verified(self):
+        # Champs publics exacts mais pas de signature : recopiable par n'importe qui
+        result = self._verify(qr_payload.encode_compact(self.unsigned_data))
+        self.assertTrue(result['success'])
+        self.assertIsNone(result['authentic'])
+        self.assertIs(result['signed'], False)
+
+    def test_unsigned_legacy_code_is_not_verified(self):
+        data = dict(self.unsigned_data, variety_name=self.lot.variety_id.name)
+        result = self._verify(qr_payload.encode_legacy(data))
+        self.assertIsNone(result['authentic'])
+
+    def test_unsigned_mismatch_is_not_authentic(self):
+        result = self._verify(qr_payload.encode_compact(dict(self.unsigned_data, level='R2')))
+        self.assertIs(result['authentic'], False)
+
+    def test_tampered_signed_code_is_rejected(self):
+        text = self.lot._get_qr_payload().replace('/G1/', '/GO/', 1)
+        result = self._verify(text)
+        self.assertFalse(result['success'])
+        self.assertIs(result['authentic'], False)
+
+    def test_batch_counts_only_authentic_codes(self):
+        result = self.make_jsonrpc_request('/isra/api/verify_batch', {'qr_data_list': [
+            self.lot._get_qr_payload(),
+            qr_payload.encode_compact(self.unsigned_data),
+        ]})
+        self.assertEqual(result['count'], 2)
+        self.assertEqual(result['verified'], 1)
+        self.assertEqual([item['authentic'] for item in result['results']], [True, None])
@@ -0,0 +1,4 @@
+# tools/__init__.py
+from . import result_cache
+from . import log_buffer
+from . import rate_limit
@@ -0,0 +1,163 @@
+# tools/log_buffer.py
+"""
+Écriture différée et groupée du journal des vérifications QR
+
+Les requêtes ne font qu'ajouter une entrée en mémoire. Un thread du worker
+vide le tampon par INSERT multi-lignes, dans son propre curseur, dès que
+`flush_size` entrées sont en attente ou toutes les `flush_interval`
+secondes. Le tampon est borné : en cas de surcharge les nouvelles entrées
+sont abandonnées (et comptées) plutôt que de bloquer les requêtes.
+Les entrées restantes sont écrites à la sortie du processus (worker recyclé
+ou arrêté) ; seul un arrêt brutal (SIGKILL) les perd.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+import odoo
+
+_logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = (
+    'verification_date', 'qr_data', 'result', 'model_name', 'record_id',
+    'user_id', 'ip_address', 'region', 'user_agent', 'error_message', 'latency_ms',
+)
+
+QR_DATA_MAX_LENGTH = 2000
+USER_AGENT_MAX_LENGTH = 500
+
+
+class VerificationLogBuffer:
+
+    def __init__(self, max_size=10000, flush_size=200, flush_interval=5.0):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._reset()
+        # Hérité par les workers forkés : chacun n'écrit que ses propres entrées
+        atexit.register(self._flush_at_exit)
+
+    def _reset(self):
+        # Après un fork (workers Odoo), le thread et le verrou du parent ne sont pas hérités
+        self._pid = os.getpid()
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # l'écriture à l'arrêt attend celle du thread en cours
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def append(self, dbname, entry):
+        """Ajoute une entrée ; retourne False si elle est abandonnée (tampon plein)"""
+        if self._pid != os.getpid():
+            self._reset()
+        self._ensure_thread()
+
+        entry = dict(entry)
+        entry['qr_data'] = str(entry.get('qr_data') or '')[:QR_DATA_MAX_LENGTH]
+        if entry.get('user_agent'):
+            entry['user_agent'] = entry['user_agent'][:USER_AGENT_MAX_LENGTH]
+
+        with self._lock:
+            if len(self._queue) >= self.max_size:
+                self.dropped += 1
+                return False
+            self._queue.append((dbname, entry))
+            pending = len(self._queue)
+
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def _ensure_thread(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='isra.qr.verification.log.flusher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                _logger.exception("Échec de l'écriture du journal des vérifications QR")
+
+    def _flush_at_exit(self):
+        if self._pid != os.getpid():
+            return  # copie du tampon du processus parent, écrite par celui-ci
+        try:
+            count = self.flush()
+        except Exception:
+            _logger.exception("Échec de l'écriture du journal des vérifications QR à l'arrêt")
+            return
+        if count:
+            _logger.info("Journal des vérifications QR : %s entrée(s) écrite(s) à l'arrêt", count)
+
+    def _take(self):
+        with self._lock:
+            entries = list(self._queue)
+            self._queue.clear()
+        return entries
+
+    def flush(self):
+        """Écrit toutes les entrées en attente (un INSERT par base et par paquet)"""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        entries = self._take()
+        by_db = {}
+        for dbname, entry in entries:
+            by_db.setdefault(dbname, []).append(entry)
+
+        for dbname, db_entries in by_db.items():
+            try:
+                with odoo.registry(dbname).cursor() as cr:
+                    for start in range(0, len(db_entries), self.flush_size):
+                        self._insert(cr, db_entries[start:start + self.flush_size])
+                self.written += len(db_entries)
+            except Exception:
+                self.failed += len(db_entries)
+                _logger.exception("Journal des vérifications QR : %s entrée(s) perdue(s) (base %s)",
+                                  len(db_entries), dbname)
+        return len(entries)
+
+    def _insert(self, cr, entries):
+        columns = LOG_COLUMNS + ('create_uid', 'create_date', 'write_uid', 'write_date')
+        rows = [
+            tuple(entry.get(column) for column in LOG_COLUMNS)
+            + (entry.get('user_id'), entry['verification_date'], entry.get('user_id'), entry['verification_date'])
+            for entry in entries
+        ]
+        # Chaque tuple est adapté par psycopg2 en "(v1, v2, ...)"
+        cr.execute(
+            f"INSERT INTO isra_qr_verification_log ({', '.join(columns)}) VALUES "
+            + ', '.join(['%s'] * len(rows)),
+            rows
+        )
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._queue)
+        return {
+            'pending': pending,
+            'max_size': self.max_size,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+verification_log_buffer = VerificationLogBuffer()
+
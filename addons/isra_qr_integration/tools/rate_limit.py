@@ -0,0 +1,129 @@
+# tools/rate_limit.py
+"""
+Limitation de débit des routes de vérification (seau à jetons)
+
+Chaque clé (IP du client, préfixe de lot) a un seau de `capacity` jetons
+rechargé de `rate` jetons par seconde. L'état est partagé entre les workers
+dans la table UNLOGGED isra_qr_rate_bucket : un seul UPSERT atomique.
+
+L'UPSERT passe par le curseur de la requête HTTP (dans un savepoint), sauf
+pour la page publique : son seau par préfixe de lot est commun à tous les
+visiteurs, et son verrou de ligne, gardé jusqu'au commit, sérialiserait
+leurs rendus de page. Elle seule utilise un curseur dédié, validé aussitôt.
+En cas d'erreur de la base, la requête est laissée passer.
+"""
+import logging
+import math
+import threading
+
+import odoo
+
+_logger = logging.getLogger(__name__)
+
+SCOPE_IP = 'ip'
+SCOPE_PREFIX = 'prefix'
+
+# Paramètres système "capacité:jetons par seconde"
+RATE_LIMIT_PARAMS = {
+    SCOPE_IP: ('isra_qr.rate_limit_ip', '30:0.5'),
+    SCOPE_PREFIX: ('isra_qr.rate_limit_prefix', '300:5'),
+}
+
+# Segments du nom de lot formant le préfixe (SL-G1-2024-SL-001 -> SL-G1-2024)
+LOT_PREFIX_SEGMENTS = 3
+
+# Jetons disponibles après recharge depuis la dernière mise à jour (plafonnés à la capacité)
+_REFILL = ("LEAST(%(capacity)s, b.tokens + %(rate)s * "
+           "EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at))")
+
+_CONSUME_QUERY = f"""
+    INSERT INTO isra_qr_rate_bucket AS b (key, tokens, updated_at, limited)
+    VALUES (%(key)s, GREATEST(%(capacity)s - %(cost)s, 0), clock_timestamp(), %(capacity)s < %(cost)s)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = CASE WHEN {_REFILL} >= %(cost)s THEN {_REFILL} - %(cost)s ELSE {_REFILL} END,
+        updated_at = clock_timestamp(),
+        limited = {_REFILL} < %(cost)s
+    RETURNING b.tokens, b.limited
+"""
+
+
+def lot_prefix(lot_name):
+    """Préfixe d'un nom de lot (type, niveau, année)"""
+    return '-'.join(str(lot_name).split('-')[:LOT_PREFIX_SEGMENTS])
+
+
+def parse_limit(value, default):
+    """'capacité:débit' -> (capacité, débit) ; valeur par défaut si invalide"""
+    try:
+        capacity, rate = (float(part) for part in str(value).split(':'))
+    except (TypeError, ValueError):
+        capacity = rate = 0
+    if capacity > 0 and rate > 0:
+        return capacity, rate
+    return tuple(float(part) for part in default.split(':'))
+
+
+class TokenBucketLimiter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = {SCOPE_IP: 0, SCOPE_PREFIX: 0}
+        self.errors = 0
+
+    def consume(self, cr, key, capacity, rate, cost=1, dedicated_cursor=False):
+        """
+        Prélève `cost` jetons du seau `key`
+
+        Avec dedicated_cursor, l'UPSERT est validé sur son propre curseur au
+        lieu du curseur `cr` de la requête. Retourne (autorisé, délai en
+        secondes avant d'avoir assez de jetons).
+        """
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'cost': cost}
+        try:
+            if dedicated_cursor:
+                with odoo.registry(cr.dbname).cursor() as bucket_cr:
+                    bucket_cr.execute(_CONSUME_QUERY, params)
+                    tokens, limited = bucket_cr.fetchone()
+            else:
+                with cr.savepoint(flush=False):
+                    cr.execute(_CONSUME_QUERY, params)
+                    tokens, limited = cr.fetchone()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            _logger.warning("Limitation de débit indisponible pour %s", key, exc_info=True)
+            return True, 0
+
+        if not limited:
+            return True, 0
+        return False, max(1, math.ceil((cost - tokens) / rate))
+
+    def check(self, cr, limits, dedicated_cursor=False):
+        """
+        Vérifie une liste de (portée, clé, capacité, débit) dans l'ordre
+
+        Retourne None si la requête passe, sinon (portée, Retry-After).
+        """
+        for scope, key, capacity, rate in limits:
+            allowed, retry_after = self.consume(
+                cr, f'{scope}:{key}', capacity, rate, dedicated_cursor=dedicated_cursor
+            )
+            if not allowed:
+                with self._lock:
+                    self.limited[scope] += 1
+                return scope, retry_after
+        with self._lock:
+            self.allowed += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                'limited': dict(self.limited),
+                'errors': self.errors,
+            }
+
+
+verify_rate_limiter = TokenBucketLimiter()
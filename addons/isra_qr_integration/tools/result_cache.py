@@ -0,0 +1,6 @@
+# tools/result_cache.py
+from odoo.addons.isra_seeds_traceability.tools.result_cache import TTLCache
+
+# Fiches des lots des pages /isra/verify/<lot>, sans donnée de session
+# clé : (nom du lot, langue)
+verify_page_cache = TTLCache(size=1024, ttl=300)
@@ -1,3 +1,6 @@
 # isra_seeds/__init__.py
 
+from . import cli
+from . import controllers
 from . import models
+from . import tools
@@ -36,9 +36,12 @@
         'views/multiplier_views.xml',
         'views/quality_control_views.xml',
         'views/menu_views.xml',
+        'views/dashboard_snapshot_views.xml',
         'security/security.xml',
         'security/ir.model.access.csv',
         'data/sequences.xml',  # ← Ajouter cette ligne
+        'data/ir_cron.xml',
+        'data/qr_keys.xml',
         'data/variety_data.xml',
     ],
     'demo': [
@@ -0,0 +1,2 @@
+# cli/__init__.py
+from . import genealogy_export
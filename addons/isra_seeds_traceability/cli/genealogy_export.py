@@ -0,0 +1,52 @@
+# cli/genealogy_export.py
+"""
+Commande odoo-bin d'export de la généalogie des lots
+
+    odoo-bin --addons-path=/opt/odoo/addons,/opt/isra/addons isra-genealogy-export \
+        -c /etc/odoo/odoo.conf -d isra_db --format graphml --variety 3 -o /tmp/lignee.graphml
+
+Odoo 17 ne découvre les commandes des modules qu'à partir d'un
+--addons-path=... (forme avec "=") placé en premier, avant le nom de la
+commande : l'addons_path du fichier -c n'est pas lu pour cette découverte,
+seulement ensuite pour charger la base.
+"""
+import argparse
+
+import odoo
+from odoo import api, SUPERUSER_ID
+from odoo.cli import Command
+from odoo.tools import config
+
+from ..tools import genealogy_export
+
+
+class IsraGenealogyExport(Command):
+    """Exporte la généalogie des lots ISRA (JSON lines ou GraphML)"""
+    name = 'isra-genealogy-export'
+
+    def run(self, args):
+        # Options propres à la commande ; le reste (-c, -d, ...) va à la configuration Odoo
+        parser = argparse.ArgumentParser(
+            prog=f'odoo-bin {self.name}',
+            description=self.__doc__,
+            allow_abbrev=False,
+        )
+        parser.add_argument('-o', '--output', required=True, help="Fichier de sortie")
+        parser.add_argument('--format', default='jsonl', choices=sorted(genealogy_export.EXPORT_FORMATS),
+                            help="Format d'export (défaut : jsonl)")
+        parser.add_argument('--variety', type=int, help="ID de la variété")
+        parser.add_argument('--root-lot', type=int, help="ID du lot racine (descendants inclus)")
+        options, odoo_args = parser.parse_known_args(args)
+
+        config.parse_config(odoo_args)
+        dbname = config['db_name']
+        if not dbname:
+            parser.error("base de données requise (-d)")
+
+        registry = odoo.registry(dbname)
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            genealogy_export.export_genealogy(
+                env, options.output, options.format,
+                variety_id=options.variety, root_lot_id=options.root_lot,
+            )
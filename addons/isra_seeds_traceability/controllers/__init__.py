@@ -0,0 +1 @@
+from . import genealogy_export
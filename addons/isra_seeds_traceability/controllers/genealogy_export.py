@@ -0,0 +1,51 @@
+# controllers/genealogy_export.py
+from odoo import api, http
+from odoo.http import request, content_disposition
+from werkzeug.exceptions import BadRequest
+import odoo
+
+from ..tools import genealogy_export
+
+
+class GenealogyExportController(http.Controller):
+    """Téléchargement de la généalogie des lots (JSON lines ou GraphML)"""
+
+    @http.route('/isra/api/genealogy_export', type='http', auth='user', methods=['GET'], sitemap=False)
+    def genealogy_export(self, format='jsonl', variety_id=None, root_lot_id=None, **kwargs):
+        """
+        Export en flux des lots d'une variété et/ou des descendants d'un lot
+
+        La réponse est produite pendant l'envoi, sur un curseur dédié (celui de
+        la requête est fermé dès le retour du contrôleur).
+        """
+        if format not in genealogy_export.EXPORT_FORMATS:
+            raise BadRequest("Format d'export inconnu")
+        try:
+            variety_id = int(variety_id) if variety_id else None
+            root_lot_id = int(root_lot_id) if root_lot_id else None
+        except ValueError:
+            raise BadRequest("Identifiant invalide")
+        if not (variety_id or root_lot_id):
+            raise BadRequest("Préciser variety_id ou root_lot_id")
+
+        request.env['isra.seed.lot'].check_access_rights('read')
+
+        mimetype, extension = genealogy_export.EXPORT_FORMATS[format]
+        filename = f"genealogie_{'lot_%s' % root_lot_id if root_lot_id else 'variete_%s' % variety_id}.{extension}"
+        stream = self._stream_export(
+            request.db, request.env.uid, dict(request.env.context), format, variety_id, root_lot_id
+        )
+        return request.make_response(stream, headers=[
+            ('Content-Type', f'{mimetype}; charset=utf-8'),
+            ('Content-Disposition', content_disposition(filename)),
+            ('Cache-Control', 'private, no-cache'),
+        ])
+
+    def _stream_export(self, dbname, uid, context, fmt, variety_id, root_lot_id):
+        with odoo.registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            query = env['isra.seed.lot']._get_genealogy_export_query(
+                variety_id=variety_id, root_lot_id=root_lot_id
+            )
+            rows = genealogy_export.iter_rows(cr, query)
+            yield from genealogy_export.iter_encoded(genealogy_export.iter_export(rows, fmt))
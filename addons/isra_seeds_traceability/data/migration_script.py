@@ -215,11 +215,19 @@ def migrate_from_existing_database(env):
         """)
         parent_relations = cursor.fetchall()
         
+        # Une écriture par lot parent (parent_path des enfants mis à jour par l'ORM)
+        children_by_parent = {}
         for rel in parent_relations:
-            child_lot = env['isra.seed.lot'].browse(lot_mapping.get(rel[0]))
+            child_lot_id = lot_mapping.get(rel[0])
             parent_lot_id = lot_mapping.get(rel[1])
-            if child_lot and parent_lot_id:
-                child_lot.parent_lot_id = parent_lot_id
+            if child_lot_id and parent_lot_id:
+                children_by_parent.setdefault(parent_lot_id, []).append(child_lot_id)
+        
+        for parent_lot_id, child_lot_ids in children_by_parent.items():
+            env['isra.seed.lot'].browse(child_lot_ids).write({'parent_lot_id': parent_lot_id})
+        
+        # Filet de sécurité : index de lignée (parent_path, lot d'origine) cohérent
+        env['isra.seed.lot']._rebuild_lineage_index()
         
         # 6. Migration des contrôles qualité
         print("🔬 Migration des contrôles qualité...")
@@ -1,6 +1,8 @@
 # models/__init__.py
 from . import variety
+from . import qr_image
 from . import seed_lot
 from . import multiplier
 from . import quality_control
+from . import dashboard_snapshot
 from . import qr_code_mixin
@@ -2,6 +2,16 @@
 from odoo import models, fields, api
 from datetime import datetime, timedelta
 
+from ..tools.result_cache import TTLCache
+
+# Indicateurs calculés au plus une fois par minute et par worker
+# clé : (base, jour) ; indicateurs globaux de l'institut, calculés en sudo :
+# ils ne dépendent ni de l'utilisateur ni de ses règles d'accès
+_kpi_cache = TTLCache(size=16, ttl=60)
+
+# Horizon de l'alerte "lots expirant bientôt" (jours)
+EXPIRY_ALERT_DAYS = 30
+
 class ISRADashboard(models.Model):
     _name = 'isra.dashboard'
     _description = 'Tableau de Bord ISRA'
@@ -9,67 +19,93 @@ class ISRADashboard(models.Model):
     name = fields.Char('Nom', default='Tableau de Bord ISRA')
     
     # Statistiques générales
-    total_varieties = fields.Integer('Total Variétés', compute='_compute_stats')
-    total_lots = fields.Integer('Total Lots', compute='_compute_stats')
-    total_multipliers = fields.Integer('Total Multiplicateurs', compute='_compute_stats')
-    active_productions = fields.Integer('Productions Actives', compute='_compute_stats')
+    total_varieties = fields.Integer('Total Variétés', compute='_compute_kpis')
+    total_lots = fields.Integer('Total Lots', compute='_compute_kpis')
+    total_multipliers = fields.Integer('Total Multiplicateurs', compute='_compute_kpis')
+    active_productions = fields.Integer('Productions Actives', compute='_compute_kpis')
     
     # Statistiques qualité
-    quality_pass_rate = fields.Float('Taux de Réussite Qualité (%)', compute='_compute_quality_stats')
-    pending_certifications = fields.Integer('Certifications en Attente', compute='_compute_quality_stats')
+    quality_pass_rate = fields.Float('Taux de Réussite Qualité (%)', compute='_compute_kpis')
+    pending_certifications = fields.Integer('Certifications en Attente', compute='_compute_kpis')
     
     # Alertes
-    expiring_lots_count = fields.Integer('Lots Expirant Bientôt', compute='_compute_alerts')
-    rejected_lots_count = fields.Integer('Lots Rejetés ce Mois', compute='_compute_alerts')
+    expiring_lots_count = fields.Integer('Lots Expirant Bientôt', compute='_compute_kpis')
+    rejected_lots_count = fields.Integer('Lots Rejetés ce Mois', compute='_compute_kpis')
     
     @api.depends()
-    def _compute_stats(self):
+    def _compute_kpis(self):
+        kpis = self._get_kpis()
         for dashboard in self:
-            dashboard.total_varieties = self.env['isra.seed.variety'].search_count([('is_active', '=', True)])
-            dashboard.total_lots = self.env['isra.seed.lot'].search_count([('is_active', '=', True)])
-            dashboard.total_multipliers = self.env['isra.multiplier'].search_count([('is_active', '=', True)])
-            dashboard.active_productions = self.env['isra.production'].search_count([('status', '=', 'in_progress')])
+            dashboard.update(kpis)
     
-    @api.depends()
-    def _compute_quality_stats(self):
-        for dashboard in self:
-            # Contrôles qualité du mois
-            start_month = datetime.now().replace(day=1)
-            quality_controls = self.env['isra.quality.control'].search([
-                ('control_date', '>=', start_month)
-            ])
-            
-            if quality_controls:
-                passed = quality_controls.filtered(lambda qc: qc.result == 'pass')
-                dashboard.quality_pass_rate = (len(passed) / len(quality_controls)) * 100
-            else:
-                dashboard.quality_pass_rate = 0.0
-            
-            dashboard.pending_certifications = self.env['isra.seed.lot'].search_count([
-                ('status', '=', 'pending')
-            ])
+    @api.model
+    def _get_kpis(self):
+        """Indicateurs du tableau de bord (cache du worker, sinon une requête)"""
+        today = fields.Date.context_today(self)
+        key = (self.env.cr.dbname, today)
+        kpis = _kpi_cache.get(key)
+        if kpis is None:
+            # Partagés entre utilisateurs : jamais calculés avec les droits du premier appelant
+            kpis = self.sudo()._query_kpis(today)
+            _kpi_cache.set(key, kpis)
+        return kpis
     
-    @api.depends()
-    def _compute_alerts(self):
-        for dashboard in self:
-            # Lots expirant dans 30 jours
-            thirty_days_from_now = datetime.now().date() + timedelta(days=30)
-            dashboard.expiring_lots_count = self.env['isra.seed.lot'].search_count([
-                ('expiry_date', '<=', thirty_days_from_now),
-                ('expiry_date', '>=', datetime.now().date()),
-                ('status', 'in', ['certified', 'in_stock'])
-            ])
-            
-            # Lots rejetés ce mois
-            start_month = datetime.now().replace(day=1).date()
-            dashboard.rejected_lots_count = self.env['isra.seed.lot'].search_count([
-                ('status', '=', 'rejected'),
-                ('write_date', '>=', start_month)
-            ])
+    @api.model
+    def _query_kpis(self, today):
+        """
+        Tous les indicateurs en une seule requête
+        
+        Un seul parcours par table, chaque indicateur étant un agrégat
+        filtré (FILTER) ; le coût ne dépend que de la taille des tables.
+        """
+        for model in ('isra.seed.variety', 'isra.seed.lot', 'isra.multiplier',
+                      'isra.production', 'isra.quality.control'):
+            self.env[model].flush_model()
+        
+        start_month = today.replace(day=1)
+        self.env.cr.execute("""
+            SELECT varieties.total, lots.total, multipliers.total, productions.active,
+                   lots.pending, lots.expiring, lots.rejected,
+                   controls.total, controls.passed
+              FROM (SELECT count(*) FILTER (WHERE is_active) AS total
+                      FROM isra_seed_variety) AS varieties,
+                   (SELECT count(*) FILTER (WHERE is_active) AS total,
+                           count(*) FILTER (WHERE status = 'pending') AS pending,
+                           count(*) FILTER (WHERE expiry_date BETWEEN %(today)s AND %(expiry_limit)s
+                                              AND status IN ('certified', 'in_stock')) AS expiring,
+                           count(*) FILTER (WHERE status = 'rejected'
+                                              AND write_date >= %(start_month)s) AS rejected
+                      FROM isra_seed_lot) AS lots,
+                   (SELECT count(*) FILTER (WHERE is_active) AS total
+                      FROM isra_multiplier) AS multipliers,
+                   (SELECT count(*) FILTER (WHERE status = 'in_progress') AS active
+                      FROM isra_production) AS productions,
+                   (SELECT count(*) AS total,
+                           count(*) FILTER (WHERE result = 'pass') AS passed
+                      FROM isra_quality_control
+                     WHERE control_date >= %(start_month)s) AS controls
+        """, {
+            'today': today,
+            'expiry_limit': today + timedelta(days=EXPIRY_ALERT_DAYS),
+            'start_month': start_month,
+        })
+        (varieties, lots, multipliers, productions, pending, expiring, rejected,
+         controls, passed) = self.env.cr.fetchone()
+        
+        return {
+            'total_varieties': varieties,
+            'total_lots': lots,
+            'total_multipliers': multipliers,
+            'active_productions': productions,
+            'quality_pass_rate': (passed / controls) * 100 if controls else 0.0,
+            'pending_certifications': pending,
+            'expiring_lots_count': expiring,
+            'rejected_lots_count': rejected,
+        }
     
     def action_view_expiring_lots(self):
         """Action pour voir les lots qui expirent bientôt"""
-        thirty_days_from_now = datetime.now().date() + timedelta(days=30)
+        thirty_days_from_now = datetime.now().date() + timedelta(days=EXPIRY_ALERT_DAYS)
         return {
             'type': 'ir.actions.act_window',
             'name': 'Lots Expirant Bientôt',
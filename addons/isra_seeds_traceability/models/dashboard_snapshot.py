@@ -0,0 +1,228 @@
+# models/dashboard_snapshot.py
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Jours traités par requête lors du rattrapage
+SNAPSHOT_CHUNK_DAYS = 31
+
+# Horizon de l'alerte "lots expirant bientôt" (même valeur que le tableau de bord)
+EXPIRY_ALERT_DAYS = 30
+
+SNAPSHOT_MEASURES = (
+    'lot_count', 'quantity', 'produced_count', 'certified_count', 'pending_count',
+    'expiring_count', 'expired_count', 'qc_count', 'qc_passed',
+)
+
+
+class ISRADashboardSnapshot(models.Model):
+    """
+    Indicateurs du tableau de bord, une ligne par jour, variété et niveau
+
+    Écrit chaque nuit pour la veille ; les courbes de tendance et les vues
+    graphiques lisent cette table au lieu de reparcourir l'historique.
+    Le stock d'un jour compte les lots produits et non expirés à cette date.
+    L'historique des statuts n'étant pas conservé, les compteurs par statut
+    d'un rattrapage reflètent le statut actuel des lots (un lot distribué
+    depuis reste compté dans le stock des jours passés).
+    """
+    _name = 'isra.dashboard.snapshot'
+    _description = 'Instantané Quotidien des Indicateurs'
+    _order = 'date desc, variety_id, level'
+    _rec_name = 'date'
+
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+
+    variety_id = fields.Many2one(
+        'isra.seed.variety',
+        string='Variété',
+        index=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    crop_type = fields.Selection(
+        selection=lambda self: self.env['isra.seed.variety']._fields['crop_type'].selection,
+        string='Type de Culture',
+        index=True,
+        readonly=True
+    )
+
+    level = fields.Selection(
+        selection=lambda self: self.env['isra.seed.lot']._fields['level'].selection,
+        string='Niveau',
+        index=True,
+        readonly=True
+    )
+
+    # Stock à la date
+    lot_count = fields.Integer(string='Lots', readonly=True)
+    quantity = fields.Float(string='Quantité (kg)', digits=(12, 2), readonly=True)
+
+    # Mouvements du jour
+    produced_count = fields.Integer(string='Lots Produits', readonly=True)
+    expired_count = fields.Integer(string='Lots Arrivés à Expiration', readonly=True)
+    qc_count = fields.Integer(string='Contrôles Qualité', readonly=True)
+    qc_passed = fields.Integer(string='Contrôles Conformes', readonly=True)
+
+    # Statuts et alertes
+    certified_count = fields.Integer(string='Lots Certifiés', readonly=True)
+    pending_count = fields.Integer(string='Certifications en Attente', readonly=True)
+    expiring_count = fields.Integer(string='Lots Expirant Bientôt', readonly=True)
+
+    _sql_constraints = [
+        ('unique_snapshot', 'UNIQUE(date, variety_id, level)', 'Un seul instantané par jour, variété et niveau'),
+    ]
+
+    @api.model
+    def _cron_snapshot_kpis(self):
+        """Tâche planifiée : instantanés des jours complets non encore enregistrés"""
+        yesterday = fields.Date.context_today(self) - timedelta(days=1)
+        self.env.cr.execute("SELECT max(date) FROM isra_dashboard_snapshot")
+        last = self.env.cr.fetchone()[0]
+        date_from = last + timedelta(days=1) if last else yesterday
+        if date_from <= yesterday:
+            self._backfill(date_from, yesterday)
+
+    @api.model
+    def _backfill(self, date_from=None, date_to=None, chunk_days=SNAPSHOT_CHUNK_DAYS, auto_commit=True):
+        """
+        (Re)calcule les instantanés de date_from à date_to inclus
+
+        Une requête INSERT ... SELECT par paquet de `chunk_days` jours et un
+        commit par paquet. Par défaut : depuis la première production.
+        Depuis le shell Odoo : env['isra.dashboard.snapshot']._backfill()
+        """
+        for model in ('isra.seed.lot', 'isra.seed.variety', 'isra.quality.control'):
+            self.env[model].flush_model()
+
+        if not date_from:
+            self.env.cr.execute("SELECT min(production_date) FROM isra_seed_lot")
+            date_from = self.env.cr.fetchone()[0]
+            if not date_from:
+                return 0
+        date_to = date_to or fields.Date.context_today(self) - timedelta(days=1)
+
+        written = 0
+        chunk_start = date_from
+        while chunk_start <= date_to:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), date_to)
+            written += self._snapshot_range(chunk_start, chunk_end)
+            if auto_commit:
+                self.env.cr.commit()
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.invalidate_model()
+        _logger.info("Instantanés des indicateurs du %s au %s : %s ligne(s)", date_from, date_to, written)
+        return written
+
+    @api.model
+    def _snapshot_range(self, date_from, date_to):
+        self.env.cr.execute(
+            "DELETE FROM isra_dashboard_snapshot WHERE date BETWEEN %s AND %s",
+            [date_from, date_to]
+        )
+        self.env.cr.execute("""
+            INSERT INTO isra_dashboard_snapshot
+                (date, variety_id, crop_type, level, lot_count, quantity, produced_count,
+                 expired_count, qc_count, qc_passed, certified_count, pending_count, expiring_count,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT day.date, lot.variety_id, variety.crop_type, lot.level,
+                   count(*) FILTER (WHERE stock.in_stock),
+                   COALESCE(sum(lot.quantity) FILTER (WHERE stock.in_stock), 0),
+                   count(*) FILTER (WHERE lot.production_date = day.date),
+                   count(*) FILTER (WHERE lot.expiry_date = day.date),
+                   COALESCE(sum(qc.total), 0),
+                   COALESCE(sum(qc.passed), 0),
+                   count(*) FILTER (WHERE stock.in_stock AND lot.status = 'certified'),
+                   count(*) FILTER (WHERE stock.in_stock AND lot.status = 'pending'),
+                   count(*) FILTER (WHERE lot.expiry_date BETWEEN day.date AND day.date + %(alert_days)s
+                                      AND lot.status IN ('certified', 'in_stock')),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM generate_series(%(date_from)s::date, %(date_to)s::date, interval '1 day') AS day(date)
+              JOIN isra_seed_lot lot
+                ON lot.production_date <= day.date AND lot.is_active
+              JOIN isra_seed_variety variety ON variety.id = lot.variety_id
+              -- En stock à la date : produit et pas encore expiré
+              CROSS JOIN LATERAL (
+                    SELECT lot.expiry_date IS NULL OR lot.expiry_date >= day.date AS in_stock
+                   ) AS stock
+              LEFT JOIN (
+                    SELECT lot_id, control_date,
+                           count(*) AS total,
+                           count(*) FILTER (WHERE result = 'pass') AS passed
+                      FROM isra_quality_control
+                     WHERE control_date BETWEEN %(date_from)s AND %(date_to)s
+                     GROUP BY lot_id, control_date
+                   ) AS qc ON qc.lot_id = lot.id AND qc.control_date = day.date
+             -- Lots expirés : seulement les jours où ils ont un contrôle
+             WHERE stock.in_stock OR qc.lot_id IS NOT NULL
+             GROUP BY day.date, lot.variety_id, variety.crop_type, lot.level
+        """, {
+            'date_from': date_from,
+            'date_to': date_to,
+            'alert_days': EXPIRY_ALERT_DAYS,
+            'uid': self.env.uid,
+        })
+        return self.env.cr.rowcount
+
+    @api.model
+    def get_kpi_trend(self, measure, interval='month', domain=None, date_from=None, date_to=None):
+        """
+        Série temporelle d'un indicateur, lue dans les instantanés
+
+        measure : un champ de SNAPSHOT_MEASURES ou 'pass_rate' (contrôles
+        conformes / contrôles, en %) ; interval : day, week, month ou year.
+        Les indicateurs de stock (lot_count, quantity, statuts) sont pris au
+        dernier jour de chaque période, les mouvements sont additionnés.
+        Retourne [{'period': 'AAAA-MM-JJ', 'value': ...}].
+        """
+        if measure not in SNAPSHOT_MEASURES + ('pass_rate',):
+            raise UserError(f"Indicateur inconnu : {measure}")
+        if interval not in ('day', 'week', 'month', 'year'):
+            raise UserError(f"Période inconnue : {interval}")
+
+        domain = list(domain or [])
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+
+        if measure == 'pass_rate':
+            aggregates = ['qc_passed:sum', 'qc_count:sum']
+        else:
+            aggregates = [f'{measure}:sum']
+        groups = self._read_group(domain, ['date:day'], aggregates, order='date:day')
+
+        # Stock : valeur du dernier jour de la période ; mouvements : somme
+        stock = measure in ('lot_count', 'quantity', 'certified_count', 'pending_count', 'expiring_count')
+        series = {}
+        for day, *values in groups:
+            period = fields.Date.to_string(self._trend_period_start(day, interval))
+            if measure == 'pass_rate':
+                passed, total = series.get(period, (0, 0))
+                series[period] = (passed + values[0], total + values[1])
+            elif stock:
+                series[period] = values[0]
+            else:
+                series[period] = series.get(period, 0) + values[0]
+
+        if measure == 'pass_rate':
+            return [
+                {'period': period, 'value': round(passed / total * 100, 2) if total else 0.0}
+                for period, (passed, total) in series.items()
+            ]
+        return [{'period': period, 'value': value} for period, value in series.items()]
+
+    @api.model
+    def _trend_period_start(self, day, interval):
+        if interval == 'week':
+            return day - timedelta(days=day.weekday())
+        if interval == 'month':
+            return day.replace(day=1)
+        if interval == 'year':
+            return day.replace(month=1, day=1)
+        return day
@@ -64,27 +64,36 @@ class ResPartner(models.Model):
     )
     parcel_count = fields.Integer(
         'Nombre de Parcelles',
-        compute='_compute_parcel_count'
+        compute='_compute_parcel_stats'
     )
     total_area = fields.Float(
         'Surface Totale (ha)',
-        compute='_compute_total_area'
+        compute='_compute_parcel_stats'
     )
     
+    # Compteurs calculés par une requête groupée pour tout le recordset,
+    # sans charger les lots ni les parcelles
     @api.depends('seed_lot_ids')
     def _compute_seed_lot_count(self):
+        counts = {
+            partner.id: count
+            for partner, count in self.env['seed.lot']._read_group(
+                [('multiplier_id', 'in', self._origin.ids)], ['multiplier_id'], ['__count']
+            )
+        }
         for record in self:
-            record.seed_lot_count = len(record.seed_lot_ids)
+            record.seed_lot_count = counts.get(record._origin.id, 0)
     
-    @api.depends('parcel_ids')
-    def _compute_parcel_count(self):
+    @api.depends('parcel_ids', 'parcel_ids.area')
+    def _compute_parcel_stats(self):
+        stats = {
+            partner.id: (count, area)
+            for partner, count, area in self.env['agricultural.parcel']._read_group(
+                [('multiplier_id', 'in', self._origin.ids)], ['multiplier_id'], ['__count', 'area:sum']
+            )
+        }
         for record in self:
-            record.parcel_count = len(record.parcel_ids)
-    
-    @api.depends('parcel_ids.area')
-    def _compute_total_area(self):
-        for record in self:
-            record.total_area = sum(record.parcel_ids.mapped('area'))
+            record.parcel_count, record.total_area = stats.get(record._origin.id, (0, 0.0))
     
     @api.constrains('years_experience')
     def _check_years_experience(self):
@@ -0,0 +1,96 @@
+# models/qr_image.py
+from odoo import models, fields, api
+import hashlib
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class QRImage(models.Model):
+    """
+    Cache des images QR indexé par le contenu encodé
+
+    Une image est stockée une seule fois par empreinte (données + paramètres
+    de rendu) : régénérer un lot inchangé réutilise l'image existante au lieu
+    de recréer un PNG et une pièce jointe.
+    """
+    _name = 'isra.qr.image'
+    _description = 'Image QR Code (cache)'
+    _rec_name = 'checksum'
+
+    checksum = fields.Char(
+        string='Empreinte',
+        required=True,
+        index=True,
+        readonly=True,
+        help='SHA-256 des données encodées et des paramètres de rendu'
+    )
+
+    image = fields.Binary(
+        string='Image QR Code',
+        attachment=True,
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('unique_checksum', 'UNIQUE(checksum)', 'Une image QR existe déjà pour cette empreinte'),
+    ]
+
+    @api.model
+    def _compute_checksum(self, payload, render_key=''):
+        """Empreinte d'un contenu QR pour une configuration de rendu donnée"""
+        return hashlib.sha256(f"{render_key}\n{payload}".encode('utf-8')).hexdigest()
+
+    @api.model
+    def _get_images(self, payloads, render, render_key=''):
+        """
+        Retourne {payload: isra.qr.image} en ne rendant que les contenus absents du cache
+
+        :param payloads: chaînes à encoder
+        :param render: fonction payload -> image PNG encodée en base64
+        :param render_key: identifiant des paramètres de rendu (taille, correction...)
+        """
+        checksums = {payload: self._compute_checksum(payload, render_key) for payload in set(payloads)}
+
+        # Une seule requête pour tout le paquet
+        existing = self.sudo().search([('checksum', 'in', list(checksums.values()))])
+        by_checksum = {image.checksum: image for image in existing}
+
+        missing = [payload for payload, checksum in checksums.items() if checksum not in by_checksum]
+        if missing:
+            created = self.sudo().create([
+                {'checksum': checksums[payload], 'image': render(payload)}
+                for payload in missing
+            ])
+            by_checksum.update({image.checksum: image for image in created})
+            _logger.debug("Cache QR : %s rendu(s), %s réutilisé(s)", len(missing), len(existing))
+
+        return {payload: by_checksum[checksum] for payload, checksum in checksums.items()}
+
+    @api.autovacuum
+    def _gc_unused_images(self):
+        """Supprime les images qui ne sont plus référencées par aucun enregistrement"""
+        references = self.env['ir.model.fields'].sudo().search([
+            ('relation', '=', self._name),
+            ('ttype', '=', 'many2one'),
+            ('store', '=', True),
+        ])
+
+        used_ids = set()
+        for field in references:
+            if field.model not in self.env or not self.env[field.model]._auto:
+                continue
+            model = self.env[field.model]
+            self.env.cr.execute(
+                f'SELECT DISTINCT "{field.name}" FROM "{model._table}" WHERE "{field.name}" IS NOT NULL'
+            )
+            used_ids.update(row[0] for row in self.env.cr.fetchall())
+
+        # Marge d'un jour pour ne pas supprimer une image en cours d'affectation
+        unused = self.sudo().search([
+            ('id', 'not in', list(used_ids)),
+            ('create_date', '<', fields.Datetime.subtract(fields.Datetime.now(), days=1)),
+        ])
+        if unused:
+            _logger.info("Suppression de %s image(s) QR inutilisée(s)", len(unused))
+            unused.unlink()
@@ -1,15 +1,71 @@
 # models/seed_lot.py
 from odoo import models, fields, api
 from odoo.exceptions import UserError, ValidationError
-import json
+from odoo.tools import SQL
 import base64
+import logging
+import operator as py_operator
+import secrets
+import string
+from collections import defaultdict
 from datetime import datetime, timedelta
 
+from ..tools import qr_payload, qr_render
+
+_logger = logging.getLogger(__name__)
+
+# Paramètres système pour la génération des QR codes
+QR_RENDER_MODE_PARAM = 'isra_seeds.qr_render_mode'  # 'queued' ou 'sync'
+QR_STORE_IMAGES_PARAM = 'isra_seeds.qr_store_images'  # 'False' : images rendues à la demande
+QR_BATCH_SIZE_PARAM = 'isra_seeds.qr_batch_size'
+QR_PAYLOAD_FORMAT_PARAM = 'isra_seeds.qr_payload_format'  # 'compact' ou 'legacy'
+QR_RENDERER_PARAM = 'isra_seeds.qr_renderer'  # 'matrix' ou 'pil'
+QR_HMAC_KEYS_PARAM = 'isra_seeds.qr_hmac_keys'  # 'A:<hex>,B:<hex>'
+QR_HMAC_ACTIVE_KID_PARAM = 'isra_seeds.qr_hmac_active_kid'
+DEFAULT_QR_BATCH_SIZE = 200
+
+# Taille des paquets du recalcul global des statistiques de contrôle qualité
+QUALITY_STATS_BATCH_SIZE = 5000
+
+# Expiration automatique des lots (tâche planifiée)
+EXPIRY_BATCH_SIZE = 1000
+# Statuts conservés même après la date d'expiration
+EXPIRY_KEEP_STATUSES = ('expired', 'rejected', 'distributed')
+# Nombre de lots cités dans le message récapitulatif d'un paquet
+EXPIRY_SUMMARY_MAX_NAMES = 50
+
+# Générations parcourues par défaut de part et d'autre d'un lot (GO -> R2 : 6)
+GENEALOGY_MAX_DEPTH = 10
+
+# Niveaux autorisés pour le lot parent, par niveau du lot (GO : pas de contrainte)
+LOT_PARENT_LEVELS = {
+    'G1': frozenset({'GO'}),
+    'G2': frozenset({'G1'}),
+    'G3': frozenset({'G2'}),
+    'G4': frozenset({'G3'}),
+    'R1': frozenset({'G4'}),
+    'R2': frozenset({'R1'}),
+}
+
+SEARCH_OPERATORS = {
+    '=': py_operator.eq,
+    '!=': py_operator.ne,
+    '<': py_operator.lt,
+    '<=': py_operator.le,
+    '>': py_operator.gt,
+    '>=': py_operator.ge,
+}
+
+# Champs qui nécessitent une régénération du QR code
+QR_TRIGGER_FIELDS = ['variety_id', 'level', 'production_date']
+
 class SeedLot(models.Model):
     _name = 'isra.seed.lot'
     _description = 'Lot de Semences'
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _order = 'production_date desc, name'
+    _parent_name = 'parent_lot_id'
+    _parent_store = True  # parent_path : recherches child_of / parent_of indexées
     
     # === CHAMPS IDENTIFIANTS ===
     
@@ -91,6 +147,19 @@ class SeedLot(models.Model):
         string='Lots Dérivés'
     )
     
+    # Chemin des ids depuis le lot d'origine ("12/57/203/"), maintenu par l'ORM
+    parent_path = fields.Char(index=True, unaccent=False)
+    
+    root_lot_id = fields.Many2one(
+        'isra.seed.lot',
+        string='Lot d\'Origine',
+        compute='_compute_root_lot_id',
+        store=True,
+        index=True,
+        recursive=True,
+        help='Premier ancêtre de la lignée (en général le lot GO)'
+    )
+    
     # === STATUT ET SUIVI ===
     
     status = fields.Selection([
@@ -107,12 +176,29 @@ class SeedLot(models.Model):
     
     qr_code_data = fields.Text('Données QR Code')
     
+    # Image partagée via le cache indexé par contenu (une image par empreinte)
+    qr_image_id = fields.Many2one(
+        'isra.qr.image',
+        string='Image QR (cache)',
+        copy=False,
+        readonly=True,
+        ondelete='set null'
+    )
+    
     # Binary = fichier binaire (image, PDF, etc.)
     qr_code_image = fields.Binary(
         string='Image QR Code',
-        attachment=True  # Stocké comme pièce jointe
+        related='qr_image_id.image'
     )
     
+    # Le rendu PNG est fait en arrière-plan par une tâche planifiée
+    qr_status = fields.Selection([
+        ('pending', 'En Attente'),
+        ('done', 'Généré'),
+        ('error', 'Erreur'),
+    ], string='Statut QR Code', default='pending', copy=False,
+        readonly=True, index=True)
+    
     # === NOTES ET OBSERVATIONS ===
     
     notes = fields.Text('Notes et Observations')
@@ -130,19 +216,25 @@ class SeedLot(models.Model):
         store=True  # Copié en base pour les recherches
     )
     
+    # Dépendent du jour : non stockés, mais recherchables via expiry_date
     days_to_expiry = fields.Integer(
         string='Jours avant Expiration',
-        compute='_compute_days_to_expiry'
+        compute='_compute_days_to_expiry',
+        search='_search_days_to_expiry'
     )
     
     is_expired = fields.Boolean(
         string='Expiré',
-        compute='_compute_is_expired'
+        compute='_compute_is_expired',
+        search='_search_is_expired'
     )
     
+    # Stocké : les listes de lots n'accèdent pas à la table des contrôles
     quality_status = fields.Selection(
         related='latest_quality_control_id.result',
-        string='Dernier Contrôle Qualité'
+        string='Dernier Contrôle Qualité',
+        store=True,
+        index=True
     )
     
     # === RELATIONS CALCULÉES ===
@@ -153,14 +245,19 @@ class SeedLot(models.Model):
         string='Contrôles Qualité'
     )
     
+    # Stockés et recalculés seulement pour les lots dont un contrôle change
     latest_quality_control_id = fields.Many2one(
         'isra.quality.control',
-        compute='_compute_latest_quality_control',
+        compute='_compute_quality_control_stats',
+        store=True,
+        index=True,
         string='Dernier Contrôle'
     )
     
     quality_control_count = fields.Integer(
-        compute='_compute_quality_control_count',
+        compute='_compute_quality_control_stats',
+        store=True,
+        index=True,
         string='Nb Contrôles'
     )
     
@@ -211,20 +308,105 @@ class SeedLot(models.Model):
         for lot in self:
             lot.is_expired = lot.days_to_expiry < 0
     
-    @api.depends('quality_control_ids')
-    def _compute_latest_quality_control(self):
-        """Trouve le dernier contrôle qualité"""
+    def _search_days_to_expiry(self, operator, value):
+        """
+        days_to_expiry <op> N  <=>  expiry_date <op> aujourd'hui + N
+        
+        Sans date d'expiration, days_to_expiry vaut 0 (voir le calcul) : ces
+        lots correspondent si et seulement si 0 <op> N.
+        """
+        if operator not in SEARCH_OPERATORS:
+            raise UserError(f"Opérateur non supporté pour les jours avant expiration : {operator}")
+        value = int(value)
+        # ('expiry_date', '!=', d) inclurait les dates vides : on les exclut explicitement
+        domain = ['&', ('expiry_date', '!=', False),
+                  ('expiry_date', operator, fields.Date.today() + timedelta(days=value))]
+        if SEARCH_OPERATORS[operator](0, value):
+            domain = ['|', ('expiry_date', '=', False)] + domain
+        return domain
+    
+    def _search_is_expired(self, operator, value):
+        """is_expired  <=>  days_to_expiry < 0 (mêmes règles que le calcul)"""
+        if operator not in ('=', '!='):
+            raise UserError(f"Opérateur non supporté pour le statut d'expiration : {operator}")
+        expired = (operator == '=') == bool(value)
+        return [('days_to_expiry', '<' if expired else '>=', 0)]
+    
+    @api.depends('parent_lot_id.root_lot_id')
+    def _compute_root_lot_id(self):
         for lot in self:
-            if lot.quality_control_ids:
-                lot.latest_quality_control_id = lot.quality_control_ids.sorted('control_date', reverse=True)[0]
-            else:
-                lot.latest_quality_control_id = False
+            lot.root_lot_id = lot.parent_lot_id.root_lot_id or lot.parent_lot_id or lot
     
-    @api.depends('quality_control_ids')
-    def _compute_quality_control_count(self):
-        """Compte les contrôles qualité"""
+    @api.depends('quality_control_ids', 'quality_control_ids.control_date')
+    def _compute_quality_control_stats(self):
+        """Dernier contrôle qualité et nombre de contrôles (une requête par paquet de lots)"""
+        stored = self.filtered(lambda lot: isinstance(lot.id, int))
+        stats = stored._get_quality_control_stats()
         for lot in self:
-            lot.quality_control_count = len(lot.quality_control_ids)
+            if lot in stored:
+                latest_id, count = stats.get(lot.id, (False, 0))
+                lot.latest_quality_control_id = latest_id
+                lot.quality_control_count = count
+            else:
+                # Lot en cours d'édition (onchange) : contrôles en mémoire
+                controls = lot.quality_control_ids.sorted(lambda qc: (qc.control_date, qc.id), reverse=True)
+                lot.latest_quality_control_id = controls[:1]
+                lot.quality_control_count = len(controls)
+    
+    def _get_quality_control_stats(self):
+        """{lot_id: (dernier contrôle, nombre de contrôles)} calculé en SQL"""
+        if not self:
+            return {}
+        self.env['isra.quality.control'].flush_model(['lot_id', 'control_date'])
+        self.env.cr.execute("""
+            SELECT lot_id,
+                   (array_agg(id ORDER BY control_date DESC NULLS LAST, id DESC))[1],
+                   count(*)
+              FROM isra_quality_control
+             WHERE lot_id IN %s
+             GROUP BY lot_id
+        """, [tuple(self.ids)])
+        return {lot_id: (latest_id, count) for lot_id, latest_id, count in self.env.cr.fetchall()}
+    
+    @api.model
+    def _recompute_quality_control_stats(self, batch_size=QUALITY_STATS_BATCH_SIZE, auto_commit=True):
+        """
+        Recalcul global des champs stockés de contrôle qualité (données existantes)
+        
+        Une requête UPDATE par paquet de lots, sans charger les enregistrements.
+        Depuis le shell Odoo : env['isra.seed.lot']._recompute_quality_control_stats()
+        """
+        self.env['isra.quality.control'].flush_model(['lot_id', 'control_date', 'result'])
+        self.flush_model()
+        self.env.cr.execute("SELECT id FROM isra_seed_lot ORDER BY id")
+        lot_ids = [row[0] for row in self.env.cr.fetchall()]
+        
+        for start in range(0, len(lot_ids), batch_size):
+            batch = lot_ids[start:start + batch_size]
+            self.env.cr.execute("""
+                WITH stats AS (
+                    SELECT lot_id,
+                           (array_agg(id ORDER BY control_date DESC NULLS LAST, id DESC))[1] AS latest_id,
+                           count(*) AS control_count
+                      FROM isra_quality_control
+                     WHERE lot_id = ANY(%(ids)s)
+                     GROUP BY lot_id
+                )
+                UPDATE isra_seed_lot lot
+                   SET latest_quality_control_id = stats.latest_id,
+                       quality_control_count = COALESCE(stats.control_count, 0),
+                       quality_status = qc.result
+                  FROM unnest(%(ids)s::int[]) AS batch(id)
+                  LEFT JOIN stats ON stats.lot_id = batch.id
+                  LEFT JOIN isra_quality_control qc ON qc.id = stats.latest_id
+                 WHERE lot.id = batch.id
+            """, {'ids': batch})
+            if auto_commit:
+                self.env.cr.commit()
+        
+        self.invalidate_model(['latest_quality_control_id', 'quality_control_count', 'quality_status'])
+        _logger.info("Statistiques de contrôle qualité recalculées pour %s lot(s)", len(lot_ids))
+        return len(lot_ids)
     
     # === MÉTHODES CRUD ===
     
@@ -235,24 +417,115 @@ class SeedLot(models.Model):
         if vals.get('name', '/') == '/':
             vals['name'] = self._generate_lot_id(vals.get('level'))
         
-        # Créer le lot
+        # Créer le lot (QR code en attente de rendu)
+        vals['qr_status'] = 'pending'
         lot = super().create(vals)
         
-        # Générer le QR code
-        lot._generate_qr_code()
+        # Générer le QR code (immédiatement ou via la file d'attente)
+        lot._schedule_qr_code()
         
         return lot
     
     def write(self, vals):
         """Modification d'un lot"""
+        regenerate = any(field in vals for field in QR_TRIGGER_FIELDS)
+        if regenerate:
+            vals = dict(vals, qr_status='pending')
+        
         result = super().write(vals)
         
         # Régénérer le QR code si nécessaire
-        if any(field in vals for field in ['variety_id', 'level', 'production_date']):
-            self._generate_qr_code()
+        if regenerate:
+            self._schedule_qr_code()
         
         return result
     
+    def unlink(self):
+        """Suppression de lots"""
+        # Détacher les lots dérivés conservés via l'ORM : leur parent_path est mis à jour
+        (self.child_lot_ids - self).write({'parent_lot_id': False})
+        return super().unlink()
+    
+    @api.model
+    def _rebuild_lineage_index(self):
+        """
+        Recalcule parent_path et le lot d'origine de tous les lots
+
+        À appeler après toute modification des liens parent en SQL direct
+        (import, migration) : deux requêtes, quel que soit le nombre de lots.
+        """
+        self.flush_model(['parent_lot_id'])
+        self._parent_store_compute()
+        self.env.cr.execute("""
+            UPDATE isra_seed_lot
+               SET root_lot_id = split_part(parent_path, '/', 1)::integer
+             WHERE root_lot_id IS DISTINCT FROM split_part(parent_path, '/', 1)::integer
+        """)
+        self.invalidate_model(['parent_path', 'root_lot_id'])
+        _logger.info("Index de lignée des lots recalculé (%s lot(s) rattaché(s) à une autre origine)",
+                     self.env.cr.rowcount)
+    
+    # === TÂCHES PLANIFIÉES ===
+    
+    @api.model
+    def _cron_expire_lots(self, batch_size=EXPIRY_BATCH_SIZE, auto_commit=True):
+        """
+        Passe au statut "expiré" les lots dont la date d'expiration est dépassée
+        
+        Un UPDATE par paquet (sans chargement des lots) et un seul message
+        récapitulatif par paquet au lieu d'un message de suivi par lot.
+        """
+        self.flush_model(['status', 'expiry_date'])
+        today = fields.Date.context_today(self)
+        expired = 0
+        while True:
+            self.env.cr.execute("""
+                UPDATE isra_seed_lot
+                   SET status = 'expired',
+                       write_uid = %(uid)s,
+                       write_date = (now() at time zone 'UTC')
+                 WHERE id IN (
+                       SELECT id FROM isra_seed_lot
+                        WHERE expiry_date < %(today)s
+                          AND (status IS NULL OR status NOT IN %(keep)s)
+                        ORDER BY id
+                        LIMIT %(limit)s
+                       )
+             RETURNING id, name
+            """, {'uid': self.env.uid, 'today': today, 'keep': EXPIRY_KEEP_STATUSES, 'limit': batch_size})
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            
+            lots = self.browse([row[0] for row in rows])
+            # Cache et champs stockés qui dépendent du statut (recalculés par l'ORM)
+            lots.invalidate_recordset(['status', 'write_uid', 'write_date'])
+            lots.modified(['status'])
+            lots.flush_recordset()
+            self._post_expiry_summary(sorted(row[1] for row in rows), today)
+            
+            expired += len(rows)
+            if auto_commit:
+                self.env.cr.commit()
+        
+        if expired:
+            _logger.info("%s lot(s) passé(s) au statut expiré", expired)
+        return expired
+    
+    @api.model
+    def _post_expiry_summary(self, names, today):
+        """Message récapitulatif d'un paquet de lots expirés (canal général)"""
+        shown = ', '.join(names[:EXPIRY_SUMMARY_MAX_NAMES])
+        if len(names) > EXPIRY_SUMMARY_MAX_NAMES:
+            shown += f" et {len(names) - EXPIRY_SUMMARY_MAX_NAMES} autre(s)"
+        body = f"{len(names)} lot(s) passé(s) au statut Expiré le {today.strftime('%d/%m/%Y')} : {shown}"
+        
+        channel = self.env.ref('mail.channel_all_employees', raise_if_not_found=False)
+        if channel:
+            channel.sudo().message_post(body=body, message_type='comment', subtype_xmlid='mail.mt_comment')
+        else:
+            _logger.info(body)
+    
     # === MÉTHODES UTILITAIRES ===
     
     def _generate_lot_id(self, level):
@@ -261,46 +534,294 @@ class SeedLot(models.Model):
         sequence = self.env['ir.sequence'].next_by_code('isra.seed.lot.sequence') or '001'
         return f"SL-{level}-{year}-{sequence}"
     
+    def _is_qr_queued(self):
+        """Indique si le rendu des QR codes passe par la file d'attente"""
+        mode = self.env['ir.config_parameter'].sudo().get_param(QR_RENDER_MODE_PARAM, 'queued')
+        return mode != 'sync'
+    
+    def _is_qr_storage_enabled(self):
+        """Indique si les images QR sont stockées (sinon servies par /isra/qr/<lot>.png)"""
+        value = self.env['ir.config_parameter'].sudo().get_param(QR_STORE_IMAGES_PARAM, 'True')
+        return value.lower() not in ('0', 'false')
+    
+    def _schedule_qr_code(self):
+        """Génère le QR code tout de suite ou réveille la tâche de rendu"""
+        if not self._is_qr_storage_enabled():
+            return
+        
+        if not self._is_qr_queued():
+            self._generate_qr_code()
+            return
+        
+        cron = self.env.ref('isra_seeds_traceability.ir_cron_render_qr_codes', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+    
+    @api.model
+    def _cron_render_pending_qr_codes(self, batch_size=None, auto_commit=True):
+        """Tâche planifiée : rend les QR codes en attente par paquets"""
+        if not self._is_qr_storage_enabled():
+            return 0
+        
+        if not batch_size:
+            batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+                QR_BATCH_SIZE_PARAM, DEFAULT_QR_BATCH_SIZE
+            ))
+        
+        rendered = 0
+        while True:
+            lots = self.search([('qr_status', '=', 'pending')], limit=batch_size, order='id')
+            if not lots:
+                break
+            
+            lots._generate_qr_code()
+            rendered += len(lots)
+            
+            # Un commit par paquet : un échec ne fait perdre que le paquet en cours
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        
+        if rendered:
+            _logger.info("%s QR code(s) de lots générés", rendered)
+        return rendered
+    
+    def _get_qr_payload_format(self):
+        """Format des données QR : compact (par défaut) ou JSON historique"""
+        return self.env['ir.config_parameter'].sudo().get_param(
+            QR_PAYLOAD_FORMAT_PARAM, qr_payload.FORMAT_COMPACT
+        )
+    
+    def _get_qr_payload(self, payload_format=None):
+        """Données encodées dans le QR code (déterministes : pas d'horodatage)"""
+        self.ensure_one()
+        qr_data = {
+            'lot_id': self.name,
+            'variety_name': self.variety_id.name,
+            'variety_code': self.variety_id.code,
+            'level': self.level,
+            'production_date': str(self.production_date),
+            'multiplier': self.multiplier_id.name if self.multiplier_id else '',
+            'verification_url': f"https://isra.sn/verify/{self.name}",
+        }
+        kid, key = self._get_qr_signing_key()
+        qr_data.update(kid=kid, sig=qr_payload.sign(qr_data, key))
+        return qr_payload.encode(qr_data, payload_format or self._get_qr_payload_format())
+    
+    @api.model
+    def _get_qr_hmac_keys(self):
+        """Clés de signature QR {identifiant: clé} (paramètre système, en cache)"""
+        value = self.env['ir.config_parameter'].sudo().get_param(QR_HMAC_KEYS_PARAM, '')
+        keys = {}
+        for item in value.split(','):
+            kid, _sep, secret = item.strip().partition(':')
+            if kid and secret:
+                keys[kid] = bytes.fromhex(secret)
+        return keys
+    
+    @api.model
+    def _get_qr_signing_key(self):
+        """Clé active pour signer les QR codes (lecture seule, créée à l'installation)"""
+        keys = self._get_qr_hmac_keys()
+        kid = self.env['ir.config_parameter'].sudo().get_param(QR_HMAC_ACTIVE_KID_PARAM)
+        if kid not in keys:
+            raise UserError("Aucune clé de signature QR active (mettre à jour le module)")
+        return kid, keys[kid]
+    
+    @api.model
+    def _ensure_qr_hmac_key(self):
+        """
+        Crée la première clé de signature si besoin
+        
+        Appelé par les données du module (installation et mise à jour) : deux
+        workers créant chacun leur clé au premier usage rendaient « falsifiés »
+        les QR codes signés par le perdant.
+        """
+        keys = self._get_qr_hmac_keys()
+        kid = self.env['ir.config_parameter'].sudo().get_param(QR_HMAC_ACTIVE_KID_PARAM)
+        if kid not in keys:
+            self._rotate_qr_hmac_key(requeue=False)
+    
+    @api.model
+    def _rotate_qr_hmac_key(self, requeue=True):
+        """
+        Ajoute une nouvelle clé de signature et en fait la clé active
+        
+        Les anciennes clés restent acceptées à la vérification jusqu'à leur
+        retrait du paramètre ; les QR codes des lots sont remis en file de rendu.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        keys = self._get_qr_hmac_keys()
+        kid = next(letter for letter in string.ascii_uppercase + string.digits if letter not in keys)
+        keys[kid] = secrets.token_bytes(32)
+        params.set_param(QR_HMAC_KEYS_PARAM, ','.join(f"{k}:{v.hex()}" for k, v in keys.items()))
+        params.set_param(QR_HMAC_ACTIVE_KID_PARAM, kid)
+        _logger.info("Nouvelle clé de signature QR active : %s", kid)
+        
+        if requeue:
+            # Un seul UPDATE : une écriture ORM sur toute la table recalculerait les
+            # champs stockés de chaque lot ; le rendu est laissé à la tâche planifiée
+            self.flush_model(['qr_status'])
+            self.env.cr.execute(
+                "UPDATE isra_seed_lot SET qr_status = 'pending' WHERE qr_status IS DISTINCT FROM 'pending'"
+            )
+            self.invalidate_model(['qr_status'])
+            self._schedule_qr_code()
+        return kid
+    
+    def _get_qr_config(self):
+        """Configuration du rendu QR (mêmes clés que isra.qr.mixin)"""
+        import qrcode
+        renderer = self.env['ir.config_parameter'].sudo().get_param(
+            QR_RENDERER_PARAM, qr_render.RENDERER_MATRIX
+        )
+        return {
+            'version': 1,
+            'error_correction': qrcode.constants.ERROR_CORRECT_M,
+            'box_size': 10,
+            'border': 4,
+            'fill_color': "black",
+            'back_color': "white",
+            'renderer': renderer,
+        }
+    
     def _generate_qr_code(self):
         """Génère le QR code du lot"""
+        payload_format = self._get_qr_payload_format()
+        payloads = {lot.id: lot._get_qr_payload(payload_format) for lot in self}
+        
+        # Générer les images QR (nécessite la librairie qrcode)
+        try:
+            config = self._get_qr_config()
+            images = self.env['isra.qr.image']._get_images(
+                payloads.values(),
+                lambda payload: base64.b64encode(qr_render.render(payload, config)),
+                render_key=qr_render.render_key(config),
+            )
+        except ImportError:
+            # Si qrcode n'est pas installé : une écriture par contenu distinct
+            ids_by_payload = defaultdict(list)
+            for lot in self:
+                ids_by_payload[payloads[lot.id]].append(lot.id)
+            for payload, ids in ids_by_payload.items():
+                self.browse(ids).write({'qr_code_data': payload, 'qr_status': 'error'})
+            return
+        except Exception as e:
+            _logger.error("Erreur génération QR pour les lots %s: %s", self.mapped('name'), e)
+            self.write({'qr_status': 'error'})
+            return
+        
+        # Une écriture par (contenu, image) ; les lots inchangés (l'image en cache
+        # est déjà la bonne) ne reçoivent que le statut, en une fois
+        unchanged = self.browse()
+        ids_by_content = defaultdict(list)
         for lot in self:
-            # Données à encoder dans le QR code
-            qr_data = {
-                'lot_id': lot.name,
-                'variety_name': lot.variety_id.name,
-                'variety_code': lot.variety_id.code,
-                'level': lot.level,
-                'production_date': str(lot.production_date),
-                'multiplier': lot.multiplier_id.name if lot.multiplier_id else '',
-                'verification_url': f"https://isra.sn/verify/{lot.name}",
-                'timestamp': datetime.now().isoformat()
+            payload = payloads[lot.id]
+            if lot.qr_code_data == payload and lot.qr_image_id == images[payload]:
+                unchanged |= lot
+            else:
+                ids_by_content[payload, images[payload].id].append(lot.id)
+        if unchanged:
+            unchanged.write({'qr_status': 'done'})
+        for (payload, image_id), ids in ids_by_content.items():
+            self.browse(ids).write({'qr_code_data': payload, 'qr_image_id': image_id, 'qr_status': 'done'})
+    
+    # === GÉNÉALOGIE ===
+    
+    def get_genealogy(self, ancestors_depth=GENEALOGY_MAX_DEPTH, descendants_depth=GENEALOGY_MAX_DEPTH):
+        """
+        Ascendants et descendants des lots en une seule requête récursive
+
+        ancestors_depth / descendants_depth : nombre de générations parcourues
+        de part et d'autre (0 pour n'en parcourir aucune). Retourne une liste
+        plate de {'id', 'name', 'level', 'parent_id', 'quantity', 'depth'},
+        depth négatif pour les ascendants, 0 pour les lots de départ, triée
+        par génération puis par nom. Les lots non lisibles sont omis.
+        """
+        if not self:
+            return []
+        self.check_access_rights('read')
+        self.flush_model(['name', 'level', 'parent_lot_id', 'quantity'])
+
+        self.env.cr.execute("""
+            WITH RECURSIVE ancestors(id, parent_id, depth, path) AS (
+                SELECT id, parent_lot_id, 0, ARRAY[id]
+                  FROM isra_seed_lot
+                 WHERE id = ANY(%(ids)s)
+                UNION ALL
+                SELECT lot.id, lot.parent_lot_id, a.depth - 1, a.path || lot.id
+                  FROM isra_seed_lot lot
+                  JOIN ancestors a ON lot.id = a.parent_id
+                 WHERE a.depth > -%(up)s
+                   AND NOT lot.id = ANY(a.path)
+            ), descendants(id, depth, path) AS (
+                SELECT id, 0, ARRAY[id]
+                  FROM isra_seed_lot
+                 WHERE id = ANY(%(ids)s)
+                UNION ALL
+                SELECT lot.id, d.depth + 1, d.path || lot.id
+                  FROM isra_seed_lot lot
+                  JOIN descendants d ON lot.parent_lot_id = d.id
+                 WHERE d.depth < %(down)s
+                   AND NOT lot.id = ANY(d.path)
+            ), lineage AS (
+                SELECT DISTINCT ON (id) id, depth
+                  FROM (SELECT id, depth FROM ancestors
+                        UNION ALL
+                        SELECT id, depth FROM descendants) AS nodes
+                 ORDER BY id, abs(depth)
+            )
+            SELECT lot.id, lot.name, lot.level, lot.parent_lot_id, lot.quantity, lineage.depth
+              FROM lineage
+              JOIN isra_seed_lot lot ON lot.id = lineage.id
+             ORDER BY lineage.depth, lot.name
+        """, {
+            'ids': self.ids,
+            'up': max(int(ancestors_depth), 0),
+            'down': max(int(descendants_depth), 0),
+        })
+        rows = self.env.cr.fetchall()
+
+        # Respecter les règles d'accès (lots d'autres multiplicateurs, lots archivés...)
+        readable = set(self.browse([row[0] for row in rows])._filter_access_rules('read').ids)
+        return [
+            {
+                'id': lot_id,
+                'name': name,
+                'level': level,
+                'parent_id': parent_id or False,
+                'quantity': quantity,
+                'depth': depth,
             }
-            
-            # Encoder en JSON
-            lot.qr_code_data = json.dumps(qr_data, ensure_ascii=False, indent=2)
-            
-            # Générer l'image QR (nécessite la librairie qrcode)
-            try:
-                import qrcode
-                from io import BytesIO
-                
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_M,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(lot.qr_code_data)
-                qr.make(fit=True)
-                
-                img = qr.make_image(fill_color="black", back_color="white")
-                buffer = BytesIO()
-                img.save(buffer, format='PNG')
-                
-                lot.qr_code_image = base64.b64encode(buffer.getvalue())
-            except ImportError:
-                # Si qrcode n'est pas installé
-                pass
+            for lot_id, name, level, parent_id, quantity, depth in rows
+            if lot_id in readable
+        ]
+    
+    @api.model
+    def _get_genealogy_export_query(self, variety_id=None, root_lot_id=None):
+        """
+        Requête de l'export de généalogie (voir tools/genealogy_export.py)
+
+        Lots d'une variété et/ou descendants d'un lot (inclus), règles d'accès
+        appliquées, triés par parent_path : chaque lot suit son parent. Le
+        parent n'est renvoyé que s'il fait partie de l'export.
+        """
+        domain = []
+        if variety_id:
+            domain.append(('variety_id', '=', int(variety_id)))
+        if root_lot_id:
+            domain.append(('id', 'child_of', int(root_lot_id)))
+        self.flush_model(['name', 'level', 'quantity', 'production_date', 'status',
+                          'variety_id', 'parent_lot_id', 'parent_path'])
+        scope = self._search(domain).subselect()
+        return SQL("""
+            SELECT lot.id,
+                   CASE WHEN lot.parent_lot_id IN (%s) THEN lot.parent_lot_id END,
+                   lot.name, lot.level, lot.quantity::float, lot.production_date, lot.status
+              FROM isra_seed_lot lot
+             WHERE lot.id IN (%s)
+             ORDER BY lot.parent_path COLLATE "C"
+        """, scope, scope)
     
     # === ACTIONS UTILISATEUR ===
     
@@ -351,23 +872,27 @@ class SeedLot(models.Model):
     
     @api.constrains('parent_lot_id')
     def _check_parent_lot(self):
-        """Vérifier la cohérence du lot parent"""
-        for lot in self:
-            if lot.parent_lot_id:
-                # Le parent doit être d'un niveau inférieur
-                parent_levels = ['GO', 'G1', 'G2', 'G3', 'G4', 'R1', 'R2']
-                current_levels = ['G1', 'G2', 'G3', 'G4', 'R1', 'R2', 'R2']
-                
-                if lot.level in current_levels:
-                    expected_parent_index = current_levels.index(lot.level)
-                    if lot.parent_lot_id.level != parent_levels[expected_parent_index]:
-                        raise ValidationError(
-                            f"Un lot {lot.level} ne peut pas dériver d'un lot {lot.parent_lot_id.level}"
-                        )
-                
-                # Même variété
-                if lot.variety_id != lot.parent_lot_id.variety_id:
-                    raise ValidationError("Le lot parent doit être de la même variété")
+        """Vérifier la cohérence du lot parent (toutes les erreurs signalées ensemble)"""
+        if not self._check_recursion(parent='parent_lot_id'):
+            raise ValidationError("Un lot ne peut pas dériver de lui-même ou de ses descendants")
+        
+        lots = self.filtered('parent_lot_id')
+        # Nom, niveau et variété de tous les parents en une requête
+        lots.parent_lot_id.fetch(['name', 'level', 'variety_id'])
+        
+        errors = []
+        for lot in lots:
+            parent = lot.parent_lot_id
+            # Le parent doit être du niveau précédent
+            allowed = LOT_PARENT_LEVELS.get(lot.level)
+            if allowed is not None and parent.level not in allowed:
+                errors.append(f"{lot.name} : un lot {lot.level} ne peut pas dériver d'un lot {parent.level}")
+            # Même variété
+            if lot.variety_id != parent.variety_id:
+                errors.append(f"{lot.name} : le lot parent {parent.name} doit être de la même variété")
+        
+        if errors:
+            raise ValidationError("Lots parents incohérents :\n" + "\n".join(errors))
     
     @api.constrains('quantity')
     def _check_quantity(self):
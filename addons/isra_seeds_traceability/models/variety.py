@@ -108,9 +108,15 @@ class SeedVariety(models.Model):
     
     @api.depends('seed_lot_ids')
     def _compute_seed_lot_count(self):
-        """Calcule le nombre de lots pour chaque variété"""
+        """Calcule le nombre de lots pour chaque variété (une requête groupée)"""
+        counts = {
+            variety.id: count
+            for variety, count in self.env['isra.seed.lot']._read_group(
+                [('variety_id', 'in', self._origin.ids)], ['variety_id'], ['__count']
+            )
+        }
         for variety in self:
-            variety.seed_lot_count = len(variety.seed_lot_ids)
+            variety.seed_lot_count = counts.get(variety._origin.id, 0)
     
     @api.model
     def create(self, vals):
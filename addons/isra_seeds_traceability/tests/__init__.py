@@ -0,0 +1,6 @@
+from . import test_seed_lot_expiry
+from . import test_genealogy_export_cli
+from . import test_qr_render_queue
+from . import test_qr_signing
+from . import test_dashboard_kpis
+from . import test_dashboard_snapshot
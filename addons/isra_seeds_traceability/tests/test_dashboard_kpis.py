@@ -0,0 +1,43 @@
+# tests/test_dashboard_kpis.py
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models import dashboard
+
+
+@tagged('post_install', '-at_install')
+class TestDashboardKpis(TransactionCase):
+    """Indicateurs du tableau de bord : cache partagé, calculés en sudo"""
+
+    def setUp(self):
+        super().setUp()
+        dashboard._kpi_cache.clear()
+        self.addCleanup(dashboard._kpi_cache.clear)
+        self.Dashboard = self.env['isra.dashboard']
+        self.user = self.env['res.users'].create({
+            'name': 'Utilisateur Test Tableau de Bord',
+            'login': 'isra_dashboard_test_user',
+        })
+
+    def test_kpis_computed_once_in_sudo(self):
+        calls = []
+
+        def query_kpis(model, today):
+            calls.append((model.env.su, today))
+            return {'total_lots': 42}
+
+        with patch.object(type(self.Dashboard), '_query_kpis', query_kpis):
+            self.assertEqual(self.Dashboard.with_user(self.user)._get_kpis(), {'total_lots': 42})
+            # Même valeur pour un autre utilisateur, sans nouveau calcul
+            self.assertEqual(self.Dashboard._get_kpis(), {'total_lots': 42})
+
+        self.assertEqual(calls, [(True, fields.Date.context_today(self.Dashboard))])
+
+    def test_cache_is_per_day(self):
+        with patch.object(type(self.Dashboard), '_query_kpis', lambda model, today: {'day': today}):
+            today = self.Dashboard._get_kpis()['day']
+            with patch.object(fields.Date, 'context_today', return_value=today + timedelta(days=1)):
+                self.assertNotEqual(self.Dashboard._get_kpis()['day'], today)
@@ -0,0 +1,73 @@
+# tests/test_dashboard_snapshot.py
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestDashboardSnapshotStock(TransactionCase):
+    """Mesures de stock des instantanés quotidiens : lots produits et non expirés à la date"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.today = fields.Date.today()
+        cls.variety = cls.env['isra.seed.variety'].create({
+            'name': 'Variété Test Instantané',
+            'code': 'TSTKPI',
+            'crop_type': 'cowpea',
+            'maturity_days': 70,
+        })
+
+        def lot(level, produced_days_ago, quantity, status):
+            return cls.env['isra.seed.lot'].create({
+                'variety_id': cls.variety.id,
+                'level': level,
+                'quantity': quantity,
+                'production_date': cls.today - timedelta(days=produced_days_ago),
+                'status': status,
+            })
+
+        # Niveau R1 : validité d'un an
+        cls.lot_expired = lot('R1', 400, 500, 'in_stock')     # expiré il y a 35 jours
+        cls.lot_certified = lot('R1', 100, 100, 'certified')
+        cls.lot_expiring = lot('R1', 350, 30, 'certified')     # expire dans 15 jours
+        cls.lot_pending = lot('G1', 50, 40, 'pending')
+        cls.lot_today = lot('G1', 0, 999, 'draft')              # produit après la veille
+        cls.Snapshot = cls.env['isra.dashboard.snapshot']
+
+    def _rows(self, day):
+        self.Snapshot._backfill(day, day, auto_commit=False)
+        rows = self.Snapshot.search([('date', '=', day), ('variety_id', '=', self.variety.id)])
+        return {row.level: row for row in rows}
+
+    def test_stock_measures(self):
+        rows = self._rows(self.today - timedelta(days=1))
+        self.assertEqual(set(rows), {'R1', 'G1'})
+
+        r1 = rows['R1']
+        self.assertEqual(r1.crop_type, 'cowpea')
+        self.assertEqual(r1.lot_count, 2)  # le lot expiré n'est plus en stock
+        self.assertAlmostEqual(r1.quantity, 130)
+        self.assertEqual(r1.certified_count, 2)
+        self.assertEqual(r1.expiring_count, 1)
+        self.assertEqual(r1.expired_count, 0)
+
+        g1 = rows['G1']
+        self.assertEqual(g1.lot_count, 1)  # le lot produit aujourd'hui n'est pas compté
+        self.assertAlmostEqual(g1.quantity, 40)
+        self.assertEqual(g1.pending_count, 1)
+
+    def test_lot_leaves_stock_after_its_expiry_date(self):
+        expiry = self.lot_expired.expiry_date
+
+        r1 = self._rows(expiry)['R1']
+        self.assertEqual(r1.expired_count, 1)
+        self.assertEqual(r1.lot_count, 3)  # encore en stock le jour de son expiration
+        self.assertAlmostEqual(r1.quantity, 630)
+
+        r1 = self._rows(expiry + timedelta(days=1))['R1']
+        self.assertEqual(r1.expired_count, 0)
+        self.assertEqual(r1.lot_count, 2)
+        self.assertAlmostEqual(r1.quantity, 130)
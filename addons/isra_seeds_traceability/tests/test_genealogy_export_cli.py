@@ -0,0 +1,19 @@
+# tests/test_genealogy_export_cli.py
+import os
+
+from odoo.cli.command import commands
+from odoo.modules.module import get_module_path
+from odoo.tests import TransactionCase, tagged
+
+from ..cli.genealogy_export import IsraGenealogyExport
+
+
+@tagged('post_install', '-at_install')
+class TestGenealogyExportCommand(TransactionCase):
+    """La commande est découverte par odoo-bin --addons-path=... isra-genealogy-export"""
+
+    def test_command_registered(self):
+        # odoo.cli.command.main importe les modules ayant un dossier cli/ du chemin
+        # --addons-path donné en tête : l'import du module enregistre la commande
+        self.assertTrue(os.path.isdir(os.path.join(get_module_path('isra_seeds_traceability'), 'cli')))
+        self.assertIs(commands.get('isra-genealogy-export'), IsraGenealogyExport)
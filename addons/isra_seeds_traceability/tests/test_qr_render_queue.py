@@ -0,0 +1,64 @@
+# tests/test_qr_render_queue.py
+from odoo.tests import TransactionCase, tagged
+
+from ..models.seed_lot import QR_RENDER_MODE_PARAM, QR_STORE_IMAGES_PARAM
+
+
+@tagged('post_install', '-at_install')
+class TestQRRenderQueue(TransactionCase):
+    """Rendu des QR codes des lots en file d'attente (tâche planifiée)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        params = cls.env['ir.config_parameter'].sudo()
+        params.set_param(QR_RENDER_MODE_PARAM, 'queued')
+        params.set_param(QR_STORE_IMAGES_PARAM, 'True')
+        variety = cls.env['isra.seed.variety'].create({
+            'name': 'Variété Test QR',
+            'code': 'TSTQR',
+            'crop_type': 'rice',
+            'maturity_days': 120,
+        })
+        cls.SeedLot = cls.env['isra.seed.lot']
+        cls.lots = cls.SeedLot.create([{
+            'variety_id': variety.id,
+            'level': level,
+            'quantity': 100,
+        } for level in ('G1', 'G2', 'R1')])
+
+    def test_new_lots_are_queued(self):
+        self.assertEqual(set(self.lots.mapped('qr_status')), {'pending'})
+        self.assertFalse(self.lots.qr_image_id)
+
+    def test_cron_renders_pending_lots(self):
+        rendered = self.SeedLot._cron_render_pending_qr_codes(batch_size=2, auto_commit=False)
+        self.assertGreaterEqual(rendered, len(self.lots))
+        self.assertEqual(set(self.lots.mapped('qr_status')), {'done'})
+        for lot in self.lots:
+            self.assertTrue(lot.qr_image_id)
+            self.assertEqual(lot.qr_code_data, lot._get_qr_payload())
+        self.assertFalse(self.SeedLot.search_count([('qr_status', '=', 'pending')]))
+
+    def test_unchanged_lot_reuses_its_image(self):
+        lot = self.lots[0]
+        lot._generate_qr_code()
+        image = lot.qr_image_id
+        lot._generate_qr_code()
+        self.assertEqual(lot.qr_image_id, image)
+        self.assertEqual(self.env['isra.qr.image'].search_count([('checksum', '=', image.checksum)]), 1)
+
+    def test_trigger_field_requeues(self):
+        self.lots._generate_qr_code()
+        self.lots[0].write({'level': 'R2'})
+        self.assertEqual(self.lots[0].qr_status, 'pending')
+        self.assertEqual(set(self.lots[1:].mapped('qr_status')), {'done'})
+
+    def test_key_rotation_requeues_every_lot(self):
+        self.lots._generate_qr_code()
+        old_payload = self.lots[0].qr_code_data
+        self.SeedLot._rotate_qr_hmac_key()
+        self.assertEqual(set(self.lots.mapped('qr_status')), {'pending'})
+        self.SeedLot._cron_render_pending_qr_codes(auto_commit=False)
+        self.assertEqual(self.lots[0].qr_status, 'done')
+        self.assertNotEqual(self.lots[0].qr_code_data, old_payload)
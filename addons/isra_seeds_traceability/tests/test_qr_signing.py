@@ -0,0 +1,95 @@
+# tests/test_qr_signing.py
+from odoo.tests import TransactionCase, tagged
+
+from ..models.seed_lot import QR_HMAC_ACTIVE_KID_PARAM
+from ..tools import qr_payload
+
+LOT_DATA = {
+    'lot_id': 'SL-G1-2024-001',
+    'variety_code': 'sahel108',
+    'level': 'G1',
+    'production_date': '2024-03-15',
+}
+
+
+@tagged('post_install', '-at_install')
+class TestQRSignature(TransactionCase):
+    """Signature HMAC des données QR (sans accès à la base)"""
+
+    key = bytes(range(32))
+
+    def _signed(self, data=LOT_DATA, kid='A', key=None):
+        return dict(data, kid=kid, sig=qr_payload.sign(data, key or self.key))
+
+    def test_valid_signature(self):
+        self.assertIs(qr_payload.verify_signature(self._signed(), {'A': self.key}), True)
+
+    def test_unsigned_data(self):
+        self.assertIsNone(qr_payload.verify_signature(dict(LOT_DATA), {'A': self.key}))
+
+    def test_tampered_data(self):
+        data = dict(self._signed(), level='GO')
+        self.assertIs(qr_payload.verify_signature(data, {'A': self.key}), False)
+
+    def test_unknown_key(self):
+        self.assertIs(qr_payload.verify_signature(self._signed(kid='Z'), {'A': self.key}), False)
+
+    def test_compact_round_trip(self):
+        text = qr_payload.encode_compact(self._signed())
+        self.assertTrue(text.startswith('ISRA2/'))
+        decoded = qr_payload.decode(text)
+        self.assertEqual(decoded['lot_id'], LOT_DATA['lot_id'])
+        self.assertIs(qr_payload.verify_signature(decoded, {'A': self.key}), True)
+        # Le format ISRA1 ne porte pas de signature
+        unsigned = qr_payload.decode(qr_payload.encode_compact(LOT_DATA))
+        self.assertIsNone(qr_payload.verify_signature(unsigned, {'A': self.key}))
+
+
+@tagged('post_install', '-at_install')
+class TestQRKeyRotation(TransactionCase):
+    """Clés de signature des lots : clé active et rotation"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.SeedLot = cls.env['isra.seed.lot']
+        variety = cls.env['isra.seed.variety'].create({
+            'name': 'Variété Test Signature',
+            'code': 'TSTSIG',
+            'crop_type': 'maize',
+            'maturity_days': 90,
+        })
+        cls.lot = cls.SeedLot.create({'variety_id': variety.id, 'level': 'G2', 'quantity': 50})
+
+    def _verify(self, text):
+        return qr_payload.verify_signature(qr_payload.decode(text), self.SeedLot._get_qr_hmac_keys())
+
+    def test_key_created_at_install(self):
+        kid, key = self.SeedLot._get_qr_signing_key()
+        self.assertTrue(kid)
+        self.assertEqual(len(key), 32)
+
+    def test_lot_payload_is_signed(self):
+        text = self.lot._get_qr_payload()
+        self.assertTrue(text.startswith('ISRA2/'))
+        self.assertIs(self._verify(text), True)
+
+    def test_rotation_keeps_old_keys_valid(self):
+        old_kid, _key = self.SeedLot._get_qr_signing_key()
+        old_text = self.lot._get_qr_payload()
+
+        new_kid = self.SeedLot._rotate_qr_hmac_key(requeue=False)
+        self.assertNotEqual(new_kid, old_kid)
+        self.assertEqual(self.env['ir.config_parameter'].sudo().get_param(QR_HMAC_ACTIVE_KID_PARAM), new_kid)
+        self.assertIn(old_kid, self.SeedLot._get_qr_hmac_keys())
+
+        # Les QR codes déjà imprimés restent valides, les nouveaux utilisent la nouvelle clé
+        self.assertIs(self._verify(old_text), True)
+        new_text = self.lot._get_qr_payload()
+        self.assertEqual(qr_payload.decode(new_text)['kid'], new_kid)
+        self.assertIs(self._verify(new_text), True)
+
+    def test_ensure_key_is_idempotent(self):
+        kid, _key = self.SeedLot._get_qr_signing_key()
+        self.SeedLot._ensure_qr_hmac_key()
+        self.assertEqual(self.SeedLot._get_qr_signing_key()[0], kid)
@@ -0,0 +1,79 @@
+# tests/test_seed_lot_expiry.py
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models.seed_lot import SEARCH_OPERATORS
+
+
+@tagged('post_install', '-at_install')
+class TestSeedLotExpirySearch(TransactionCase):
+    """Les recherches sur days_to_expiry / is_expired donnent les mêmes lots que le calcul"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.today = fields.Date.today()
+        variety = cls.env['isra.seed.variety'].create({
+            'name': 'Variété Test Expiration',
+            'code': 'TSTEXP',
+            'crop_type': 'rice',
+            'maturity_days': 120,
+        })
+        SeedLot = cls.env['isra.seed.lot']
+
+        def lot(days_to_expiry):
+            # Niveau R1 : validité d'un an
+            return SeedLot.create({
+                'variety_id': variety.id,
+                'level': 'R1',
+                'quantity': 100,
+                'production_date': cls.today + timedelta(days=days_to_expiry - 365),
+            })
+
+        cls.lot_expired = lot(-10)
+        cls.lot_today = lot(0)
+        cls.lot_future = lot(10)
+        cls.lot_no_expiry = lot(30)
+        # Date d'expiration vide (lots antérieurs au calcul, import)
+        cls.lot_no_expiry.flush_recordset()
+        cls.env.cr.execute(
+            "UPDATE isra_seed_lot SET expiry_date = NULL WHERE id = %s", [cls.lot_no_expiry.id]
+        )
+        cls.lot_no_expiry.invalidate_recordset(['expiry_date'])
+        cls.lots = cls.lot_expired | cls.lot_today | cls.lot_future | cls.lot_no_expiry
+
+    def _search(self, domain):
+        return self.env['isra.seed.lot'].search([('id', 'in', self.lots.ids)] + domain)
+
+    def test_computed_values(self):
+        self.assertEqual(self.lot_expired.days_to_expiry, -10)
+        self.assertEqual(self.lot_today.days_to_expiry, 0)
+        self.assertEqual(self.lot_future.days_to_expiry, 10)
+        self.assertFalse(self.lot_no_expiry.expiry_date)
+        self.assertEqual(self.lot_no_expiry.days_to_expiry, 0)
+        self.assertFalse(self.lot_no_expiry.is_expired)
+
+    def test_days_to_expiry_search_matches_compute(self):
+        for operator, compare in SEARCH_OPERATORS.items():
+            for value in (-10, -1, 0, 1, 10):
+                with self.subTest(operator=operator, value=value):
+                    expected = self.lots.filtered(lambda lot: compare(lot.days_to_expiry, value))
+                    self.assertEqual(self._search([('days_to_expiry', operator, value)]), expected)
+
+    def test_days_to_expiry_null_expiry(self):
+        # Sans date d'expiration, le lot vaut 0 : il correspond à "= 0" et pas à "!= 0"
+        self.assertIn(self.lot_no_expiry, self._search([('days_to_expiry', '=', 0)]))
+        self.assertNotIn(self.lot_no_expiry, self._search([('days_to_expiry', '!=', 0)]))
+        self.assertNotIn(self.lot_no_expiry, self._search(['!', ('days_to_expiry', '=', 0)]))
+        self.assertIn(self.lot_no_expiry, self._search([('days_to_expiry', '!=', 5)]))
+
+    def test_is_expired_search_matches_compute(self):
+        expired = self.lots.filtered('is_expired')
+        self.assertEqual(expired, self.lot_expired)
+        self.assertEqual(self._search([('is_expired', '=', True)]), expired)
+        self.assertEqual(self._search([('is_expired', '!=', False)]), expired)
+        self.assertEqual(self._search([('is_expired', '=', False)]), self.lots - expired)
+        self.assertEqual(self._search([('is_expired', '!=', True)]), self.lots - expired)
+        self.assertEqual(self._search(['!', ('is_expired', '=', True)]), self.lots - expired)
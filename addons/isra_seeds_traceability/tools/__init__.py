@@ -0,0 +1,5 @@
+# tools/__init__.py
+from . import qr_payload
+from . import qr_render
+from . import result_cache
+from . import genealogy_export
@@ -0,0 +1,70 @@
+# tools/counter_benchmark.py
+"""
+Mesures des compteurs calculés (variétés et multiplicateurs)
+
+À exécuter depuis le shell Odoo : odoo-bin shell -d isra_db
+    from odoo.addons.isra_seeds_traceability.tools import counter_benchmark
+    counter_benchmark.run_counter_benchmark(env)
+
+Compare, sur les mêmes enregistrements et cache vidé à chaque passe, le
+calcul historique (chargement du one2many puis len() / sum() en Python) et
+le calcul actuel par requête groupée : nombre de requêtes SQL et temps.
+"""
+import time
+
+
+def _measure(env, records, compute, iterations):
+    queries = elapsed = 0
+    for _i in range(iterations):
+        env.invalidate_all()
+        records = records.browse(records.ids)
+        count_before = env.cr.sql_log_count
+        start = time.perf_counter()
+        compute(records)
+        elapsed += time.perf_counter() - start
+        queries += env.cr.sql_log_count - count_before
+    return {
+        'queries': queries / iterations,
+        'ms': elapsed / iterations * 1000,
+    }
+
+
+def _legacy_variety(varieties):
+    return {variety.id: len(variety.seed_lot_ids) for variety in varieties}
+
+
+def _legacy_partner(partners):
+    return {
+        partner.id: (len(partner.seed_lot_ids), len(partner.parcel_ids), sum(partner.parcel_ids.mapped('area')))
+        for partner in partners
+    }
+
+
+def run_counter_benchmark(env, limit=200, iterations=5):
+    """Affiche requêtes et temps, historique / groupé, pour variétés et multiplicateurs"""
+    cases = {
+        'variétés': (
+            env['isra.seed.variety'].search([], limit=limit),
+            _legacy_variety,
+            lambda varieties: varieties.mapped('seed_lot_count'),
+        ),
+        'multiplicateurs': (
+            env['res.partner'].search([('is_multiplier', '=', True)], limit=limit),
+            _legacy_partner,
+            lambda partners: [(p.seed_lot_count, p.parcel_count, p.total_area) for p in partners],
+        ),
+    }
+
+    results = {}
+    print(f"📊 Compteurs calculés, {iterations} passe(s), cache vidé à chaque passe")
+    print(f"   {'modèle':<16} {'enreg.':>7} {'calcul':<10} {'requêtes':>9} {'ms':>9}")
+    for label, (records, legacy, grouped) in cases.items():
+        results[label] = {
+            'records': len(records),
+            'legacy': _measure(env, records, legacy, iterations),
+            'grouped': _measure(env, records, grouped, iterations),
+        }
+        for mode in ('legacy', 'grouped'):
+            row = results[label][mode]
+            print(f"   {label:<16} {len(records):>7} {mode:<10} {row['queries']:>9.1f} {row['ms']:>9.2f}")
+    return results
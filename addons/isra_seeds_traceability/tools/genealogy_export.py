@@ -0,0 +1,123 @@
+# tools/genealogy_export.py
+"""
+Export en flux de la généalogie des lots (JSON lines ou GraphML)
+
+Les lots sont lus par paquets depuis un curseur côté serveur (DECLARE /
+FETCH) et écrits au fur et à mesure : la mémoire utilisée ne dépend pas de
+la taille de l'arbre. Les lots sont triés par parent_path, chaque lot arrive
+donc après son parent, suivi de l'arête parent -> enfant.
+
+En ligne de commande (voir cli/genealogy_export.py) :
+    odoo-bin --addons-path=<chemins> isra-genealogy-export -d isra_db --format graphml --variety 3 -o /tmp/lignee.graphml
+"""
+import json
+import logging
+from xml.sax.saxutils import escape, quoteattr
+
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Lots lus par FETCH
+EXPORT_BATCH_SIZE = 2000
+
+# Format -> (type MIME, extension)
+EXPORT_FORMATS = {
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'graphml': ('application/graphml+xml', 'graphml'),
+}
+
+# Attributs des nœuds, dans l'ordre des colonnes lues (après id et parent)
+NODE_ATTRIBUTES = ('name', 'level', 'quantity', 'production_date', 'status')
+
+_GRAPHML_TYPES = {'quantity': 'double'}
+
+
+def iter_rows(cr, query, batch_size=EXPORT_BATCH_SIZE, cursor_name='isra_genealogy_export'):
+    """Lignes de `query` lues par paquets depuis un curseur côté serveur"""
+    cr.execute(SQL("DECLARE %s NO SCROLL CURSOR FOR %s", SQL.identifier(cursor_name), query))
+    try:
+        while True:
+            cr.execute(SQL("FETCH FORWARD %s FROM %s", batch_size, SQL.identifier(cursor_name)))
+            rows = cr.fetchall()
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cr.execute(SQL("CLOSE %s", SQL.identifier(cursor_name)))
+
+
+def _node(row):
+    lot_id, parent_id, *values = row
+    node = dict(zip(NODE_ATTRIBUTES, values))
+    if node['production_date']:
+        node['production_date'] = node['production_date'].isoformat()
+    return lot_id, parent_id, node
+
+
+def iter_jsonl(rows):
+    """Un objet JSON par ligne : {"type": "node", ...} puis {"type": "edge", ...}"""
+    for row in rows:
+        lot_id, parent_id, node = _node(row)
+        yield json.dumps(dict(type='node', id=lot_id, **node), ensure_ascii=False) + '\n'
+        if parent_id:
+            yield json.dumps({'type': 'edge', 'source': parent_id, 'target': lot_id}) + '\n'
+
+
+def iter_graphml(rows):
+    """Document GraphML (graphe orienté parent -> enfant)"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    for attribute in NODE_ATTRIBUTES:
+        attr_type = _GRAPHML_TYPES.get(attribute, 'string')
+        yield f'  <key id="{attribute}" for="node" attr.name="{attribute}" attr.type="{attr_type}"/>\n'
+    yield '  <graph id="genealogy" edgedefault="directed">\n'
+    for row in rows:
+        lot_id, parent_id, node = _node(row)
+        data = ''.join(
+            f'<data key="{key}">{escape(str(value))}</data>'
+            for key, value in node.items() if value not in (None, False)
+        )
+        yield f'    <node id={quoteattr(f"n{lot_id}")}>{data}</node>\n'
+        if parent_id:
+            yield f'    <edge source="n{parent_id}" target="n{lot_id}"/>\n'
+    yield '  </graph>\n</graphml>\n'
+
+
+def iter_encoded(chunks, buffer_size=65536):
+    """Regroupe les morceaux de texte en blocs d'octets pour la réponse HTTP"""
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def iter_export(rows, fmt):
+    """Morceaux de texte de l'export des lignes `rows` au format `fmt`"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    serializer = iter_jsonl if fmt == 'jsonl' else iter_graphml
+    return serializer(rows)
+
+
+def export_genealogy(env, path, fmt='jsonl', variety_id=None, root_lot_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """Écrit l'export dans le fichier `path` ; retourne le nombre de lots exportés"""
+    query = env['isra.seed.lot']._get_genealogy_export_query(variety_id=variety_id, root_lot_id=root_lot_id)
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    with open(path, 'w', encoding='utf-8') as output:
+        for chunk in iter_export(counted(iter_rows(env.cr, query, batch_size)), fmt):
+            output.write(chunk)
+    _logger.info("%s lot(s) exporté(s) vers %s", count, path)
+    return count
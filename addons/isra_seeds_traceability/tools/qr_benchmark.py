@@ -0,0 +1,136 @@
+# tools/qr_benchmark.py
+"""
+Mesures de performance des QR codes
+
+À exécuter depuis le shell Odoo : odoo-bin shell -d isra_db
+    from odoo.addons.isra_seeds_traceability.tools import qr_benchmark
+    qr_benchmark.run_payload_benchmark(env)
+    qr_benchmark.run_renderer_benchmark(env)
+
+- run_payload_benchmark : formats de données (legacy JSON / compact) ;
+  version du symbole QR, taille des données, taille du PNG, temps de rendu
+- run_renderer_benchmark : moteurs de rendu (PIL / matrice) ; temps de rendu
+  et taille du PNG
+"""
+import time
+from io import BytesIO
+
+from . import qr_payload, qr_render
+
+SAMPLE_LOT = {
+    'lot_id': 'SL-G1-2024-SL-001',
+    'variety_name': 'Sahel 108',
+    'variety_code': 'SAHEL108',
+    'level': 'G1',
+    'production_date': '2024-01-15',
+    'multiplier': 'Coopérative de Ross Béthio',
+    'verification_url': 'https://isra.sn/verify/SL-G1-2024-SL-001',
+}
+
+
+def _measure(payload, iterations):
+    import qrcode
+
+    start = time.perf_counter()
+    for _i in range(iterations):
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_M,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(payload)
+        qr.make(fit=True)
+        buffer = BytesIO()
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    elapsed = (time.perf_counter() - start) / iterations
+
+    return {
+        'version': qr.version,
+        'payload_bytes': len(payload.encode('utf-8')),
+        'png_bytes': len(buffer.getvalue()),
+        'render_ms': elapsed * 1000,
+    }
+
+
+def _sample_lots(env, limit):
+    if env is None:
+        return [SAMPLE_LOT]
+    lots = env['isra.seed.lot'].search([], limit=limit)
+    return [{
+        'lot_id': lot.name,
+        'variety_name': lot.variety_id.name,
+        'variety_code': lot.variety_id.code,
+        'level': lot.level,
+        'production_date': str(lot.production_date),
+        'multiplier': lot.multiplier_id.name if lot.multiplier_id else '',
+        'verification_url': f"https://isra.sn/verify/{lot.name}",
+    } for lot in lots] or [SAMPLE_LOT]
+
+
+def run_payload_benchmark(env=None, limit=20, iterations=20):
+    """Affiche la comparaison legacy / compact sur des lots réels (ou un exemple)"""
+    samples = _sample_lots(env, limit)
+    results = {}
+    for payload_format in (qr_payload.FORMAT_LEGACY, qr_payload.FORMAT_COMPACT):
+        rows = [_measure(qr_payload.encode(data, payload_format), iterations) for data in samples]
+        results[payload_format] = {
+            key: sum(row[key] for row in rows) / len(rows)
+            for key in ('version', 'payload_bytes', 'png_bytes', 'render_ms')
+        }
+
+    print(f"📊 Formats QR sur {len(samples)} lot(s), {iterations} rendu(s) chacun")
+    print(f"   {'format':<8} {'version':>8} {'octets':>8} {'PNG':>8} {'ms':>8}")
+    for payload_format, row in results.items():
+        print(f"   {payload_format:<8} {row['version']:>8.1f} {row['payload_bytes']:>8.0f} "
+              f"{row['png_bytes']:>8.0f} {row['render_ms']:>8.2f}")
+    return results
+
+
+def run_renderer_benchmark(env=None, limit=20, iterations=50):
+    """
+    Compare le rendu PIL et le rendu direct depuis la matrice de modules
+
+    L'encodage (qr.make) est commun aux deux moteurs : il est mesuré à part
+    pour isoler le coût de production de l'image.
+    """
+    import qrcode
+
+    payloads = [qr_payload.encode(data) for data in _sample_lots(env, limit)]
+    config = {
+        'version': 1,
+        'error_correction': qrcode.constants.ERROR_CORRECT_M,
+        'box_size': 10,
+        'border': 4,
+    }
+
+    start = time.perf_counter()
+    for _i in range(iterations):
+        codes = [qr_render.build_qr(payload, config) for payload in payloads]
+    encode_ms = (time.perf_counter() - start) / (iterations * len(payloads)) * 1000
+
+    renderers = {
+        qr_render.RENDERER_PIL: lambda qr: qr_render._render_pil(qr, config),
+        qr_render.RENDERER_MATRIX: lambda qr: qr_render.matrix_to_png(qr.get_matrix(), config['box_size']),
+    }
+    results = {}
+    for renderer, render in renderers.items():
+        start = time.perf_counter()
+        for _i in range(iterations):
+            images = [render(qr) for qr in codes]
+        image_ms = (time.perf_counter() - start) / (iterations * len(codes)) * 1000
+        results[renderer] = {
+            'image_ms': image_ms,
+            'total_ms': encode_ms + image_ms,
+            'png_bytes': sum(len(image) for image in images) / len(images),
+        }
+
+    pil, matrix = results[qr_render.RENDERER_PIL], results[qr_render.RENDERER_MATRIX]
+    print(f"📊 Moteurs de rendu sur {len(payloads)} QR code(s), {iterations} passe(s)")
+    print(f"   encodage qr.make commun : {encode_ms:.2f} ms")
+    print(f"   {'moteur':<8} {'image ms':>9} {'total ms':>9} {'PNG':>8}")
+    for renderer, row in results.items():
+        print(f"   {renderer:<8} {row['image_ms']:>9.2f} {row['total_ms']:>9.2f} {row['png_bytes']:>8.0f}")
+    print(f"   Accélération image : x{pil['image_ms'] / matrix['image_ms']:.1f}, "
+          f"totale : x{pil['total_ms'] / matrix['total_ms']:.1f}")
+    return results
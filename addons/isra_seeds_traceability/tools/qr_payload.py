@@ -0,0 +1,153 @@
+# tools/qr_payload.py
+"""
+Formats des données encodées dans les QR codes des lots
+
+- legacy  : JSON indenté avec clés longues et URL de vérification complète
+- compact : ISRA1/<lot>/<code variété>/<niveau>/<AAAAMMJJ>
+            ISRA2/<lot>/<code variété>/<niveau>/<AAAAMMJJ>/<clé>/<signature> (signé)
+
+Signature : HMAC-SHA256 tronqué (80 bits) des champs canoniques
+lot/code/niveau/date, encodé en base32. La clé utilisée est identifiée
+par un court identifiant pour permettre la rotation des clés.
+
+Le format compact n'utilise que des caractères du mode alphanumérique QR
+(0-9 A-Z espace $ % * + - . / :) dès que l'identifiant du lot et le code
+variété s'y prêtent, ce qui donne des symboles de version plus basse.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import re
+
+COMPACT_PREFIX = 'ISRA'
+COMPACT_VERSION = '1'
+COMPACT_SIGNED_VERSION = '2'
+COMPACT_SEPARATOR = '/'
+
+SIGNATURE_BYTES = 10
+
+FORMAT_COMPACT = 'compact'
+FORMAT_LEGACY = 'legacy'
+
+_DATE_RE = re.compile(r'^(\d{4})(\d{2})(\d{2})$')
+
+
+def encode_legacy(data):
+    """Encode au format JSON historique"""
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def _canonical_fields(data):
+    return [
+        data.get('lot_id') or '',
+        (data.get('variety_code') or '').upper(),
+        data.get('level') or '',
+        (data.get('production_date') or '').replace('-', ''),
+    ]
+
+
+def sign(data, key):
+    """Signature HMAC des champs canoniques du lot (base32, sans remplissage)"""
+    message = COMPACT_SEPARATOR.join(_canonical_fields(data)).encode('utf-8')
+    digest = hmac.new(key, message, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.b32encode(digest).decode('ascii').rstrip('=')
+
+
+def verify_signature(data, keys):
+    """
+    Vérifie la signature portée par les données, sans accès à la base
+
+    :param keys: {identifiant: clé (bytes)}
+    :return: None si les données ne sont pas signées, sinon True/False
+    """
+    signature = data.get('sig')
+    if not signature:
+        return None
+    key = keys.get(data.get('kid') or '')
+    if not key:
+        return False
+    return hmac.compare_digest(sign(data, key), str(signature).upper())
+
+
+def encode_compact(data):
+    """Encode au format compact versionné (ISRA2 si les données sont signées)"""
+    if data.get('sig'):
+        version = COMPACT_SIGNED_VERSION
+        signature = [data.get('kid') or '', data['sig']]
+    else:
+        version = COMPACT_VERSION
+        signature = []
+    return COMPACT_SEPARATOR.join([COMPACT_PREFIX + version] + _canonical_fields(data) + signature)
+
+
+def encode(data, payload_format=FORMAT_COMPACT):
+    """Encode les données du lot dans le format demandé"""
+    if payload_format == FORMAT_LEGACY:
+        return encode_legacy(data)
+    return encode_compact(data)
+
+
+def _compact_version(text):
+    if not isinstance(text, str):
+        return None
+    for version in (COMPACT_VERSION, COMPACT_SIGNED_VERSION):
+        if text.startswith(COMPACT_PREFIX + version + COMPACT_SEPARATOR):
+            return version
+    return None
+
+
+def is_compact(text):
+    return _compact_version(text) is not None
+
+
+def decode_compact(text):
+    """Décode le format compact en dictionnaire aux clés du format JSON"""
+    version = _compact_version(text)
+    body = text[len(COMPACT_PREFIX + version + COMPACT_SEPARATOR):]
+    signed = version == COMPACT_SIGNED_VERSION
+    # L'identifiant du lot peut contenir le séparateur : on découpe par la fin
+    count = 5 if signed else 3
+    parts = body.rsplit(COMPACT_SEPARATOR, count)
+    if len(parts) != count + 1 or not parts[0]:
+        raise ValueError("QR code ISRA compact mal formé")
+
+    signature = {}
+    if signed:
+        signature = {'kid': parts[-2], 'sig': parts[-1]}
+        parts = parts[:-2]
+
+    lot_id, variety_code, level, production_date = parts
+    match = _DATE_RE.match(production_date)
+    if match:
+        production_date = '-'.join(match.groups())
+
+    return {
+        'lot_id': lot_id,
+        'variety_code': variety_code,
+        'level': level,
+        'production_date': production_date,
+        'format': FORMAT_COMPACT,
+        **signature,
+    }
+
+
+def decode(text):
+    """
+    Décode des données QR dans l'un ou l'autre format
+
+    Retourne un dictionnaire ; lève ValueError si le contenu n'est pas reconnu.
+    """
+    if isinstance(text, dict):
+        return text
+    text = (text or '').strip()
+    if is_compact(text):
+        return decode_compact(text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ValueError("Format QR non reconnu")
+    if not isinstance(data, dict):
+        raise ValueError("Format QR non reconnu")
+    data.setdefault('format', FORMAT_LEGACY)
+    return data
@@ -0,0 +1,150 @@
+# tools/qr_render.py
+"""
+Rendu des QR codes
+
+Deux moteurs sont disponibles :
+- pil    : qrcode.make_image() via Pillow (historique, couleurs personnalisables)
+- matrix : lit la matrice de modules de qrcode et écrit directement un PNG
+           1 bit (agrandissement NumPy + zlib) ou un SVG, sans passer par PIL
+
+Le moteur matrix ne produit que du noir sur blanc ; avec d'autres couleurs
+le rendu repasse automatiquement par PIL.
+"""
+import struct
+import zlib
+from io import BytesIO
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+RENDERER_PIL = 'pil'
+RENDERER_MATRIX = 'matrix'
+
+FORMAT_PNG = 'png'
+FORMAT_SVG = 'svg'
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def build_qr(payload, config):
+    """Construit l'objet qrcode.QRCode pour les données et la configuration"""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=config.get('version', 1),
+        error_correction=config.get('error_correction', qrcode.constants.ERROR_CORRECT_M),
+        box_size=config.get('box_size', 10),
+        border=config.get('border', 4),
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+def _png_chunk(tag, data):
+    return (struct.pack('>I', len(data)) + tag + data
+            + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+
+def matrix_to_png(matrix, box_size):
+    """
+    Écrit une matrice de modules (True = noir) en PNG niveaux de gris 1 bit
+
+    Chaque module devient un carré de box_size x box_size pixels.
+    """
+    size = len(matrix) * box_size
+
+    if numpy is not None:
+        # 1 = blanc en niveaux de gris : on inverse la matrice puis on agrandit
+        modules = ~numpy.asarray(matrix, dtype=bool)
+        pixels = modules.repeat(box_size, axis=0).repeat(box_size, axis=1)
+        rows = numpy.packbits(pixels, axis=1)
+        # Octet de filtre 0 (aucun) en tête de chaque ligne
+        raw = numpy.hstack([numpy.zeros((size, 1), dtype=numpy.uint8), rows]).tobytes()
+    else:
+        lines = []
+        for row in matrix:
+            bits = ''.join('0' * box_size if dark else '1' * box_size for dark in row)
+            bits += '0' * (-len(bits) % 8)
+            line = b'\x00' + int(bits, 2).to_bytes(len(bits) // 8, 'big')
+            lines.extend([line] * box_size)
+        raw = b''.join(lines)
+
+    header = struct.pack('>IIBBBBB', size, size, 1, 0, 0, 0, 0)
+    return b''.join([
+        _PNG_SIGNATURE,
+        _png_chunk(b'IHDR', header),
+        _png_chunk(b'IDAT', zlib.compress(raw, 6)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+def matrix_to_svg(matrix, box_size, fill_color='black', back_color='white'):
+    """Écrit une matrice de modules en SVG (un tracé par suite de modules noirs)"""
+    count = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < count:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < count and row[x]:
+                x += 1
+            path.append(f"M{start},{y}h{x - start}v1h-{x - start}z")
+
+    size = count * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {count} {count}" shape-rendering="crispEdges">'
+        f'<rect width="{count}" height="{count}" fill="{back_color}"/>'
+        f'<path fill="{fill_color}" d="{"".join(path)}"/></svg>'
+    ).encode('utf-8')
+
+
+def _render_pil(qr, config):
+    img = qr.make_image(
+        fill_color=config.get('fill_color', 'black'),
+        back_color=config.get('back_color', 'white'),
+    )
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _is_black_on_white(config):
+    return (config.get('fill_color', 'black') == 'black'
+            and config.get('back_color', 'white') == 'white')
+
+
+def render(payload, config, image_format=FORMAT_PNG):
+    """Rend les données en image (octets PNG ou SVG) selon la configuration"""
+    qr = build_qr(payload, config)
+    box_size = config.get('box_size', 10)
+
+    if image_format == FORMAT_SVG:
+        return matrix_to_svg(
+            qr.get_matrix(), box_size,
+            fill_color=config.get('fill_color', 'black'),
+            back_color=config.get('back_color', 'white'),
+        )
+
+    if config.get('renderer', RENDERER_MATRIX) == RENDERER_MATRIX and _is_black_on_white(config):
+        return matrix_to_png(qr.get_matrix(), box_size)
+    return _render_pil(qr, config)
+
+
+def render_key(config, image_format=FORMAT_PNG):
+    """Identifiant stable des paramètres de rendu (pour les caches)"""
+    return ':'.join(str(part) for part in (
+        image_format,
+        config.get('renderer', RENDERER_MATRIX),
+        config.get('error_correction'),
+        config.get('box_size', 10),
+        config.get('border', 4),
+        config.get('fill_color', 'black'),
+        config.get('back_color', 'white'),
+    ))
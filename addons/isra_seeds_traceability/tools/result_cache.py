@@ -0,0 +1,84 @@
+# tools/result_cache.py
+"""
+Cache LRU à durée de vie limitée, local à chaque worker Odoo
+
+Utilisé pour les pages publiques de vérification (isra_qr_integration) et
+les indicateurs du tableau de bord : les entrées peuvent être invalidées
+explicitement et expirent après `ttl` secondes. Une version (ex. date de
+modification) peut être associée à chaque entrée : une lecture avec une
+autre version est un échec de cache.
+Les compteurs permettent de dimensionner le cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+
+    def __init__(self, size=1024, ttl=300):
+        self.size = size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def get(self, key, version=None):
+        """Valeur en cache ou None (entrée absente, expirée ou d'une autre version)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, entry_version, value = entry
+            if expires_at < time.monotonic() or entry_version != version:
+                del self._data[key]
+                if entry_version != version:
+                    self.stale += 1
+                else:
+                    self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate):
+        """Supprime les entrées dont la clé vérifie predicate(key)"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'stale': self.stale,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+